@@ -1,21 +1,37 @@
 import os
 import json
+import time
 import uuid
+import sqlite3
+import hashlib
 import logging
 from fastapi import UploadFile
-from typing import Optional, List, Dict, Any
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 
 from app.services.services import (
+    BatchItem,
     ExtractionService,
     VerificationService,
 )
 from app.dto.models import (
     OCRRequest,
     ExtractionResponse,
+    ExtractionPageResult,
+    BatchExtractionResponse,
     VerificationRequest,
     VerificationResult,
+    BulkVerificationRequest,
+    BulkVerificationResult,
+    JobStatus,
 )
-from app.utils import is_pdf_file
+from app.services.overlay import OverlayStore
+from app.services.jobs import JobRunner
+from app.services.result_store import ResultStore
+from app.services.admission import AdmissionController, AdmissionRejected, CostEstimate, Ticket
+from app.utils import is_pdf_file, sha256_file
+from app.utils.cancellation import CancellationToken, OperationCancelled, checkpoint
+from app.utils.archive_utils import ArchiveError, expand_archive, is_archive, is_document, unique_name
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +47,7 @@ class OCRController:
     - Manage UploadFile I/O
     - Dispatch to services
     - No business logic (follows SRP)
+    - Runs blocking OCR work in the threadpool so concurrent requests use the engine pools
     - Implements the design shown in your class diagram
     """
 
@@ -38,40 +55,67 @@ class OCRController:
         self,
         extraction_service: ExtractionService,
         verification_service: VerificationService,
+        overlay_store: Optional[OverlayStore] = None,
+        job_runner: Optional[JobRunner] = None,
+        result_store: Optional[ResultStore] = None,
+        admission: Optional[AdmissionController] = None,
+        batch_max_files: int = 1000,
+        batch_max_bytes: int = 256 * 1024 * 1024,
     ):
         self.extraction_service = extraction_service
         self.verification_service = verification_service
+        self.overlay_store = overlay_store
+        self.job_runner = job_runner
+        self.result_store = result_store
+        self.admission = admission
+        self.batch_max_files = batch_max_files
+        self.batch_max_bytes = batch_max_bytes
 
     # ------------------------------------------------------------------
     # Extract Single Page
     # ------------------------------------------------------------------
-    async def extract(self, file: UploadFile, req: OCRRequest) -> ExtractionResponse:
+    async def extract(
+        self, file: UploadFile, req: OCRRequest, cancel: Optional[CancellationToken] = None
+    ) -> ExtractionResponse:
         file_path = self._save_temp_file(file)
+        keep_file = False
+        ticket = None
         try:
-            response = self.extraction_service.extract_single_page(
+            ticket = await self._admit_file(file_path, req.fields, [req.page_number], cancel)
+            response = await run_in_threadpool(
+                self.extraction_service.extract_single_page,
                 file_path=file_path,
                 language=req.language,
                 page_number=req.page_number,
                 custom_fields=req.fields,
+                endpoint="extract",
+                cancel=cancel,
             )
 
             # Add overlay if requested
             if req.include_detection:
-                encoded = self.extraction_service.build_confidence_overlay(
-                    file_path, response.detections
-                )
-                response.confidence_overlay = encoded
+                overlay, keep_file = await self._build_overlay(file_path, response, req)
+                for key, value in overlay.items():
+                    setattr(response, key, value)
                 response.has_detection_data = True
 
+            await run_in_threadpool(
+                self._store_file_result, file_path, response, "extract", file.filename, req, req.page_number
+            )
             return response
         finally:
-            self._cleanup(file_path)
+            self._release(ticket, cancel)
+            if not keep_file:
+                self._cleanup(file_path)
 
     # ------------------------------------------------------------------
     # Extract All PDF Pages
     # ------------------------------------------------------------------
-    async def extract_all_pages(self, file: UploadFile, req: OCRRequest) -> ExtractionResponse:
+    async def extract_all_pages(
+        self, file: UploadFile, req: OCRRequest, cancel: Optional[CancellationToken] = None
+    ) -> ExtractionResponse:
         file_path = self._save_temp_file(file)
+        ticket = None
         try:
             if not is_pdf_file(file_path):
                 return ExtractionResponse(
@@ -80,67 +124,547 @@ class OCRController:
                     is_pdf=False,
                 )
 
-            return self.extraction_service.extract_all_pages(
+            if self.admission is not None:
+                plan = await run_in_threadpool(
+                    self.extraction_service.plan_pages, file_path, req.pages, req.max_pages
+                )
+                ticket = await self._admit_file(file_path, req.fields, plan.selected, cancel)
+            response = await run_in_threadpool(
+                self.extraction_service.extract_all_pages,
                 file_path=file_path,
                 language=req.language,
                 custom_fields=req.fields,
+                pages=req.pages,
+                max_pages=req.max_pages,
+                cancel=cancel,
             )
+            await run_in_threadpool(self._store_file_result, file_path, response, "pdf_all", file.filename, req)
+            return response
+        finally:
+            self._release(ticket, cancel)
+            self._cleanup(file_path)
+
+    # ------------------------------------------------------------------
+    # Batch Extraction (many files or an archive per request)
+    # ------------------------------------------------------------------
+    async def prepare_batch(
+        self, files: List[UploadFile], req: OCRRequest, options: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[BatchItem]:
+        """
+        Read every upload into memory (no temp files) and expand zip/tar archives.
+
+        options: per-file overrides {"<file name>": {"language", "fields", "page_number"}};
+                 looked up by file name or archive member path, then by base name
+        """
+        options = options or {}
+        documents: List[Tuple[str, bytes]] = []
+        total_bytes = 0
+        for file in files:
+            data = await file.read()
+            filename = file.filename or "document"
+            if is_archive(filename):
+                remaining = self.batch_max_bytes - total_bytes
+                members = await run_in_threadpool(
+                    expand_archive, filename, data, self.batch_max_files - len(documents), remaining
+                )
+                documents.extend(members)
+                total_bytes += sum(len(content) for _, content in members)
+            elif is_document(filename):
+                documents.append((filename, data))
+                total_bytes += len(data)
+            else:
+                raise ArchiveError(f"Unsupported file type: {filename}")
+            if len(documents) > self.batch_max_files or total_bytes > self.batch_max_bytes:
+                raise ArchiveError(
+                    f"Batch exceeds the limit of {self.batch_max_files} files / {self.batch_max_bytes} bytes"
+                )
+
+        seen: Dict[str, int] = {}
+        items = []
+        for filename, data in documents:
+            name = unique_name(filename, seen)
+            override = options.get(name) or options.get(filename) or options.get(os.path.basename(filename)) or {}
+            items.append(BatchItem(
+                name=name,
+                data=data,
+                language=str(override.get("language", req.language)).lower(),
+                fields=override.get("fields", req.fields),
+                page_number=int(override.get("page_number", req.page_number)),
+            ))
+        return items
+
+    async def stream_batch(
+        self, items: List[BatchItem], cancel: Optional[CancellationToken] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """Admit the batch (AdmissionRejected raises here, before anything is sent) and return batch_events()."""
+        try:
+            ticket = await self._admit_batch(items, cancel)
+        except Exception:
+            self._release(None, cancel)
+            raise
+        return self.batch_events(items, ticket, cancel)
+
+    def batch_events(
+        self, items: List[BatchItem], ticket: Optional[Ticket] = None, cancel: Optional[CancellationToken] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        ("result", (name, response)) / ("error", (name, message)) per file, then ("summary", dict).
+
+        ticket: admission ticket released once the last file is done
+        cancel: stops the batch at the next chunk / stage boundary (OperationCancelled)
+        """
+        start = time.perf_counter()
+        succeeded = failed = 0
+        by_name = {item.name: item for item in items}
+        try:
+            for name, outcome in self.extraction_service.extract_batch(items, cancel):
+                if isinstance(outcome, Exception):
+                    failed += 1
+                    yield "error", (name, str(outcome) or type(outcome).__name__)
+                else:
+                    succeeded += 1
+                    item = by_name[name]
+                    self._store_result(
+                        outcome, hashlib.sha256(item.data).hexdigest(), "batch", name,
+                        item.language, item.page_number, {"fields": item.fields},
+                    )
+                    yield "result", (name, outcome)
+        finally:
+            self._release(ticket, cancel)
+        elapsed = time.perf_counter() - start
+        yield "summary", {
+            "total_files": len(items),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_time": round(elapsed, 3),
+            "files_per_second": round(len(items) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    async def extract_batch(
+        self, items: List[BatchItem], cancel: Optional[CancellationToken] = None
+    ) -> BatchExtractionResponse:
+        try:
+            ticket = await self._admit_batch(items, cancel)
+        except Exception:
+            self._release(None, cancel)
+            raise
+
+        def collect() -> BatchExtractionResponse:
+            response = BatchExtractionResponse()
+            for kind, payload in self.batch_events(items, ticket, cancel):
+                if kind == "result":
+                    response.results[payload[0]] = payload[1]
+                elif kind == "error":
+                    response.errors[payload[0]] = payload[1]
+                else:
+                    response.total_files = payload["total_files"]
+                    response.elapsed_time = payload["elapsed_time"]
+                    response.files_per_second = payload["files_per_second"]
+            # Results arrive in completion order; return them in upload order
+            response.results = {i.name: response.results[i.name] for i in items if i.name in response.results}
+            return response
+
+        return await run_in_threadpool(collect)
+
+    # ------------------------------------------------------------------
+    # Stream All PDF Pages
+    # ------------------------------------------------------------------
+    async def stream_all_pages(
+        self, file: UploadFile, req: OCRRequest, cancel: Optional[CancellationToken] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Plan the pages (page selection errors raise here, before anything is sent) and
+        return a generator of ("page", ExtractionPageResult) events ending with one
+        ("summary", dict). The generator owns the uploaded file and the admission ticket.
+        """
+        file_path = self._save_temp_file(file)
+        ticket = None
+        try:
+            plan = None
+            if is_pdf_file(file_path):
+                plan = await run_in_threadpool(
+                    self.extraction_service.plan_pages, file_path, req.pages, req.max_pages
+                )
+                ticket = await self._admit_file(file_path, req.fields, plan.selected, cancel)
+        except Exception:
+            self._cleanup(file_path)
+            self._release(None, cancel)
+            raise
+        return self._page_events(file_path, file.filename, req, plan, ticket, cancel)
+
+    def _page_events(
+        self,
+        file_path: str,
+        filename: Optional[str],
+        req: OCRRequest,
+        plan: Any,
+        ticket: Optional[Ticket] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterator[Tuple[str, Any]]:
+        start = time.perf_counter()
+        summary: Dict[str, Any] = {"is_pdf": plan is not None, "status": "complete", "pages_done": 0}
+        done: List[ExtractionPageResult] = []
+        try:
+            if plan is not None:
+                summary.update(
+                    page_count=plan.page_count,
+                    pages_selected=len(plan.selected),
+                    pages_truncated=plan.truncated,
+                )
+                pages = self.extraction_service.iter_pages(file_path, req.language, req.fields, plan, cancel)
+                for page in pages:
+                    summary["pages_done"] += 1
+                    done.append(page)
+                    yield "page", page
+
+                # Only a complete run is stored, like the non-streaming endpoint
+                response = ExtractionResponse(
+                    pages={str(p.page_number): p for p in sorted(done, key=lambda p: p.page_number)},
+                    is_pdf=True,
+                    page_count=plan.page_count,
+                    pages_truncated=plan.truncated,
+                )
+                self._store_file_result(file_path, response, "pdf_all", filename, req)
+                summary.update(extraction_id=response.extraction_id, document_hash=response.document_hash)
+        except OperationCancelled as e:
+            summary.update(status="cancelled", error=str(e))
+        except Exception as e:
+            # Headers are already sent: report the failure in the summary frame
+            logger.error(f"Streaming extraction failed: {e}")
+            summary.update(status="failed", error=str(e))
+        finally:
+            self._release(ticket, cancel)
+            self._cleanup(file_path)
+        summary["elapsed_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+        yield "summary", summary
+
+    # ------------------------------------------------------------------
+    # PDF page index (page count, sizes, text-layer pages)
+    # ------------------------------------------------------------------
+    async def pdf_index(self, file: UploadFile) -> Optional[Dict[str, Any]]:
+        """Cached page metadata for a PDF upload; None when the file is not a PDF."""
+        file_path = self._save_temp_file(file)
+        try:
+            if not is_pdf_file(file_path):
+                return None
+            index = await run_in_threadpool(self.extraction_service.pdf_index.get, file_path)
+            return index.to_dict()
         finally:
             self._cleanup(file_path)
 
     # ------------------------------------------------------------------
     # Detect Only
     # ------------------------------------------------------------------
-    async def detect(self, file: UploadFile, req: OCRRequest) -> Dict[str, Any]:
+    async def detect(
+        self, file: UploadFile, req: OCRRequest, cancel: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
         file_path = self._save_temp_file(file)
+        keep_file = False
+        ticket = None
         try:
-            response = self.extraction_service.extract_single_page(
+            ticket = await self._admit_file(file_path, req.fields, [req.page_number], cancel)
+            response = await run_in_threadpool(
+                self.extraction_service.extract_single_page,
                 file_path=file_path,
                 language=req.language,
                 page_number=req.page_number,
                 custom_fields=req.fields,
+                endpoint="detect",
+                cancel=cancel,
             )
 
-            overlay = self.extraction_service.build_confidence_overlay(
-                file_path, response.detections
+            overlay, keep_file = await self._build_overlay(file_path, response, req)
+            await run_in_threadpool(
+                self._store_file_result, file_path, response, "detect", file.filename, req, req.page_number
             )
 
             return {
+                "extraction_id": response.extraction_id,
+                "document_hash": response.document_hash,
                 "detections": [d.dict() for d in response.detections],
                 "total_detections": response.total_detections,
-                "confidence_overlay": overlay,
+                "confidence_overlay": None,
+                **overlay,
                 "processing_info": response.processing_info.dict(),
             }
         finally:
+            self._release(ticket, cancel)
+            if not keep_file:
+                self._cleanup(file_path)
+
+    # ------------------------------------------------------------------
+    # Overlays
+    # ------------------------------------------------------------------
+    async def _build_overlay(
+        self, file_path: str, response: ExtractionResponse, req: OCRRequest
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Overlay fields for the response, per req.overlay_mode, and whether the
+        uploaded file was handed to the overlay store (and must not be removed).
+        """
+        detections = response.detection_batch or response.detections
+        dpi = response.processing_info.dpi if response.processing_info else None
+
+        if req.overlay_mode == "vector":
+            vector = await run_in_threadpool(
+                self.extraction_service.build_vector_overlay, file_path, detections, req.page_number, dpi
+            )
+            return {"overlay_vector": vector}, False
+
+        if req.overlay_mode == "url" and self.overlay_store is not None:
+            overlay_id = self.overlay_store.put(file_path, detections, req.page_number, dpi)
+            return {"overlay_url": f"/overlay/{overlay_id}"}, True
+
+        encoded = await run_in_threadpool(
+            self.extraction_service.build_confidence_overlay,
+            file_path, detections, req.page_number, dpi, req.overlay_max_dim, req.overlay_format,
+        )
+        return {"confidence_overlay": encoded}, False
+
+    async def get_overlay(
+        self, overlay_id: str, image_format: Optional[str] = None, max_dimension: Optional[int] = None
+    ) -> Optional[Tuple[bytes, str]]:
+        """Render (once per format/size) a stored overlay; None when unknown or expired."""
+        entry = self.overlay_store.get(overlay_id) if self.overlay_store is not None else None
+        if entry is None:
+            return None
+
+        rendered = self.overlay_store.rendered(overlay_id, image_format, max_dimension)
+        if rendered is None:
+            rendered = await run_in_threadpool(
+                self.extraction_service.render_overlay,
+                entry["file_path"], entry["batch"], entry["page_number"], entry["dpi"],
+                max_dimension, image_format,
+            )
+            self.overlay_store.cache_rendered(overlay_id, image_format, max_dimension, rendered)
+        return rendered
+
+    # ------------------------------------------------------------------
+    # Stored results
+    # ------------------------------------------------------------------
+    async def get_result(self, extraction_id: str) -> Optional[ExtractionResponse]:
+        if self.result_store is None:
+            return None
+        result = await run_in_threadpool(self.result_store.get, extraction_id)
+        return ExtractionResponse(**result) if result is not None else None
+
+    async def find_results(
+        self, document_hash: str, limit: int = 20, language: Optional[str] = None, page_number: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        if self.result_store is None:
+            return []
+        return await run_in_threadpool(self.result_store.by_hash, document_hash.lower(), limit, language, page_number)
+
+    async def search_results(
+        self, query: str, limit: int = 20, document_hash: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if self.result_store is None:
+            return []
+        return await run_in_threadpool(
+            self.result_store.search, query, limit, document_hash.lower() if document_hash else None
+        )
+
+    async def remap(
+        self,
+        fields: Optional[List[str]],
+        extraction_id: Optional[str] = None,
+        document_hash: Optional[str] = None,
+        language: Optional[str] = None,
+        page_number: Optional[int] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Optional[ExtractionResponse]:
+        """
+        New mapped_fields for a stored result, from its detections (LLM time only).
+
+        The result is found by extraction_id, or as the newest result for
+        document_hash (optionally with that language / page). The remapped
+        result is stored under a new extraction id. None when nothing is stored.
+        """
+        if self.result_store is None:
+            return None
+
+        def run() -> Optional[ExtractionResponse]:
+            if extraction_id:
+                info = self.result_store.info(extraction_id)
+            else:
+                found = self.result_store.by_hash(document_hash.lower(), 1, language, page_number)
+                info = found[0] if found else None
+            result = self.result_store.get(info["extraction_id"]) if info is not None else None
+            if result is None:
+                return None
+            return self._remap_stored(info, ExtractionResponse(**result), fields, "remap", cancel)
+
+        try:
+            return await run_in_threadpool(run)
+        finally:
+            self._release(None, cancel)
+
+    def _remap_stored(
+        self,
+        info: Dict[str, Any],
+        stored: ExtractionResponse,
+        fields: Optional[List[str]],
+        endpoint: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> ExtractionResponse:
+        response = self.extraction_service.remap(stored, fields, cancel)
+        params = dict(info["params"] or {}, fields=fields, remapped_from=info["extraction_id"])
+        page_number = info["page_number"]
+        if page_number is None and not response.pages and response.processing_info is not None:
+            # One page taken out of a multi-page result
+            page_number = response.processing_info.page_number
+        self._store_result(
+            response, info["document_hash"], endpoint, info["filename"], info["language"], page_number, params,
+        )
+        return response
+
+    def _find_stored(
+        self, document_hash: str, language: Optional[str], page_number: int
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(metadata, result) of the newest stored result covering that page of the document."""
+        for info in self.result_store.by_hash(document_hash, 20, language):
+            if info["page_number"] not in (None, page_number):
+                continue
+            result = self.result_store.get(info["extraction_id"])
+            if result is None:
+                continue
+            if info["page_number"] is None and str(page_number) not in (result.get("pages") or {}):
+                continue
+            return info, result
+        return None
+
+    async def delete_result(self, extraction_id: str) -> bool:
+        if self.result_store is None:
+            return False
+        return await run_in_threadpool(self.result_store.delete, extraction_id)
+
+    def _store_file_result(
+        self,
+        file_path: str,
+        response: ExtractionResponse,
+        endpoint: str,
+        filename: Optional[str],
+        req: OCRRequest,
+        page_number: Optional[int] = None,
+    ):
+        if self.result_store is None:
+            return
+        params = {"fields": req.fields, "pages": req.pages, "max_pages": req.max_pages}
+        self._store_result(response, sha256_file(file_path), endpoint, filename, req.language, page_number, params)
+
+    def _store_result(
+        self,
+        response: ExtractionResponse,
+        document_hash: str,
+        endpoint: str,
+        filename: Optional[str],
+        language: str,
+        page_number: Optional[int],
+        params: Dict[str, Any],
+    ):
+        """Persist a result (sets its extraction_id / document_hash); storage errors never fail the request."""
+        if self.result_store is None:
+            return
+        try:
+            self.result_store.save(
+                response, document_hash, endpoint,
+                filename=filename,
+                language=language,
+                page_number=page_number,
+                params={k: v for k, v in params.items() if v is not None},
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Could not store extraction result: {e}")
+
+    # ------------------------------------------------------------------
+    # Asynchronous jobs
+    # ------------------------------------------------------------------
+    async def submit_job(self, file: UploadFile, req: OCRRequest, mode: str) -> str:
+        """
+        Queue an extraction and return its job id; the runner takes ownership of the upload.
+
+        mode: "extract" (one page, req.page_number) or "pdf_all" (req.pages / req.max_pages)
+        """
+        file_path = self._save_temp_file(file)
+        try:
+            if mode == "pdf_all":
+                if not is_pdf_file(file_path):
+                    raise ValueError("mode 'pdf_all' requires a PDF document")
+                # Reject a bad page selection now rather than in the worker
+                await run_in_threadpool(self.extraction_service.plan_pages, file_path, req.pages, req.max_pages)
+
+            params = {
+                "language": req.language,
+                "fields": req.fields,
+                "page_number": req.page_number,
+                "pages": req.pages,
+                "max_pages": req.max_pages,
+            }
+            return await run_in_threadpool(self.job_runner.submit, file_path, mode, params)
+        finally:
+            # Moved into the job store on success
             self._cleanup(file_path)
 
+    async def get_job(self, job_id: str) -> Optional[JobStatus]:
+        job = await run_in_threadpool(self.job_runner.store.get, job_id)
+        if job is None:
+            return None
+        return JobStatus(
+            job_id=job["id"],
+            mode=job["mode"],
+            status=job["status"],
+            attempts=job["attempts"],
+            pages_total=job["pages_total"],
+            pages_done=job["pages_done"],
+            pages=job["pages"] if job["mode"] == "pdf_all" else None,
+            result=job["result"],
+            error=job["error"],
+            created_at=job["created_at"],
+            updated_at=job["updated_at"],
+            expires_at=job["expires_at"],
+        )
+
     # ------------------------------------------------------------------
     # Verify Extracted Fields
     # ------------------------------------------------------------------
-    async def verify(self, file: UploadFile, req: VerificationRequest) -> VerificationResult:
-        file_path = self._save_temp_file(file)
+    async def verify(
+        self, file: Optional[UploadFile], req: VerificationRequest, cancel: Optional[CancellationToken] = None
+    ) -> VerificationResult:
+        """
+        Verify submitted values, reusing a stored extraction whenever there is one.
+
+        Lookup: req.extraction_id; otherwise the newest stored result for
+        req.document_hash (or the uploaded document's hash) covering
+        req.page_number, in req.language when given. A stored result missing
+        some of req.fields is remapped from its detections (LLM only). Only when
+        nothing is stored is the upload OCR'd, in req.language / req.page_number.
+        Raises LookupError when nothing is stored and no document was uploaded,
+        ValueError for an unknown field type.
+        An uploaded document is admitted like a one-page /extract (it may need OCR).
+        """
+        file_path = self._save_temp_file(file) if file is not None else None
+        ticket = None
         try:
-            # Step 1: Extract OCR fields without overlay
-            extract_resp = self.extraction_service.extract_single_page(
-                file_path=file_path,
-                language="en",  # Verification default
-                page_number=1,
-                custom_fields=req.fields,
+            if file_path is not None:
+                ticket = await self._admit_file(file_path, req.fields, [req.page_number], cancel)
+            extracted_fields, details = await run_in_threadpool(
+                self._fields_for_verification, file_path, file.filename if file is not None else None, req, cancel
             )
 
-            extracted_fields = extract_resp.mapped_fields or {}
-
-            # Step 2: Verify
             verified = self.verification_service.verify(
                 submitted_data=req.verification_data,
                 extracted_fields=extracted_fields,
+                thresholds=req.thresholds,
+                field_types=req.field_types,
             )
 
             return VerificationResult(
                 success=True,
                 verified_fields=verified,
-                details={"page": 1},
+                details=details,
             )
+        except (LookupError, ValueError, AdmissionRejected, OperationCancelled):
+            raise
         except Exception as e:
             return VerificationResult(
                 success=False,
@@ -148,7 +672,151 @@ class OCRController:
                 details={"error": str(e)},
             )
         finally:
-            self._cleanup(file_path)
+            self._release(ticket, cancel)
+            if file_path is not None:
+                self._cleanup(file_path)
+
+    async def verify_bulk(
+        self, file: Optional[UploadFile], req: BulkVerificationRequest, cancel: Optional[CancellationToken] = None
+    ) -> BulkVerificationResult:
+        """
+        Score many submitted records against one extraction, found (or extracted) as in verify().
+
+        Raises LookupError when nothing is stored and no document was uploaded,
+        ValueError for an unknown field type.
+        """
+        file_path = self._save_temp_file(file) if file is not None else None
+        ticket = None
+        try:
+            if file_path is not None:
+                ticket = await self._admit_file(file_path, req.fields, [req.page_number], cancel)
+            extracted_fields, details = await run_in_threadpool(
+                self._fields_for_verification, file_path, file.filename if file is not None else None, req, cancel
+            )
+            result = await run_in_threadpool(
+                self.verification_service.verify_bulk,
+                req.records, extracted_fields, req.fields, req.thresholds, req.field_types,
+            )
+            return BulkVerificationResult(success=True, details=details, **result)
+        finally:
+            self._release(ticket, cancel)
+            if file_path is not None:
+                self._cleanup(file_path)
+
+    def _fields_for_verification(
+        self, file_path: Optional[str], filename: Optional[str], req: Any, cancel: Optional[CancellationToken] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(mapped fields, details) for req.page_number: stored, remapped or freshly extracted."""
+        page_number = req.page_number
+        found = None
+        if self.result_store is not None:
+            if req.extraction_id:
+                info = self.result_store.info(req.extraction_id)
+                result = self.result_store.get(req.extraction_id) if info is not None else None
+                if result is not None:
+                    found = info, result
+                    page_number = info["page_number"] or page_number
+            else:
+                document_hash = req.document_hash or (sha256_file(file_path) if file_path else None)
+                if document_hash:
+                    found = self._find_stored(document_hash.lower(), req.language, page_number)
+
+        if found is None:
+            if file_path is None:
+                key = f"extraction '{req.extraction_id}'" if req.extraction_id else f"document '{req.document_hash}'"
+                raise LookupError(f"No stored OCR result for {key} (never stored, expired or evicted); upload the document")
+            ocr_req = OCRRequest(language=req.language or "en", page_number=page_number, fields=req.fields)
+            response = self.extraction_service.extract_single_page(
+                file_path=file_path,
+                language=ocr_req.language,
+                page_number=page_number,
+                custom_fields=req.fields,
+                endpoint="verify",
+                cancel=cancel,
+            )
+            self._store_file_result(file_path, response, "verify", filename, ocr_req, page_number)
+            details = {"page": page_number, "source": "extracted", "extraction_id": response.extraction_id}
+            return response.mapped_fields or {}, details
+
+        info, result = found
+        if result.get("pages"):
+            page = result["pages"].get(str(page_number))
+            if page is None:
+                raise LookupError(f"Page {page_number} is not part of extraction '{info['extraction_id']}'")
+            stored = ExtractionResponse(
+                mapped_fields=page["mapped_fields"],
+                detections=page["detections"],
+                total_detections=len(page["detections"]),
+                processing_info=page["processing_info"],
+                is_pdf=True,
+            )
+        else:
+            stored = ExtractionResponse(**result)
+
+        mapped_fields = stored.mapped_fields or {}
+        # Field names match case-insensitively, as in VerificationService.verify_bulk()
+        known = {str(key).lower() for key in mapped_fields}
+        if req.fields and any(str(field).lower() not in known for field in req.fields):
+            # Stored detections, new fields: LLM only
+            stored = self._remap_stored(info, stored, req.fields, "verify", cancel)
+            details = {"page": page_number, "source": "remapped", "extraction_id": stored.extraction_id,
+                       "remapped_from": info["extraction_id"]}
+            return stored.mapped_fields or {}, details
+        return mapped_fields, {"page": page_number, "source": "stored", "extraction_id": info["extraction_id"]}
+
+    # ------------------------------------------------------------------
+    # Admission control
+    # ------------------------------------------------------------------
+    def _estimate_file(self, file_path: str, fields: Optional[List[str]], pages: List[int]) -> CostEstimate:
+        cost_model = self.admission.cost_model
+        if is_pdf_file(file_path):
+            return cost_model.pdf(self.extraction_service.pdf_index.get(file_path), pages, fields)
+        return cost_model.image(file_path, fields)
+
+    async def _admit_file(
+        self,
+        file_path: str,
+        fields: Optional[List[str]],
+        pages: List[int],
+        cancel: Optional[CancellationToken] = None,
+    ) -> Optional[Ticket]:
+        """Wait for capacity for these pages of the file; None without admission control."""
+        if self.admission is None:
+            return None
+        estimate = await run_in_threadpool(self._estimate_file, file_path, fields, pages)
+        return self._admitted(await self.admission.acquire(estimate), cancel)
+
+    async def _admit_batch(
+        self, items: List[BatchItem], cancel: Optional[CancellationToken] = None
+    ) -> Optional[Ticket]:
+        """One ticket for the whole batch (image sizes from headers; PDFs as one page each)."""
+        if self.admission is None:
+            return None
+        cost_model = self.admission.cost_model
+        estimate = cost_model.combine([
+            cost_model.pdf(None, [item.page_number], item.fields) if is_pdf_file(item.name)
+            else cost_model.image(item.data, item.fields)
+            for item in items
+        ])
+        return self._admitted(await self.admission.acquire(estimate), cancel)
+
+    @staticmethod
+    def _admitted(ticket: Ticket, cancel: Optional[CancellationToken]) -> Ticket:
+        # The client may have given up while queued: hand the capacity straight back
+        try:
+            checkpoint(cancel, "admission")
+        except OperationCancelled:
+            ticket.release()
+            raise
+        return ticket
+
+    @staticmethod
+    def _release(ticket: Optional[Ticket], cancel: Optional[CancellationToken] = None):
+        """Give back admission capacity and stop watching the request for disconnects."""
+        if ticket is not None:
+            ticket.release()
+        if cancel is not None:
+            cancel.close()
 
     # ------------------------------------------------------------------
     # Helper: Save UploadFile
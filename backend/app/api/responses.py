@@ -0,0 +1,283 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from app.dto.detection_batch import DetectionBatch, LEVELS
+from app.dto.models import BatchExtractionResponse, ExtractionPageResult, ExtractionResponse
+
+# Optional fast encoders
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_FORMATS = ("full", "compact")
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+# ----------------------------------------------------------------------------
+# Encoders
+# ----------------------------------------------------------------------------
+def _to_builtin(value: Any) -> Any:
+    """Fallback for values the stdlib/msgpack encoders do not know (NumPy arrays and scalars)."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(content, use_bin_type=True, default=_to_builtin)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available (NumPy arrays serialized natively)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the client accepts MessagePack and the encoder is installed."""
+    if not accept or msgpack is None:
+        return False
+    accept = accept.lower()
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+# ----------------------------------------------------------------------------
+# Compact (columnar) layout
+# ----------------------------------------------------------------------------
+def model_to_dict(model: Any) -> Dict[str, Any]:
+    dump = getattr(model, "model_dump", None) or model.dict
+    return dump()
+
+
+def _batch_of(model: Any) -> DetectionBatch:
+    batch = model.detection_batch
+    if batch is None:
+        batch = DetectionBatch.from_detections(model.detections or [])
+    return batch
+
+
+def compact_detections(batch: DetectionBatch) -> Dict[str, Any]:
+    """
+    Parallel arrays for one page:
+
+    texts: list of strings
+    scores: float32, rounded to 4 decimals
+    boxes: flat int32 [x1, y1, x2, y2, x1, y1, ...] (axis-aligned, original-image pixels)
+    levels: uint8 codes into LEVELS
+    """
+    return {
+        "count": len(batch),
+        "texts": batch.texts,
+        "scores": np.round(batch.scores, 4).astype(np.float32),
+        "boxes": np.rint(batch.bboxes).astype(np.int32).ravel(),
+        "levels": batch.level_codes,
+    }
+
+
+def _compact_page(page: ExtractionPageResult) -> Dict[str, Any]:
+    return {
+        "page_number": page.page_number,
+        "text": page.text,
+        "mapped_fields": page.mapped_fields,
+        "detections": compact_detections(_batch_of(page)),
+        "processing_info": model_to_dict(page.processing_info) if page.processing_info else None,
+    }
+
+
+def to_compact(response: ExtractionResponse) -> Dict[str, Any]:
+    return {
+        "format": "compact",
+        "level_names": list(LEVELS),
+        "mapped_fields": response.mapped_fields,
+        "detections": compact_detections(_batch_of(response)),
+        "total_detections": response.total_detections,
+        "confidence_overlay": response.confidence_overlay,
+        "overlay_vector": response.overlay_vector,
+        "overlay_url": response.overlay_url,
+        "has_detection_data": response.has_detection_data,
+        "processing_info": model_to_dict(response.processing_info) if response.processing_info else None,
+        "pages": {k: _compact_page(p) for k, p in response.pages.items()} if response.pages is not None else None,
+        "is_pdf": response.is_pdf,
+        "page_count": response.page_count,
+        "pages_truncated": response.pages_truncated,
+        "extraction_id": response.extraction_id,
+        "document_hash": response.document_hash,
+    }
+
+
+def render_extraction(
+    response: ExtractionResponse, response_format: str = "full", accept: Optional[str] = None
+) -> Response:
+    """
+    Encode an ExtractionResponse.
+
+    response_format: "full" (the ExtractionResponse schema) or "compact" (columnar arrays)
+    accept: request Accept header; application/msgpack selects MessagePack encoding
+    """
+    if response_format not in RESPONSE_FORMATS:
+        logger.warning(f"Unknown response_format '{response_format}', using 'full'")
+        response_format = "full"
+
+    content = to_compact(response) if response_format == "compact" else model_to_dict(response)
+    return _encode(content, accept)
+
+
+def _encode(content: Dict[str, Any], accept: Optional[str]) -> Response:
+    if wants_msgpack(accept):
+        return MsgPackResponse(content)
+    return FastJSONResponse(content)
+
+
+def render_batch(
+    response: BatchExtractionResponse, response_format: str = "full", accept: Optional[str] = None
+) -> Response:
+    """Encode a BatchExtractionResponse; each result follows `response_format` like render_extraction."""
+    compact = response_format == "compact"
+    return _encode({
+        "results": {
+            name: to_compact(result) if compact else model_to_dict(result)
+            for name, result in response.results.items()
+        },
+        "errors": response.errors,
+        "total_files": response.total_files,
+        "elapsed_time": response.elapsed_time,
+        "files_per_second": response.files_per_second,
+    }, accept)
+
+
+# ----------------------------------------------------------------------------
+# Streaming (NDJSON / server-sent events)
+# ----------------------------------------------------------------------------
+def stream_format(accept: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """
+    "ndjson", "sse" or None (no streaming).
+
+    requested: explicit choice from the request; otherwise negotiated from the Accept header
+    """
+    if requested:
+        requested = requested.lower()
+        if requested not in STREAM_MEDIA_TYPES:
+            raise ValueError(f"Unknown stream format '{requested}' (use ndjson or sse)")
+        return requested
+    accept = (accept or "").lower()
+    for name, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return name
+    return None
+
+
+def encode_frame(frame: Dict[str, Any], fmt: str) -> bytes:
+    """One frame: a JSON line (ndjson) or an SSE event named after frame["type"]."""
+    payload = dumps_json(frame)
+    if fmt == "sse":
+        return b"event: " + frame["type"].encode() + b"\ndata: " + payload + b"\n\n"
+    return payload + b"\n"
+
+
+def stream_frames(frames: Iterable[Dict[str, Any]], fmt: str) -> StreamingResponse:
+    """
+    Stream frames as they are produced. A sync iterator is consumed in the
+    threadpool, so work on the next frame runs while the previous one is sent.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    encoded = (encode_frame(frame, fmt) for frame in frames)
+    return StreamingResponse(encoded, media_type=STREAM_MEDIA_TYPES[fmt], headers=headers)
+
+
+def stream_extraction(
+    events: Iterable[Tuple[str, Any]], fmt: str, response_format: str = "full"
+) -> StreamingResponse:
+    """
+    Stream ("page", ExtractionPageResult) and ("summary", dict) events.
+
+    Page frames: {"type": "page", "page": <page in `response_format`>}
+    The last frame is {"type": "summary", ...}.
+    """
+    compact = response_format == "compact"
+
+    def frames() -> Iterator[Dict[str, Any]]:
+        for kind, payload in events:
+            if kind == "page":
+                yield {"type": "page", "page": _compact_page(payload) if compact else model_to_dict(payload)}
+            else:
+                yield {"type": kind, **payload}
+
+    return stream_frames(frames(), fmt)
+
+
+def stream_batch(
+    events: Iterable[Tuple[str, Any]], fmt: str, response_format: str = "full"
+) -> StreamingResponse:
+    """
+    Stream batch events as each document finishes.
+
+    ("result", (name, ExtractionResponse)) -> {"type": "result", "name", "result"}
+    ("error", (name, message))             -> {"type": "error", "name", "detail"}
+    ("summary", dict)                      -> {"type": "summary", ...}
+    """
+    compact = response_format == "compact"
+
+    def frames() -> Iterator[Dict[str, Any]]:
+        for kind, payload in events:
+            if kind == "result":
+                name, result = payload
+                yield {"type": "result", "name": name, "result": to_compact(result) if compact else model_to_dict(result)}
+            elif kind == "error":
+                name, message = payload
+                yield {"type": "error", "name": name, "detail": message}
+            else:
+                yield {"type": kind, **payload}
+
+    return stream_frames(frames(), fmt)
+
+
+__all__ = [
+    "RESPONSE_FORMATS",
+    "FastJSONResponse",
+    "MsgPackResponse",
+    "dumps_json",
+    "dumps_msgpack",
+    "model_to_dict",
+    "wants_msgpack",
+    "compact_detections",
+    "to_compact",
+    "render_extraction",
+    "render_batch",
+    "STREAM_MEDIA_TYPES",
+    "stream_format",
+    "encode_frame",
+    "stream_frames",
+    "stream_extraction",
+    "stream_batch",
+]
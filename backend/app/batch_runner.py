@@ -0,0 +1,355 @@
+"""
+Offline batch extraction over a directory tree, without the HTTP layer.
+
+Files are distributed across worker processes, each with its own OCR engine.
+Results are written as NDJSON (or Parquet, with pyarrow) shards in OUTPUT_DIR,
+next to a checkpoint manifest listing every finished file. Re-running the
+same command skips everything in the manifest, so a killed run resumes where
+it stopped. Delivery is at-least-once: a file whose record was written just
+before the process died can appear in two shards.
+
+    cd backend && python -m app.batch_runner INPUT_DIR OUTPUT_DIR [--workers 4] [--format parquet]
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import logging
+import multiprocessing
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.api.responses import dumps_json, model_to_dict, to_compact
+from app.utils import is_pdf_file
+from app.utils.archive_utils import is_document
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.tsv"
+FORMATS = ("ndjson", "parquet")
+
+
+# ----------------------------------------------------------------------------
+# Input and checkpoint manifest
+# ----------------------------------------------------------------------------
+def iter_documents(root: str) -> Iterator[str]:
+    """Relative paths of every image/PDF under `root`, in a stable (sorted) order."""
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        with os.scandir(os.path.join(root, relative)) as entries:
+            entries = sorted(entries, key=lambda e: e.name, reverse=True)
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            path = os.path.join(relative, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(path)
+            elif is_document(entry.name):
+                yield path
+
+
+class Manifest:
+    """
+    Append-only TSV of finished files: path, status (ok/error), shard.
+
+    Lines are flushed as they are written; a torn last line from a killed run
+    is ignored on load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def load(self) -> Dict[str, str]:
+        done: Dict[str, str] = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    done[parts[0]] = parts[1]
+        return done
+
+    def append(self, records: List[Dict[str, Any]], shard: str):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(f"{r['path']}\t{r['status']}\t{shard}\n" for r in records))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ----------------------------------------------------------------------------
+# Output shards
+# ----------------------------------------------------------------------------
+class ShardWriter:
+    """
+    Rotating result shards: part-<run>-<seq>.ndjson or .parquet, `shard_size` records each.
+
+    NDJSON records are written and flushed one by one and entered in the
+    manifest right after; Parquet records are buffered and the manifest is
+    updated once the shard file is in place.
+    """
+
+    def __init__(self, output_dir: str, manifest: Manifest, fmt: str = "ndjson", shard_size: int = 10000):
+        self.output_dir = output_dir
+        self.manifest = manifest
+        self.fmt = fmt
+        self.shard_size = max(1, shard_size)
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self._seq = 0
+        self._count = 0
+        self._file = None
+        self._buffer: List[Dict[str, Any]] = []
+
+    def _shard_name(self) -> str:
+        return f"part-{self.run_id}-{self._seq:05d}.{self.fmt}"
+
+    def write(self, record: Dict[str, Any]):
+        if self.fmt == "parquet":
+            self._buffer.append(record)
+            if len(self._buffer) >= self.shard_size:
+                self._flush_parquet()
+            return
+
+        if self._file is None:
+            self._file = open(os.path.join(self.output_dir, self._shard_name()), "ab")
+        self._file.write(dumps_json(record) + b"\n")
+        self._file.flush()
+        self.manifest.append([record], self._shard_name())
+        self._count += 1
+        if self._count >= self.shard_size:
+            self._file.close()
+            self._file, self._count = None, 0
+            self._seq += 1
+
+    def _flush_parquet(self):
+        if not self._buffer:
+            return
+        columns = {
+            "path": [r["path"] for r in self._buffer],
+            "status": [r["status"] for r in self._buffer],
+            "error": [r.get("error") for r in self._buffer],
+            "elapsed_ms": [r["elapsed_ms"] for r in self._buffer],
+            "result": [dumps_json(r["result"]).decode() if r.get("result") is not None else None
+                       for r in self._buffer],
+        }
+        name = self._shard_name()
+        path = os.path.join(self.output_dir, name)
+        pyarrow.parquet.write_table(pyarrow.table(columns), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.manifest.append(self._buffer, name)
+        self._buffer = []
+        self._seq += 1
+
+    def close(self):
+        if self.fmt == "parquet":
+            self._flush_parquet()
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+        self.manifest.close()
+
+
+# ----------------------------------------------------------------------------
+# Worker processes
+# ----------------------------------------------------------------------------
+_service = None
+_options: Dict[str, Any] = {}
+
+
+def _init_worker(options: Dict[str, Any]):
+    """Runs once per worker process: build its own ExtractionService and OCR engine."""
+    global _service, _options
+    from app.bootstrap import build_extraction_service
+
+    # Ctrl-C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.getLogger().setLevel(logging.WARNING)
+    _options = options
+    # One engine per process and one file at a time: nothing to micro-batch across requests
+    _service = build_extraction_service(pool_size=1, map_fields=options["map_fields"], batching=False)
+    _service.module_factory.warm_up()
+
+
+def _stage_timings(response: Any) -> Dict[str, float]:
+    """Per-stage ms for one file (summed over pages for PDFs)."""
+    infos = [p.processing_info for p in (response.pages or {}).values()] or [response.processing_info]
+    timings: Dict[str, float] = {}
+    for info in infos:
+        if info is None:
+            continue
+        for stage, ms in info.stage_timings.items():
+            timings[stage] = timings.get(stage, 0.0) + ms
+        timings["ocr"] = timings.get("ocr", 0.0) + info.elapsed_time * 1000.0
+        if info.script_detection_ms:
+            timings["script"] = timings.get("script", 0.0) + info.script_detection_ms
+    return timings
+
+
+def _process(relative: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    path = os.path.join(_options["input_dir"], relative)
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    try:
+        if is_pdf_file(path):
+            response = _service.extract_all_pages(
+                path, _options["language"], _options["fields"], pages=_options["pdf_pages"]
+            )
+        else:
+            response = _service.extract_single_page(path, _options["language"], 1, _options["fields"])
+        timings = _stage_timings(response)
+        result = to_compact(response) if _options["compact"] else model_to_dict(response)
+        record = {"path": relative, "status": "ok", "result": result}
+    except Exception as e:
+        record = {"path": relative, "status": "error", "error": str(e) or type(e).__name__}
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+    timings["total"] = record["elapsed_ms"]
+    return record, timings
+
+
+# ----------------------------------------------------------------------------
+# Progress reporting
+# ----------------------------------------------------------------------------
+class Progress:
+    """Live throughput, ETA and mean per-stage timing on stderr."""
+
+    def __init__(self, total: int, interval: float = 2.0, stream=sys.stderr):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.errors = 0
+        self.stage_ms: Dict[str, float] = {}
+        self.start = time.perf_counter()
+        self._last = self.start
+        self._last_done = 0
+        self._rate = 0.0
+
+    def update(self, record: Dict[str, Any], timings: Dict[str, float]):
+        self.done += 1
+        self.errors += record["status"] != "ok"
+        for stage, ms in timings.items():
+            self.stage_ms[stage] = self.stage_ms.get(stage, 0.0) + ms
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            recent = (self.done - self._last_done) / (now - self._last)
+            self._rate = recent if not self._rate else 0.7 * self._rate + 0.3 * recent
+            self._last, self._last_done = now, self.done
+            self.report()
+
+    @staticmethod
+    def _duration(seconds: float) -> str:
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+
+    def report(self, final: bool = False):
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        current = self._rate or rate
+        eta = (self.total - self.done) / current if current > 0 else 0.0
+        stages = " ".join(
+            f"{stage}={ms / max(1, self.done):.1f}"
+            for stage, ms in sorted(self.stage_ms.items(), key=lambda kv: -kv[1])[:6]
+        )
+        line = (
+            f"[{self.done:,}/{self.total:,}] {rate:.1f} files/s (now {current:.1f}) "
+            f"{'elapsed ' + self._duration(elapsed) if final else 'ETA ' + self._duration(eta)} "
+            f"errors={self.errors} | ms/file {stages}"
+        )
+        print(line, file=self.stream, flush=True)
+
+
+# ----------------------------------------------------------------------------
+# Entry point
+# ----------------------------------------------------------------------------
+def run(args: argparse.Namespace) -> int:
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(args.output_dir, MANIFEST_NAME))
+    finished = manifest.load()
+    skip: Set[str] = {p for p, status in finished.items() if status == "ok" or not args.retry_errors}
+
+    pending = [p for p in iter_documents(args.input_dir) if p not in skip]
+    print(f"{len(pending):,} files to process ({len(skip):,} already in the manifest)", file=sys.stderr)
+    if not pending:
+        return 0
+
+    options = {
+        "input_dir": args.input_dir,
+        "language": args.language,
+        "fields": args.fields.split(",") if args.fields else None,
+        "pdf_pages": args.pdf_pages,
+        "compact": args.result_format == "compact",
+        "map_fields": args.map_fields,
+    }
+    if args.threads_per_worker:
+        # Inherited by the spawned workers before their engines are created
+        os.environ["OMP_NUM_THREADS"] = str(args.threads_per_worker)
+
+    writer = ShardWriter(args.output_dir, manifest, args.format, args.shard_size)
+    progress = Progress(len(pending), args.progress_interval)
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(args.workers, initializer=_init_worker, initargs=(options,))
+    interrupted = False
+    try:
+        for record, timings in pool.imap_unordered(_process, pending, chunksize=args.chunksize):
+            writer.write(record)
+            progress.update(record, timings)
+        pool.close()
+        pool.join()
+    except KeyboardInterrupt:
+        interrupted = True
+        pool.terminate()
+    finally:
+        # Buffered Parquet records reach a shard and the manifest even when interrupted
+        writer.close()
+        progress.report(final=True)
+
+    if interrupted:
+        print("Interrupted; finished files are in the manifest, re-run to resume", file=sys.stderr)
+        return 130
+    return 1 if progress.errors else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (one engine each)")
+    parser.add_argument("--threads-per-worker", type=int, default=0, help="OMP_NUM_THREADS for each worker")
+    parser.add_argument("--language", default="en", help='OCR language, or "auto"')
+    parser.add_argument("--fields", default="", help="comma-separated fields for the LLM mapper")
+    parser.add_argument("--map-fields", action="store_true", help="call the LLM field mapper (NOTEBOOK_URL)")
+    parser.add_argument("--pdf-pages", default=None, help='page selection for PDFs, e.g. "1-3" (default all)')
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--result-format", choices=("full", "compact"), default="compact")
+    parser.add_argument("--shard-size", type=int, default=10000, help="records per output shard")
+    parser.add_argument("--chunksize", type=int, default=4, help="files handed to a worker at a time")
+    parser.add_argument("--retry-errors", action="store_true", help="re-process files that failed before")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet" and pyarrow is None:
+        parser.error("--format parquet requires pyarrow")
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"{args.input_dir} is not a directory")
+    args.language = args.language.lower()
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Service wiring from environment variables, shared by every entry point:
+app/main.py (the HTTP API) and the offline batch runner build their OCR
+pipeline here, so a knob added once takes effect in both.
+"""
+import os
+import json
+import logging
+from typing import Any, Callable, Optional
+
+from app.llm_integration.llm import ExternalOllamaAPI, NullFieldMapper, QwenFieldMapper
+from app.ocr_modules.engine_pool import EnginePool
+from app.ocr_modules.modules import ExtractionModuleFactory
+from app.ocr_modules.script_detection import ScriptClassifier
+from app.services.overlay import OverlayRenderer
+from app.services.services import ExtractionService, PreprocessingService, QualityService
+from app.services.templates import TemplateRegistry
+from app.utils import AdaptiveDPIRasterizer, CachingRenderer, PDFIndexCache, PDFUtils, PageImageCache
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LANGUAGES = ["en", "ch", "ja", "ko"]
+
+
+def build_module_factory(
+    engine_factory: Callable[[], Any], pool_size: Optional[int] = None, batching: bool = True
+) -> ExtractionModuleFactory:
+    """
+    OCR modules on env-configured engine pools, with micro-batching and tiling.
+
+    pool_size: one shared pool of this size for every language; None reads
+               OCR_POOL_SIZE (shared pool) and OCR_POOL_SIZE_<LANG> (dedicated pools)
+    batching: micro-batch inference across requests (OCR_BATCH_MAX_SIZE / OCR_BATCH_MAX_WAIT_MS);
+              off for single-threaded callers, which have nothing to coalesce
+    """
+    factory = ExtractionModuleFactory()
+    shared_pool = EnginePool(
+        "shared", engine_factory, size=pool_size if pool_size is not None else int(os.getenv("OCR_POOL_SIZE", "1"))
+    )
+    for lang in SUPPORTED_LANGUAGES:
+        dedicated_size = os.getenv(f"OCR_POOL_SIZE_{lang.upper()}") if pool_size is None else None
+        if dedicated_size:
+            factory.register_pool(lang, EnginePool(lang, engine_factory, size=int(dedicated_size)))
+        else:
+            factory.register_pool(lang, shared_pool)
+
+    # OCR_BATCH_MAX_SIZE=1 disables the scheduler; images are only coalesced for engines with a
+    # native batch() call, otherwise each queued image goes to the next idle engine
+    batch_max_size = int(os.getenv("OCR_BATCH_MAX_SIZE", "8"))
+    if batching and batch_max_size > 1:
+        factory.enable_batching(
+            max_batch_size=batch_max_size,
+            max_wait_ms=float(os.getenv("OCR_BATCH_MAX_WAIT_MS", "5")),
+        )
+
+    # OCR_TILE_THRESHOLD_MP: images above this many megapixels are OCR'd as overlapping tiles
+    tile_threshold_mp = float(os.getenv("OCR_TILE_THRESHOLD_MP", "12"))
+    if tile_threshold_mp > 0:
+        factory.enable_tiling(
+            pixel_threshold=int(tile_threshold_mp * 1_000_000),
+            tile_size=int(os.getenv("OCR_TILE_SIZE", "2048")),
+            overlap=int(os.getenv("OCR_TILE_OVERLAP", "256")),
+        )
+    return factory
+
+
+def install_page_cache() -> Optional[PageImageCache]:
+    """
+    Rendered page cache: PAGE_CACHE_MB in memory (0 disables), plus an optional memory-mapped
+    disk tier in PAGE_CACHE_DIR bounded by PAGE_CACHE_DISK_MB. Every PDF render (adaptive DPI
+    preview + page, overlays) goes through it; returns None when disabled.
+    """
+    page_cache_mb = int(os.getenv("PAGE_CACHE_MB", "256"))
+    if page_cache_mb <= 0:
+        return None
+    page_cache = PageImageCache(
+        max_bytes=page_cache_mb * 1024 * 1024,
+        disk_dir=os.getenv("PAGE_CACHE_DIR") or None,
+        disk_max_bytes=int(os.getenv("PAGE_CACHE_DISK_MB", "2048")) * 1024 * 1024,
+    )
+    PDFUtils.renderer = CachingRenderer(PDFUtils.renderer, page_cache)
+    return page_cache
+
+
+def build_template_registry() -> TemplateRegistry:
+    """Document templates (region OCR for known layouts); DOCUMENT_TEMPLATES_DIR holds *.json templates."""
+    registry = TemplateRegistry(threshold=float(os.getenv("TEMPLATE_MATCH_THRESHOLD", "0.85")))
+    registry.load_dir(os.getenv("DOCUMENT_TEMPLATES_DIR", ""))
+    return registry
+
+
+def build_extraction_service(
+    engine_factory: Optional[Callable[[], Any]] = None,
+    pool_size: Optional[int] = None,
+    map_fields: bool = True,
+    batching: bool = True,
+    module_factory: Optional[ExtractionModuleFactory] = None,
+    template_registry: Optional[TemplateRegistry] = None,
+) -> ExtractionService:
+    """
+    ExtractionService with every env-configured pipeline stage.
+
+    engine_factory / pool_size / batching: passed to build_module_factory (PHOCR when None)
+    map_fields: call the LLM field mapper (NOTEBOOK_URL); False runs OCR only
+    module_factory / template_registry: already built ones to use instead
+    """
+    if module_factory is None:
+        if engine_factory is None:
+            from phocr import PHOCR
+            engine_factory = PHOCR
+        module_factory = build_module_factory(engine_factory, pool_size, batching)
+    if template_registry is None:
+        template_registry = build_template_registry()
+
+    # PREPROCESSING_PIPELINES: optional JSON, e.g. {"*:*": ["orientation"], "ch:detect": ["contrast"]}
+    preprocessing_config = os.getenv("PREPROCESSING_PIPELINES")
+    preprocessor = PreprocessingService(json.loads(preprocessing_config) if preprocessing_config else None)
+
+    # language="auto": the script is classified from a probe OCR of the page downscaled to
+    # SCRIPT_DETECTION_SAMPLE_SIDE px (long side). Pages the sample would not shrink below
+    # SCRIPT_DETECTION_MAX_SAMPLE_FRACTION of their pixels are probed as is and, on a shared
+    # engine pool, that probe is reused as their OCR
+    script_classifier = ScriptClassifier(
+        module_factory,
+        sample_side=int(os.getenv("SCRIPT_DETECTION_SAMPLE_SIDE", "1024")),
+        max_sample_fraction=float(os.getenv("SCRIPT_DETECTION_MAX_SAMPLE_FRACTION", "0.5")),
+    )
+
+    # Confidence overlays: OVERLAY_FORMAT (png/jpeg/webp) and OVERLAY_MAX_DIM (0 = full size)
+    # are the raster defaults
+    overlay_renderer = OverlayRenderer(
+        max_dimension=int(os.getenv("OVERLAY_MAX_DIM", "0")) or None,
+        image_format=os.getenv("OVERLAY_FORMAT", "png"),
+        quality=int(os.getenv("OVERLAY_QUALITY", "80")),
+    )
+
+    field_mapper = QwenFieldMapper(ExternalOllamaAPI()) if map_fields else NullFieldMapper()
+
+    return ExtractionService(
+        module_factory=module_factory,
+        preprocessor=preprocessor,
+        quality_service=QualityService(),
+        field_mapper=field_mapper,
+        rasterizer=AdaptiveDPIRasterizer(
+            min_dpi=int(os.getenv("PDF_MIN_DPI", "100")),
+            max_dpi=int(os.getenv("PDF_MAX_DPI", "300")),
+        ),
+        # PDF pages OCR'd per extract_many() call follow the micro-batch size
+        page_batch_size=max(1, int(os.getenv("OCR_BATCH_MAX_SIZE", "8"))),
+        template_registry=template_registry if template_registry.templates else None,
+        script_classifier=script_classifier,
+        overlay_renderer=overlay_renderer,
+        # Per-document page index (page count, sizes, text-layer pages), PDF_INDEX_CACHE_SIZE documents by hash
+        pdf_index=PDFIndexCache(max_entries=int(os.getenv("PDF_INDEX_CACHE_SIZE", "1024"))),
+        # /extract/batch: documents per OCR chunk and concurrent LLM mapping calls
+        batch_chunk_size=int(os.getenv("BATCH_CHUNK_SIZE", "16")),
+        mapping_workers=int(os.getenv("BATCH_MAPPING_WORKERS", "8")),
+    )
+
+
+__all__ = [
+    "SUPPORTED_LANGUAGES",
+    "build_module_factory",
+    "install_page_cache",
+    "build_template_registry",
+    "build_extraction_service",
+]
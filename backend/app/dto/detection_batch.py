@@ -0,0 +1,203 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.dto.models import Detection
+
+
+# Confidence level codes: index into LEVELS (matches OCRUtils.get_confidence_level)
+LEVELS = ("very_low", "low", "medium", "high")
+LEVEL_THRESHOLDS = np.array([0.5, 0.7, 0.9])
+
+# Skip validation when materializing: the batch already holds clean floats/strings
+_construct_detection = getattr(Detection, "model_construct", None) or Detection.construct
+
+
+class DetectionBatch:
+    """
+    Columnar container for the detections of one page.
+
+    texts: list of N strings
+    scores: float64 array (N,)
+    polygons: float64 array (N, P, 2) of corner points, usually P == 4
+
+    Bounding boxes and confidence levels are computed for the whole page with
+    NumPy; pydantic `Detection` objects are only built by `to_detections` at
+    the response boundary.
+    """
+
+    def __init__(self, texts: Sequence[str], scores: np.ndarray, polygons: np.ndarray):
+        self.texts = list(texts)
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        self.polygons = np.asarray(polygons, dtype=np.float64) if self.texts else np.zeros((0, 4, 2))
+        self._bboxes: Optional[np.ndarray] = None
+
+    # ----------------------------
+    # Construction
+    # ----------------------------
+    @classmethod
+    def empty(cls) -> "DetectionBatch":
+        return cls([], np.zeros(0), np.zeros((0, 4, 2)))
+
+    @classmethod
+    def from_ocr_result(cls, result: Dict[str, Any]) -> "DetectionBatch":
+        """Build from a normalized module result (txts, scores, boxes as arrays or lists)."""
+        texts = result.get("txts", [])
+        scores = result.get("scores", [])
+        boxes = result.get("boxes", [])
+        count = min(len(texts), len(scores), len(boxes))
+        if count == 0:
+            return cls.empty()
+        return cls(
+            [str(t) for t in texts[:count]],
+            _as_scores(scores[:count]),
+            _as_polygons(boxes[:count]),
+        )
+
+    @classmethod
+    def from_fragments(cls, fragments: List[Dict[str, Any]], confidence: float = 1.0) -> "DetectionBatch":
+        """Build from text-layer fragments ({"text", "polygon", ...})."""
+        if not fragments:
+            return cls.empty()
+        return cls(
+            [f["text"] for f in fragments],
+            np.full(len(fragments), confidence),
+            _as_polygons([f["polygon"] for f in fragments]),
+        )
+
+    @classmethod
+    def from_detections(cls, detections: Iterable[Detection]) -> "DetectionBatch":
+        detections = list(detections)
+        if not detections:
+            return cls.empty()
+        return cls(
+            [d.text for d in detections],
+            np.array([d.confidence for d in detections], dtype=np.float64),
+            _as_polygons([d.polygon for d in detections]),
+        )
+
+    @classmethod
+    def concatenate(cls, batches: Sequence["DetectionBatch"]) -> "DetectionBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        texts = [t for b in batches for t in b.texts]
+        return cls(texts, np.concatenate([b.scores for b in batches]), np.concatenate([b.polygons for b in batches]))
+
+    # ----------------------------
+    # Columnar views
+    # ----------------------------
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def bboxes(self) -> np.ndarray:
+        """(N, 4) array of x1, y1, x2, y2."""
+        if self._bboxes is None:
+            if len(self):
+                self._bboxes = np.concatenate([self.polygons.min(axis=1), self.polygons.max(axis=1)], axis=1)
+            else:
+                self._bboxes = np.zeros((0, 4))
+        return self._bboxes
+
+    @property
+    def level_codes(self) -> np.ndarray:
+        """uint8 index into LEVELS for every detection."""
+        scores = np.nan_to_num(self.scores, nan=0.0)
+        return np.searchsorted(LEVEL_THRESHOLDS, scores, side="right").astype(np.uint8)
+
+    @property
+    def levels(self) -> List[str]:
+        return [LEVELS[code] for code in self.level_codes]
+
+    def full_text(self, separator: str = " ") -> str:
+        return separator.join(self.texts)
+
+    # ----------------------------
+    # Transforms (each returns a new batch)
+    # ----------------------------
+    def with_polygons(self, polygons: np.ndarray) -> "DetectionBatch":
+        return DetectionBatch(self.texts, self.scores, polygons)
+
+    def offset(self, dx: float, dy: float) -> "DetectionBatch":
+        if not len(self) or (dx == 0 and dy == 0):
+            return self
+        return self.with_polygons(self.polygons + np.array([dx, dy], dtype=np.float64))
+
+    def take(self, indices: Sequence[int]) -> "DetectionBatch":
+        indices = np.asarray(indices, dtype=np.intp)
+        return DetectionBatch([self.texts[i] for i in indices], self.scores[indices], self.polygons[indices])
+
+    def reading_order(self) -> "DetectionBatch":
+        """Sorted top-to-bottom, then left-to-right by bbox corner."""
+        if len(self) < 2:
+            return self
+        bboxes = self.bboxes
+        return self.take(np.lexsort((bboxes[:, 0], bboxes[:, 1])))
+
+    # ----------------------------
+    # Response boundary
+    # ----------------------------
+    def to_detections(self) -> List[Detection]:
+        """Materialize pydantic Detection objects (one .tolist() per column)."""
+        if not len(self):
+            return []
+        polygons = self.polygons.tolist()
+        bboxes = self.bboxes.tolist()
+        scores = self.scores.tolist()
+        levels = self.levels
+        return [
+            _construct_detection(
+                text=text,
+                confidence=score,
+                bbox={"x1": box[0], "y1": box[1], "x2": box[2], "y2": box[3]},
+                polygon=polygon,
+                confidence_level=level,
+            )
+            for text, score, box, polygon, level in zip(self.texts, scores, bboxes, polygons, levels)
+        ]
+
+
+def _as_scores(scores: Any) -> np.ndarray:
+    try:
+        return np.asarray(scores, dtype=np.float64).reshape(-1)
+    except (TypeError, ValueError):
+        # Mixed or malformed values: same fallback as safe_float_conversion
+        out = []
+        for value in scores:
+            try:
+                out.append(float(value))
+            except Exception:
+                out.append(0.0)
+        return np.asarray(out, dtype=np.float64)
+
+
+def _as_polygons(boxes: Any) -> np.ndarray:
+    """(N, P, 2) float64 array from engine boxes; flat [x1, y1, x2, y2] boxes become rectangles."""
+    try:
+        array = np.asarray(boxes, dtype=np.float64)
+    except (TypeError, ValueError):
+        array = None
+
+    if array is not None and array.ndim == 3 and array.shape[2] == 2:
+        return array
+    if array is not None and array.ndim == 2 and array.shape[1] == 4:
+        x1, y1, x2, y2 = array.T
+        return np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1), np.stack([x2, y2], 1), np.stack([x1, y2], 1)], 1)
+
+    # Ragged input (polygons with different point counts): reduce each to its bounding rectangle
+    rects = []
+    for box in boxes:
+        try:
+            pts = np.asarray(box, dtype=np.float64).reshape(-1, 2)
+            x1, y1 = pts.min(axis=0)
+            x2, y2 = pts.max(axis=0)
+        except (TypeError, ValueError):
+            x1 = y1 = x2 = y2 = 0.0
+        rects.append([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+    return np.asarray(rects, dtype=np.float64).reshape(-1, 4, 2)
+
+
+__all__ = ["DetectionBatch", "LEVELS", "LEVEL_THRESHOLDS"]
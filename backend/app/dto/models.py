@@ -1,5 +1,5 @@
 from typing import List, Dict, Optional, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class Detection(BaseModel):
@@ -26,8 +26,13 @@ class OCRRequest(BaseModel):
     """
     include_detection: bool = False
     page_number: int = 1
-    language: str = "en"
+    language: str = "en"  # or "auto" to detect the script before OCR
     fields: Optional[List[str]] = None  # custom fields to extract
+    overlay_mode: str = "raster"  # "raster" (inline base64), "vector" (geometry only) or "url" (GET /overlay/{id})
+    overlay_format: Optional[str] = None  # raster encoding: png, jpeg or webp (server default when None)
+    overlay_max_dim: Optional[int] = None  # downscale raster overlays so the longest side fits
+    pages: Optional[str] = None  # PDF page selection, e.g. "1-3,7,10-" (all pages when None)
+    max_pages: Optional[int] = None  # cap on the number of selected pages processed
 
 
 class ExtractionProcessingInfo(BaseModel):
@@ -36,9 +41,29 @@ class ExtractionProcessingInfo(BaseModel):
     page_number: int = 1
     is_pdf: bool = False
     custom_fields_used: int = 0
+    stage_timings: Dict[str, float] = Field(default_factory=dict)  # preprocessing stage -> ms
+    resize_scale: float = 1.0  # resolution normalization factor applied before OCR
+    dpi: Optional[int] = None  # PDF rasterization DPI chosen for this page
+    source: str = "ocr"  # "ocr", "text_layer" (born-digital PDF page) or "template"
+    template: Optional[str] = None  # matched document template, if any
+    detected_script: Optional[str] = None  # set when language="auto": latin, han, kana or hangul
+    script_detection_ms: float = 0.0  # cost of the script classifier for this page
+
+
+class DetectionBatchCarrier(BaseModel):
+    """Base for results that keep the columnar DetectionBatch behind `detections` (not serialized)."""
+    _detection_batch: Any = PrivateAttr(default=None)
 
+    @property
+    def detection_batch(self) -> Any:
+        return self._detection_batch
 
-class ExtractionPageResult(BaseModel):
+    def attach_batch(self, batch: Any):
+        self._detection_batch = batch
+        return self
+
+
+class ExtractionPageResult(DetectionBatchCarrier):
     page_number: int
     text: Optional[str] = ""
     detections: List[Detection] = Field(default_factory=list)
@@ -46,7 +71,7 @@ class ExtractionPageResult(BaseModel):
     processing_info: Optional[ExtractionProcessingInfo] = None
 
 
-class ExtractionResponse(BaseModel):
+class ExtractionResponse(DetectionBatchCarrier):
     """Top-level extraction response returned by /extract or /extract/pdf/all endpoints.
 
     When a single page is requested, pages will contain one entry keyed by page number.
@@ -55,17 +80,33 @@ class ExtractionResponse(BaseModel):
     mapped_fields: Optional[Dict[str, Any]] = None
     detections: List[Detection] = Field(default_factory=list)
     total_detections: int = 0
-    confidence_overlay: Optional[str] = None  # base64 PNG
+    confidence_overlay: Optional[str] = None  # base64 PNG/JPEG/WebP (overlay_mode="raster")
+    overlay_vector: Optional[Dict[str, Any]] = None  # boxes, level codes and colors (overlay_mode="vector")
+    overlay_url: Optional[str] = None  # lazily rendered overlay (overlay_mode="url")
     has_detection_data: bool = False
     processing_info: Optional[ExtractionProcessingInfo] = None
     pages: Optional[Dict[str, ExtractionPageResult]] = None
     is_pdf: bool = False
+    page_count: Optional[int] = None  # pages in the document (multi-page extraction)
+    pages_truncated: bool = False  # max_pages cut the page selection short
+    extraction_id: Optional[str] = None  # stored result id (GET /results/{extraction_id})
+    document_hash: Optional[str] = None  # sha256 of the uploaded document
 
 
 class VerificationRequest(BaseModel):
-    """Structure used by verify endpoint for submitted verification data."""
+    """Structure used by verify endpoint for submitted verification data.
+
+    extraction_id / document_hash: verify against a stored extraction instead of running OCR
+    language / page_number: used to pick the stored result and, when nothing is stored, to extract
+    """
     verification_data: Dict[str, Any]
     fields: Optional[List[str]] = None
+    extraction_id: Optional[str] = None
+    document_hash: Optional[str] = None
+    language: Optional[str] = None  # any stored language matches when None; extraction uses "en"
+    page_number: int = 1
+    thresholds: Optional[Dict[str, float]] = None  # per-field match thresholds (similarity 0-1)
+    field_types: Optional[Dict[str, str]] = None  # per-field text, id, date or phone (inferred from the name)
 
 
 class VerificationResult(BaseModel):
@@ -74,6 +115,61 @@ class VerificationResult(BaseModel):
     details: Optional[Dict[str, Any]] = None
 
 
+class BulkVerificationRequest(BaseModel):
+    """Many submitted records checked against one extraction (POST /verify/bulk).
+
+    The extraction is found like VerificationRequest's (extraction_id, document_hash or upload).
+    """
+    records: List[Dict[str, Any]]
+    fields: Optional[List[str]] = None  # fields to check; every key of the records when None
+    extraction_id: Optional[str] = None
+    document_hash: Optional[str] = None
+    language: Optional[str] = None
+    page_number: int = 1
+    thresholds: Optional[Dict[str, float]] = None
+    field_types: Optional[Dict[str, str]] = None
+
+
+class BulkVerificationResult(BaseModel):
+    """Per-field scores/matches hold one entry per submitted record, in order."""
+    success: bool = True
+    fields: Dict[str, Any] = Field(default_factory=dict)  # name -> type, threshold, extracted, scores, matches
+    record_matches: List[bool] = Field(default_factory=list)  # every checked field matched
+    matched_records: int = 0
+    total_records: int = 0
+    details: Optional[Dict[str, Any]] = None
+
+
+class BatchExtractionResponse(BaseModel):
+    """Result of /extract/batch, keyed by file name (member path for archive contents)."""
+    results: Dict[str, ExtractionResponse] = Field(default_factory=dict)
+    errors: Dict[str, str] = Field(default_factory=dict)
+    total_files: int = 0
+    elapsed_time: float = 0.0
+    files_per_second: float = 0.0
+
+
+class JobStatus(BaseModel):
+    """State of an asynchronous extraction job (GET /jobs/{id}).
+
+    status: queued, running, done or failed
+    pages: finished pages so far for mode="pdf_all" (partial while running)
+    result: the ExtractionResponse for mode="extract"; document-level fields for "pdf_all"
+    """
+    job_id: str
+    mode: str
+    status: str
+    attempts: int = 0
+    pages_total: Optional[int] = None
+    pages_done: int = 0
+    pages: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    expires_at: Optional[float] = None
+
+
 # Convenience exports
 __all__ = [
     "Detection",
@@ -83,4 +179,8 @@ __all__ = [
     "ExtractionProcessingInfo",
     "VerificationRequest",
     "VerificationResult",
+    "BulkVerificationRequest",
+    "BulkVerificationResult",
+    "BatchExtractionResponse",
+    "JobStatus",
 ]
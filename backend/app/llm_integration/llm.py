@@ -1,11 +1,96 @@
 import logging
+import socket
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import os
+
+from app.utils.cancellation import CancellationToken, checkpoint
+from app.utils.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 
+# ---------------------------------------------------------------------------
+# Abortable HTTP calls
+# ---------------------------------------------------------------------------
+# The call running on the current thread; connections register with it once the request is sent
+_inflight = threading.local()
+
+
+class _InflightCall:
+    """One cancellable request and the connection it went out on, so abort() can cut it off."""
+
+    def __init__(self):
+        self.conn = None
+        self.aborted = False
+        self._lock = threading.Lock()
+
+    def attach(self, conn: HTTPConnection):
+        with self._lock:
+            self.conn = conn
+            aborted = self.aborted
+        if aborted:
+            self._shutdown(conn)
+
+    def abort(self):
+        """Shut the socket down: the blocked read fails at once and the thread is free again."""
+        with self._lock:
+            self.aborted = True
+            conn = self.conn
+        if conn is not None:
+            self._shutdown(conn)
+
+    @staticmethod
+    def _shutdown(conn: HTTPConnection):
+        sock = getattr(conn, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _TrackedMixin:
+    def request(self, *args, **kwargs):
+        result = super().request(*args, **kwargs)
+        call = getattr(_inflight, "call", None)
+        if call is not None:
+            call.attach(self)
+        return result
+
+
+class _TrackedHTTPConnection(_TrackedMixin, HTTPConnection):
+    pass
+
+
+class _TrackedHTTPSConnection(_TrackedMixin, HTTPSConnection):
+    pass
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+
+class _AbortableAdapter(requests.adapters.HTTPAdapter):
+    """Keep-alive adapter whose connections can be shut down by the call that is using them."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool,
+        }
+
+
 # ---------------------------------------------------------------------------
 # ExternalOllamaAPI  (Adapter Pattern)
 # ---------------------------------------------------------------------------
@@ -13,29 +98,82 @@ class ExternalOllamaAPI:
     """
     Handles communication with the external LLM-based extraction API.
     This class abstracts HTTP details and keeps the mapper clean.
+
+    With a CancellationToken the request runs on a helper thread and the caller
+    stops waiting as soon as the token is cancelled (or its deadline passes).
+    The in-flight connection is shut down at the same moment, so the helper
+    thread (and the LLM server) stop working on it right away; a call that is
+    still connecting is cut off as soon as its request goes out, and connecting
+    itself is capped at CONNECT_TIMEOUT_SECONDS. The helper pool has
+    ABANDONED_HEADROOM threads beyond the connection pool, so calls still
+    winding down never hold up live ones.
     """
 
+    TIMEOUT_SECONDS = 120
+    CONNECT_TIMEOUT_SECONDS = 10
+    POOL_SIZE = 32
+    ABANDONED_HEADROOM = 8
+
     def __init__(self, api_url = "http://127.0.0.1:11434"):
         load_dotenv()
         base_url = os.getenv("NOTEBOOK_URL", "http://127.0.0.1:11434")
 
         # notebook provides /extract
         self.api_url = f"{base_url}/extract"
+        # Keep-alive connection pool shared by concurrent mapping calls (batch extraction)
+        self.session = requests.Session()
+        self.session.mount("http://", _AbortableAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE))
+        self.session.mount("https://", _AbortableAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE))
+        # Cancellable calls: one thread per pooled connection, plus room for aborted calls winding down
+        self._calls = ThreadPoolExecutor(
+            max_workers=self.POOL_SIZE + self.ABANDONED_HEADROOM, thread_name_prefix="llm"
+        )
+        self._abandoned = metrics.counter("cancellation.llm_abandoned")
+        self._aborting = metrics.gauge("cancellation.llm_aborting")
 
         print("LLM API URL being used:", self.api_url)
 
-    def extract_fields(self, text: str, custom_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    def extract_fields(
+        self, text: str, custom_fields: Optional[List[str]] = None, cancel: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
+        """Mapped fields ({} on failure); raises OperationCancelled when `cancel` fires first."""
         payload = {"text": text}
         if custom_fields:
             payload["fields"] = custom_fields
-
+        if cancel is None:
+            return self._post(payload, self.TIMEOUT_SECONDS)
+
+        checkpoint(cancel, "llm")
+        remaining = cancel.remaining()
+        timeout = self.TIMEOUT_SECONDS if remaining is None else max(0.001, min(self.TIMEOUT_SECONDS, remaining))
+        call = _InflightCall()
+        future = self._calls.submit(self._post, payload, timeout, call)
+        finished = threading.Event()
+        future.add_done_callback(lambda _: finished.set())
+        cancel.add_callback(finished.set)
+        finished.wait(timeout)
+        if not future.done():
+            # cancel() only succeeds while the call is still queued (nothing sent yet)
+            if not future.cancel():
+                self._abandoned.inc()
+                self._aborting.inc()
+                future.add_done_callback(lambda _: self._aborting.dec())
+                call.abort()
+            checkpoint(cancel, "llm")
+        return future.result()
+
+    def _post(self, payload: Dict[str, Any], timeout: float, call: Optional[_InflightCall] = None) -> Dict[str, Any]:
+        _inflight.call = call
         try:
             headers = {
                 "Content-Type": "application/json",
                 "ngrok-skip-browser-warning": "true",
             }
 
-            response = requests.post(self.api_url, json=payload, headers=headers, timeout=120)
+            response = self.session.post(
+                self.api_url, json=payload, headers=headers,
+                timeout=(min(self.CONNECT_TIMEOUT_SECONDS, timeout), timeout),
+            )
             if response.status_code == 200:
                 return response.json()
 
@@ -43,8 +181,13 @@ class ExternalOllamaAPI:
             return {}
 
         except Exception as e:
-            logger.error(f"LLM API request failed: {e}")
+            if call is not None and call.aborted:
+                logger.info("LLM API request aborted (cancelled)")
+            else:
+                logger.error(f"LLM API request failed: {e}")
             return {}
+        finally:
+            _inflight.call = None
 
 
 # ---------------------------------------------------------------------------
@@ -59,12 +202,14 @@ class QwenFieldMapper:
     def __init__(self, llm_api: ExternalOllamaAPI):
         self.llm = llm_api
 
-    def map_fields(self, text: str, custom_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    def map_fields(
+        self, text: str, custom_fields: Optional[List[str]] = None, cancel: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
         if not text.strip():
             logger.warning("No OCR text provided to LLM mapper.")
             return {}
 
-        result = self.llm.extract_fields(text, custom_fields)
+        result = self.llm.extract_fields(text, custom_fields, cancel)
 
         if not isinstance(result, dict):
             logger.error("LLM API returned invalid result format.")
@@ -73,7 +218,17 @@ class QwenFieldMapper:
         return result
 
 
+class NullFieldMapper:
+    """Field mapper that skips the LLM (OCR-only runs such as offline backfills)."""
+
+    def map_fields(
+        self, text: str, custom_fields: Optional[List[str]] = None, cancel: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
+        return {}
+
+
 __all__ = [
     "ExternalOllamaAPI",
     "QwenFieldMapper",
+    "NullFieldMapper",
 ]
@@ -1,6 +1,10 @@
+import os
+import asyncio
 import logging
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request, HTTPException
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from typing import Optional, List
 import json
 
@@ -9,23 +13,41 @@ from phocr import PHOCR
 
 # Controller
 from app.api.ocr_controller import OCRController
-
-# Services
-from app.services.services import (
-    ExtractionService,
-    VerificationService,
-    PreprocessingService,
-    QualityService,
+from app.api.responses import (
+    FastJSONResponse,
+    render_batch,
+    render_extraction,
+    stream_batch,
+    stream_extraction,
+    stream_format,
 )
 
-# OCR module factory
-from app.ocr_modules.modules import ExtractionModuleFactory
+# Services (the OCR pipeline is wired in app/bootstrap.py)
+from app.bootstrap import build_extraction_service, build_module_factory, build_template_registry, install_page_cache
+from app.services.services import VerificationService
+from app.services.overlay import IMAGE_FORMATS, OVERLAY_MODES, OverlayStore
+from app.services.jobs import JOB_MODES, JobRunner, JobStore
+from app.services.result_store import ResultStore
+from app.services.admission import AdmissionController, AdmissionRejected, CostModel
 
-# LLM integration
-from app.llm_integration.llm import ExternalOllamaAPI, QwenFieldMapper
+# PDF rasterization
+from app.utils import PageSelectionError
+from app.utils.archive_utils import ArchiveError
+from app.utils.cancellation import CancellationToken, OperationCancelled, watch_disconnect
 
 # DTOs
-from app.dto.models import OCRRequest, VerificationRequest, ExtractionResponse, VerificationResult
+from app.dto.models import (
+    OCRRequest,
+    VerificationRequest,
+    ExtractionResponse,
+    VerificationResult,
+    BulkVerificationRequest,
+    BulkVerificationResult,
+    JobStatus,
+)
+
+# Metrics
+from app.utils.metrics import metrics
 
 
 # -----------------------------------------------------------------------------
@@ -37,7 +59,10 @@ logger = logging.getLogger(__name__)
 # -----------------------------------------------------------------------------
 # FastAPI initialization
 # -----------------------------------------------------------------------------
-app = FastAPI(title="Multilingual OCR Extraction & Verification API - OOP Version")
+app = FastAPI(
+    title="Multilingual OCR Extraction & Verification API - OOP Version",
+    default_response_class=FastJSONResponse,
+)
 
 origins = [
     "http://127.0.0.1:5500", "http://localhost:5500",
@@ -52,121 +77,530 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# RESPONSE_GZIP_MIN_BYTES: gzip responses at least this large for clients sending
+# Accept-Encoding: gzip (0 disables compression)
+gzip_min_bytes = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+if gzip_min_bytes > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=gzip_min_bytes, compresslevel=6)
+
 
 # =============================================================================
 # DEPENDENCY INJECTION (Manual — Option A)
 # =============================================================================
 
-# Shared PHOCR engine
-phocr_engine = PHOCR()
-
-# Build OCR module factory
-module_factory = ExtractionModuleFactory()
-module_factory.register('en', phocr_engine)
-module_factory.register('ch', phocr_engine)
-module_factory.register('ja', phocr_engine)
-module_factory.register('ko', phocr_engine)
-
-# Instantiate services
-preprocessor = PreprocessingService()
-quality_service = QualityService()
-
-# LLM API + Mapper
-llm_api = ExternalOllamaAPI(api_url="http://127.0.0.1:8001/extract")
-field_mapper = QwenFieldMapper(llm_api)
-
-# Core extraction and verification services
-extraction_service = ExtractionService(
-    module_factory=module_factory,
-    preprocessor=preprocessor,
-    quality_service=quality_service,
-    field_mapper=field_mapper,
+# OCR pipeline, built from the environment in app/bootstrap.py (shared with the batch runner):
+# OCR_POOL_SIZE / OCR_POOL_SIZE_<LANG> engine pools, OCR_BATCH_* micro-batching, OCR_TILE_* tiling,
+# PREPROCESSING_PIPELINES, PDF_MIN_DPI / PDF_MAX_DPI, PDF_INDEX_CACHE_SIZE, DOCUMENT_TEMPLATES_DIR,
+# SCRIPT_DETECTION_*, OVERLAY_MAX_DIM / OVERLAY_FORMAT / OVERLAY_QUALITY, BATCH_CHUNK_SIZE and
+# BATCH_MAPPING_WORKERS; PAGE_CACHE_* configure the rendered page cache
+module_factory = build_module_factory(PHOCR)
+page_cache = install_page_cache()
+template_registry = build_template_registry()
+extraction_service = build_extraction_service(module_factory=module_factory, template_registry=template_registry)
+
+# overlay_mode="url" entries live for OVERLAY_TTL_SECONDS (swept every OVERLAY_SWEEP_SECONDS) and
+# their rendered images are cached up to OVERLAY_CACHE_MB in total
+overlay_store = OverlayStore(
+    ttl_seconds=float(os.getenv("OVERLAY_TTL_SECONDS", "300")),
+    max_rendered_bytes=int(float(os.getenv("OVERLAY_CACHE_MB", "64")) * 1024 * 1024),
+    sweep_interval=float(os.getenv("OVERLAY_SWEEP_SECONDS", "30")),
 )
 
 verification_service = VerificationService()
 
+# On-disk state (job queue, stored results) lives under DATA_DIR; the default is backend/data,
+# independent of the working directory the server is started from
+DATA_DIR = os.path.abspath(
+    os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+)
+
+# Asynchronous jobs: SQLite queue at JOBS_DB (default DATA_DIR/jobs.db), JOBS_WORKERS threads,
+# finished jobs kept for JOBS_TTL_SECONDS; running jobs without a heartbeat for
+# JOBS_STALE_SECONDS are requeued
+job_runner = JobRunner(
+    extraction_service,
+    JobStore(os.getenv("JOBS_DB", os.path.join(DATA_DIR, "jobs.db"))),
+    workers=int(os.getenv("JOBS_WORKERS", "1")),
+    ttl_seconds=float(os.getenv("JOBS_TTL_SECONDS", "3600")),
+    stale_seconds=float(os.getenv("JOBS_STALE_SECONDS", "60")),
+)
+
+# Stored results (GET /results/...): SQLite + FTS5 at RESULTS_DB (default DATA_DIR/results.db,
+# empty disables), kept for RESULTS_TTL_DAYS and capped at RESULTS_MAX_ENTRIES (least recently
+# read go first); RESULTS_CACHE_SIZE results are also held in memory
+result_store = None
+results_db = os.getenv("RESULTS_DB", os.path.join(DATA_DIR, "results.db"))
+if results_db:
+    result_store = ResultStore(
+        results_db,
+        max_entries=int(os.getenv("RESULTS_MAX_ENTRIES", "100000")),
+        ttl_seconds=float(os.getenv("RESULTS_TTL_DAYS", "30")) * 86400.0,
+        cache_size=int(os.getenv("RESULTS_CACHE_SIZE", "256")),
+    )
+
+# Admission control: at most ADMISSION_CAPACITY cost units (about one 4 MP page each; 0 disables)
+# run at once, bulk requests (over ADMISSION_INTERACTIVE_MAX_UNITS) at most ADMISSION_BULK_SHARE
+# of them. ADMISSION_QUEUE_INTERACTIVE / ADMISSION_QUEUE_BULK requests may wait, for up to
+# ADMISSION_WAIT_INTERACTIVE_S / ADMISSION_WAIT_BULK_S; beyond that requests get 429 + Retry-After
+admission = None
+admission_capacity = float(os.getenv("ADMISSION_CAPACITY", "16"))
+if admission_capacity > 0:
+    admission = AdmissionController(
+        capacity=admission_capacity,
+        class_capacity={"bulk": admission_capacity * float(os.getenv("ADMISSION_BULK_SHARE", "0.75"))},
+        max_queue={
+            "interactive": int(os.getenv("ADMISSION_QUEUE_INTERACTIVE", "64")),
+            "bulk": int(os.getenv("ADMISSION_QUEUE_BULK", "8")),
+        },
+        max_wait_seconds={
+            "interactive": float(os.getenv("ADMISSION_WAIT_INTERACTIVE_S", "30")),
+            "bulk": float(os.getenv("ADMISSION_WAIT_BULK_S", "300")),
+        },
+        cost_model=CostModel(interactive_max_units=float(os.getenv("ADMISSION_INTERACTIVE_MAX_UNITS", "4"))),
+    )
+
 # Controller
 controller = OCRController(
     extraction_service=extraction_service,
     verification_service=verification_service,
+    overlay_store=overlay_store,
+    job_runner=job_runner,
+    result_store=result_store,
+    admission=admission,
+    # /extract/batch limits (after archive expansion)
+    batch_max_files=int(os.getenv("BATCH_MAX_FILES", "1000")),
+    batch_max_bytes=int(os.getenv("BATCH_MAX_MB", "256")) * 1024 * 1024,
 )
 
 
+# Cancellation: the work of a request whose client went away (polled every DISCONNECT_POLL_S,
+# 0 disables) stops at the next stage / page boundary, LLM wait included; REQUEST_DEADLINE_S
+# (0 = none) bounds non-streaming requests the same way and answers 504
+request_deadline = float(os.getenv("REQUEST_DEADLINE_S", "0"))
+disconnect_poll = float(os.getenv("DISCONNECT_POLL_S", "0.5"))
+disconnect_watchers = set()
+
+
+def request_cancellation(request: Request, deadline: bool = True) -> CancellationToken:
+    """Token for one request's work; the controller closes it when the work ends."""
+    cancel = CancellationToken.with_timeout(request_deadline if deadline else None)
+    if disconnect_poll > 0:
+        # The loop only keeps weak references to tasks
+        watcher = asyncio.get_running_loop().create_task(watch_disconnect(request, cancel, disconnect_poll))
+        disconnect_watchers.add(watcher)
+        watcher.add_done_callback(disconnect_watchers.discard)
+    return cancel
+
+
+def check_overlay_options(overlay_mode: str, overlay_format: Optional[str]):
+    """400 for an unknown overlay_mode / overlay_format instead of silently rendering a default raster."""
+    if overlay_mode not in OVERLAY_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown overlay_mode '{overlay_mode}' (use one of {', '.join(OVERLAY_MODES)})"
+        )
+    if overlay_format and overlay_format not in IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported overlay_format '{overlay_format}' (use one of {', '.join(IMAGE_FORMATS)})",
+        )
+
+
+@app.exception_handler(OperationCancelled)
+async def operation_cancelled(request: Request, exc: OperationCancelled):
+    """504 when the request deadline passed; 499 (client closed request) when nobody is listening."""
+    status_code = 504 if exc.reason == "deadline" else 499
+    return FastJSONResponse({"detail": str(exc), "reason": exc.reason, "stage": exc.stage}, status_code=status_code)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    """429 with Retry-After (seconds) when a request's queue is full or its wait timed out."""
+    retry_after = int(exc.retry_after)
+    return FastJSONResponse(
+        {"detail": str(exc), "request_class": exc.request_class, "retry_after": retry_after},
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+@app.on_event("startup")
+async def warm_up_engines():
+    """Run one inference per pooled engine before serving traffic."""
+    module_factory.warm_up()
+    job_runner.start()
+    overlay_store.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    job_runner.stop()
+    overlay_store.stop()
+
+
 # =============================================================================
 # FASTAPI ENDPOINTS → Controller Delegation
 # =============================================================================
 
 @app.post("/extract", response_model=ExtractionResponse)
 async def extract(
+    request: Request,
     document: UploadFile = File(...),
     include_detection: str = Form(default="false"),
     page_number: int = Form(default=1),
     language: str = Form(default="en"),
-    fields: str = Form(default="")
+    fields: str = Form(default=""),
+    response_format: str = Form(default="full"),
+    overlay_mode: str = Form(default="raster"),
+    overlay_format: str = Form(default=""),
+    overlay_max_dim: int = Form(default=0),
 ):
-    """Single-page OCR extraction."""
+    """Single-page OCR extraction (response_format="compact" for columnar detections)."""
+    check_overlay_options(overlay_mode.lower(), overlay_format.lower())
     custom_fields = json.loads(fields) if fields.strip() else None
 
     req = OCRRequest(
         include_detection=(include_detection.lower() == "true"),
         page_number=page_number,
         language=language.lower(),
-        fields=custom_fields
+        fields=custom_fields,
+        overlay_mode=overlay_mode.lower(),
+        overlay_format=overlay_format.lower() or None,
+        overlay_max_dim=overlay_max_dim or None,
     )
-    return await controller.extract(document, req)
+    try:
+        response = await controller.extract(document, req, request_cancellation(request))
+    except PageSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return render_extraction(response, response_format, request.headers.get("accept"))
+
+
+@app.post("/extract/batch")
+async def extract_batch(
+    request: Request,
+    documents: List[UploadFile] = File(...),
+    language: str = Form(default="en"),
+    fields: str = Form(default=""),
+    options: str = Form(default=""),
+    response_format: str = Form(default="full"),
+    stream: str = Form(default=""),
+):
+    """
+    Extract many documents in one request (images, PDFs, or zip/tar archives of them).
+
+    language / fields: defaults for every file
+    options: JSON {"<file name>": {"language": "ko", "fields": [...], "page_number": 1}} per-file overrides
+    stream: "ndjson" or "sse" emits each file's result as soon as it is finished, then a summary
+    Results are keyed by file name (member path inside an archive).
+    """
+    req = OCRRequest(
+        language=language.lower(),
+        fields=json.loads(fields) if fields.strip() else None,
+    )
+    try:
+        per_file = json.loads(options) if options.strip() else None
+        fmt = stream_format(request.headers.get("accept"), stream.strip())
+        items = await controller.prepare_batch(documents, req, per_file)
+    except (ArchiveError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fmt is not None:
+        return stream_batch(
+            await controller.stream_batch(items, request_cancellation(request, deadline=False)), fmt, response_format
+        )
+    response = await controller.extract_batch(items, request_cancellation(request))
+    return render_batch(response, response_format, request.headers.get("accept"))
 
 
 @app.post("/extract/pdf/all", response_model=ExtractionResponse)
 async def extract_pdf_all(
+    request: Request,
     document: UploadFile = File(...),
     language: str = Form(default="en"),
-    fields: str = Form(default="")
+    fields: str = Form(default=""),
+    response_format: str = Form(default="full"),
+    pages: str = Form(default=""),
+    max_pages: int = Form(default=0),
+    stream: str = Form(default=""),
 ):
-    """Multi-page PDF extraction."""
+    """
+    Multi-page PDF extraction (response_format="compact" for columnar detections).
+
+    pages: e.g. "1-3,7,10-" to process only those pages; max_pages caps how many are processed.
+    stream: "ndjson" or "sse" (or Accept: application/x-ndjson / text/event-stream) emits each
+            page as soon as it is finished, followed by a summary frame.
+    """
     custom_fields = json.loads(fields) if fields.strip() else None
 
     req = OCRRequest(
         include_detection=False,
         page_number=1,
         language=language.lower(),
-        fields=custom_fields
+        fields=custom_fields,
+        pages=pages.strip() or None,
+        max_pages=max_pages or None,
     )
-    return await controller.extract_all_pages(document, req)
+    try:
+        fmt = stream_format(request.headers.get("accept"), stream.strip())
+        if fmt is not None:
+            events = await controller.stream_all_pages(document, req, request_cancellation(request, deadline=False))
+            return stream_extraction(events, fmt, response_format)
+        response = await controller.extract_all_pages(document, req, request_cancellation(request))
+    except (PageSelectionError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return render_extraction(response, response_format, request.headers.get("accept"))
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    document: UploadFile = File(...),
+    mode: str = Form(default=""),
+    page_number: int = Form(default=1),
+    language: str = Form(default="en"),
+    fields: str = Form(default=""),
+    pages: str = Form(default=""),
+    max_pages: int = Form(default=0),
+):
+    """
+    Queue an extraction and return immediately; poll GET /jobs/{job_id}.
+
+    mode: "pdf_all" (default for PDFs; honours pages/max_pages) or "extract" (page_number only)
+    """
+    custom_fields = json.loads(fields) if fields.strip() else None
+    mode = mode.lower() or ("pdf_all" if document.filename.lower().endswith(".pdf") else "extract")
+    if mode not in JOB_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown job mode '{mode}'")
+
+    req = OCRRequest(
+        page_number=page_number,
+        language=language.lower(),
+        fields=custom_fields,
+        pages=pages.strip() or None,
+        max_pages=max_pages or None,
+    )
+    try:
+        job_id = await controller.submit_job(document, req, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Job progress, finished pages so far and, once done, the result (kept for JOBS_TTL_SECONDS)."""
+    job = await controller.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/results")
+async def find_results(document_hash: str, limit: int = 20, language: str = "", page_number: int = 0):
+    """Stored extractions of a document (by sha256), newest first; optionally one language/page."""
+    results = await controller.find_results(document_hash, limit, language.lower() or None, page_number or None)
+    return {"document_hash": document_hash.lower(), "results": results}
+
+
+@app.get("/results/search")
+async def search_results(q: str, limit: int = 20, document_hash: str = ""):
+    """Full-text search over the text of stored extractions; every term must match."""
+    hits = await controller.search_results(q, limit, document_hash or None)
+    return {"query": q, "hits": hits}
+
+
+@app.get("/results/{extraction_id}", response_model=ExtractionResponse)
+async def get_result(request: Request, extraction_id: str, response_format: str = "full"):
+    """A stored extraction (overlays are not stored; use POST /detect for a new one)."""
+    response = await controller.get_result(extraction_id)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Extraction result not found or expired")
+    return render_extraction(response, response_format, request.headers.get("accept"))
+
+
+@app.post("/remap", response_model=ExtractionResponse)
+async def remap(
+    request: Request,
+    fields: str = Form(...),
+    extraction_id: str = Form(default=""),
+    document_hash: str = Form(default=""),
+    language: str = Form(default=""),
+    page_number: int = Form(default=0),
+    response_format: str = Form(default="full"),
+):
+    """
+    Re-run only the LLM field mapping of a stored extraction with a new `fields` list.
+
+    extraction_id: the stored result to remap; or
+    document_hash: remap the newest result for that document (language / page_number narrow it)
+    The remapped result is stored under a new extraction_id.
+    """
+    if not extraction_id and not document_hash:
+        raise HTTPException(status_code=400, detail="Provide extraction_id or document_hash")
+    try:
+        custom_fields = json.loads(fields) if fields.strip() else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="fields must be a JSON list")
+
+    response = await controller.remap(
+        custom_fields,
+        extraction_id=extraction_id.strip() or None,
+        document_hash=document_hash.strip() or None,
+        language=language.lower() or None,
+        page_number=page_number or None,
+        cancel=request_cancellation(request),
+    )
+    if response is None:
+        key = f"extraction '{extraction_id}'" if extraction_id else f"document '{document_hash}'"
+        raise HTTPException(
+            status_code=404,
+            detail=f"No stored OCR result for {key} (never stored, expired or evicted); run /extract again",
+        )
+    return render_extraction(response, response_format, request.headers.get("accept"))
+
+
+@app.delete("/results/{extraction_id}")
+async def delete_result(extraction_id: str):
+    if not await controller.delete_result(extraction_id):
+        raise HTTPException(status_code=404, detail="Extraction result not found or expired")
+    return {"deleted": extraction_id}
+
+
+@app.post("/pdf/index")
+async def pdf_index_info(document: UploadFile = File(...)):
+    """Page count, page sizes and text-layer pages of a PDF (cached by document hash)."""
+    info = await controller.pdf_index(document)
+    if info is None:
+        raise HTTPException(status_code=400, detail="Not a PDF file")
+    return info
 
 
 @app.post("/detect")
 async def detect(
+    request: Request,
     document: UploadFile = File(...),
     page_number: int = Form(default=1),
     language: str = Form(default="en"),
-    fields: str = Form(default="")
+    fields: str = Form(default=""),
+    overlay_mode: str = Form(default="raster"),
+    overlay_format: str = Form(default=""),
+    overlay_max_dim: int = Form(default=0),
 ):
-    """Detect regions + confidence overlay."""
+    """Detect regions + confidence overlay (raster, vector or a lazily rendered URL)."""
+    check_overlay_options(overlay_mode.lower(), overlay_format.lower())
     custom_fields = json.loads(fields) if fields.strip() else None
 
     req = OCRRequest(
         include_detection=True,
         page_number=page_number,
         language=language.lower(),
-        fields=custom_fields
+        fields=custom_fields,
+        overlay_mode=overlay_mode.lower(),
+        overlay_format=overlay_format.lower() or None,
+        overlay_max_dim=overlay_max_dim or None,
     )
-    return await controller.detect(document, req)
+    try:
+        return await controller.detect(document, req, request_cancellation(request))
+    except PageSelectionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/overlay/{overlay_id}")
+async def get_overlay(overlay_id: str, format: str = "", max_dim: int = 0):
+    """Render an overlay registered with overlay_mode="url" (expires after OVERLAY_TTL_SECONDS)."""
+    check_overlay_options("url", format.lower())
+    rendered = await controller.get_overlay(overlay_id, format.lower() or None, max_dim or None)
+    if rendered is None:
+        raise HTTPException(status_code=404, detail="Overlay not found or expired")
+    data, media_type = rendered
+    return Response(content=data, media_type=media_type)
 
 
 @app.post("/verify", response_model=VerificationResult)
 async def verify(
-    document: UploadFile = File(...),
+    request: Request,
+    document: Optional[UploadFile] = File(default=None),
     verification_data: str = Form(...),
-    fields: str = Form(default="")
+    fields: str = Form(default=""),
+    extraction_id: str = Form(default=""),
+    document_hash: str = Form(default=""),
+    language: str = Form(default=""),
+    page_number: int = Form(default=1),
+    thresholds: str = Form(default=""),
+    field_types: str = Form(default=""),
 ):
-    """Field verification."""
-    custom_fields = json.loads(fields) if fields.strip() else None
-
-    req = VerificationRequest(
-        verification_data=json.loads(verification_data),
-        fields=custom_fields
-    )
-    return await controller.verify(document, req)
+    """
+    Field verification against a stored extraction when there is one (no OCR), else the upload.
+
+    extraction_id / document_hash: the stored result to verify against (document then optional)
+    language / page_number: pick the stored result; used to OCR the document when nothing is stored
+    thresholds: JSON {"<field>": 0.9} match thresholds on the 0-1 similarity
+    field_types: JSON {"<field>": "date"} (text, id, date or phone; inferred from the name otherwise)
+    """
+    try:
+        req = VerificationRequest(
+            verification_data=json.loads(verification_data),
+            fields=json.loads(fields) if fields.strip() else None,
+            extraction_id=extraction_id.strip() or None,
+            document_hash=document_hash.strip() or None,
+            language=language.lower() or None,
+            page_number=page_number,
+            thresholds=json.loads(thresholds) if thresholds.strip() else None,
+            field_types=json.loads(field_types) if field_types.strip() else None,
+        )
+        return await controller.verify(document, req, request_cancellation(request))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/verify/bulk", response_model=BulkVerificationResult)
+async def verify_bulk(
+    request: Request,
+    records: str = Form(default=""),
+    records_file: Optional[UploadFile] = File(default=None),
+    document: Optional[UploadFile] = File(default=None),
+    fields: str = Form(default=""),
+    extraction_id: str = Form(default=""),
+    document_hash: str = Form(default=""),
+    language: str = Form(default=""),
+    page_number: int = Form(default=1),
+    thresholds: str = Form(default=""),
+    field_types: str = Form(default=""),
+):
+    """
+    Verify many submitted records ({"<field>": value} each) against one extraction.
+
+    records: JSON list of records; form fields are capped at 1 MB, so larger sets go in
+    records_file: a JSON list or NDJSON (one record per line) upload
+    The extraction is found like /verify's; per-field scores and matches come back
+    in record order, with record_matches true where every checked field matched.
+    """
+    try:
+        if records_file is not None:
+            content = (await records_file.read()).decode("utf-8")
+            parsed = json.loads(content) if content.lstrip().startswith("[") else [
+                json.loads(line) for line in content.splitlines() if line.strip()
+            ]
+        elif records.strip():
+            parsed = json.loads(records)
+        else:
+            raise ValueError("Provide records or records_file")
+
+        req = BulkVerificationRequest(
+            records=parsed,
+            fields=json.loads(fields) if fields.strip() else None,
+            extraction_id=extraction_id.strip() or None,
+            document_hash=document_hash.strip() or None,
+            language=language.lower() or None,
+            page_number=page_number,
+            thresholds=json.loads(thresholds) if thresholds.strip() else None,
+            field_types=json.loads(field_types) if field_types.strip() else None,
+        )
+        return await controller.verify_bulk(document, req, request_cancellation(request))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/health")
@@ -175,8 +609,23 @@ async def health():
     return {
         "status": "healthy",
         "modules": ["extraction", "verification", "quality", "llm_mapper"],
-        "languages_supported": ["en", "ch", "ja", "ko"],
-        "engines": "PHOCR (shared for all languages)"
+        "languages_supported": ["en", "ch", "ja", "ko", "auto"],
+        "engines": "PHOCR (pooled)",
+        "engine_pools": {name: pool.size for name, pool in module_factory.pools().items()},
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Engine pool utilization/wait times and all registered counters and histograms."""
+    return {
+        "engine_pools": module_factory.pool_stats(),
+        "templates": template_registry.report(),
+        "page_cache": page_cache.stats() if page_cache is not None else None,
+        "jobs_queued": job_runner.store.queued_count(),
+        "results": result_store.stats() if result_store is not None else None,
+        "admission": admission.stats() if admission is not None else None,
+        "metrics": metrics.snapshot(),
     }
 
 
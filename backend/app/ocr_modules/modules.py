@@ -1,25 +1,34 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 from PIL import Image
 import numpy as np
 
 # Import existing utilities (these are adapters to your existing functions)
 from app.utils import is_pdf_file
+from app.ocr_modules.engine_pool import EnginePool
+from app.ocr_modules.scheduler import InferenceScheduler
 
 
 class BaseExtractionModule(ABC):
     """Abstract base class for language-specific OCR extraction modules.
 
-    Each concrete module must implement `extract` which accepts a PIL Image and returns
-    a standardized dict with keys: txts (list), scores (list), boxes (list), lang_type (str), elapse (float)
+    Each concrete module must implement `extract` which accepts a PIL Image (or an RGB/grayscale
+    numpy buffer produced by the preprocessing pipeline) and returns
+    a standardized dict with keys: txts (list), scores (list), boxes (ndarray of shape (N, 4, 2)),
+    lang_type (str), elapse (float)
     This preserves compatibility with the existing `engine(image)` result used elsewhere.
     """
 
+    # Fallback lang_type when the engine result does not carry one
+    default_lang_type = "en"
+
     def __init__(self, name: str):
         self.name = name
+        # Optional InferenceScheduler (micro-batching); set by ExtractionModuleFactory
+        self.scheduler = None
 
     @abstractmethod
-    def extract(self, image: Image.Image) -> Dict[str, Any]:
+    def extract(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
         """Run OCR on the provided PIL image and return a result-like dict/object.
 
         The returned object should mirror the fields expected by the rest of the codebase
@@ -27,103 +36,177 @@ class BaseExtractionModule(ABC):
         """
         raise NotImplementedError
 
+    @staticmethod
+    def _engine_input(image: Union[Image.Image, np.ndarray]) -> Union[Image.Image, np.ndarray]:
+        """PHOCR treats 3-channel ndarrays as BGR (cv2 convention); pipeline buffers are RGB."""
+        if isinstance(image, np.ndarray) and image.ndim == 3:
+            return np.ascontiguousarray(image[:, :, ::-1])
+        return image
+
+    def _run_engine(self, image: Union[Image.Image, np.ndarray]) -> Any:
+        """Run one inference through the scheduler (batched) or a pooled engine checkout."""
+        if self.scheduler is not None:
+            return self.scheduler.infer(self._engine_input(image))
+        with self.pool.checkout() as engine:
+            return engine(self._engine_input(image))
+
+    def _normalize(self, result: Any) -> Dict[str, Any]:
+        return {
+            "txts": list(result.txts) if hasattr(result, 'txts') else [],
+            "scores": list(result.scores) if hasattr(result, 'scores') else [],
+            # Boxes stay a numpy array; DetectionBatch consumes them without a Python-level copy
+            "boxes": np.asarray(result.boxes) if getattr(result, 'boxes', None) is not None else np.zeros((0, 4, 2)),
+            "lang_type": getattr(result, 'lang_type', self.default_lang_type),
+            "elapse": getattr(result, 'elapse', 0.0),
+            "raw": result
+        }
+
+    def extract_many(self, images: List[Union[Image.Image, np.ndarray]]) -> List[Dict[str, Any]]:
+        """OCR several images; with a scheduler they are submitted together so they share batches."""
+        if self.scheduler is None:
+            return [self.extract(image) for image in images]
+        results = self.scheduler.infer_many([self._engine_input(image) for image in images])
+        return [self._normalize(result) for result in results]
+
 
 class LatinExtractionModule(BaseExtractionModule):
     """Extraction module for Latin-script languages (English, etc.)
 
     This module is a thin adapter around the PHOCR or other engine configured for Latin.
+    `engine` may be a single engine or an EnginePool.
     """
 
     def __init__(self, engine):
         super().__init__("latin")
-        self.engine = engine
+        self.pool = EnginePool.of(engine, "latin")
 
-    def extract(self, image: Image.Image) -> Dict[str, Any]:
+    def extract(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
         # Delegates to the provided engine and returns a normalized structure
-        result = self.engine(image)
-        return {
-            "txts": list(result.txts) if hasattr(result, 'txts') else [],
-            "scores": list(result.scores) if hasattr(result, 'scores') else [],
-            "boxes": result.boxes.tolist() if hasattr(result, 'boxes') and result.boxes is not None else [],
-            "lang_type": getattr(result, 'lang_type', 'en'),
-            "elapse": getattr(result, 'elapse', 0.0),
-            "raw": result
-        }
+        return self._normalize(self._run_engine(image))
 
 
 class ChineseExtractionModule(BaseExtractionModule):
+    default_lang_type = "ch"
+
     def __init__(self, engine):
         super().__init__("ch")
-        self.engine = engine
+        self.pool = EnginePool.of(engine, "ch")
 
-    def extract(self, image: Image.Image) -> Dict[str, Any]:
-        result = self.engine(image)
-        return {
-            "txts": list(result.txts) if hasattr(result, 'txts') else [],
-            "scores": list(result.scores) if hasattr(result, 'scores') else [],
-            "boxes": result.boxes.tolist() if hasattr(result, 'boxes') and result.boxes is not None else [],
-            "lang_type": getattr(result, 'lang_type', 'ch'),
-            "elapse": getattr(result, 'elapse', 0.0),
-            "raw": result
-        }
+    def extract(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
+        return self._normalize(self._run_engine(image))
 
 
 class JapaneseExtractionModule(BaseExtractionModule):
+    default_lang_type = "ja"
+
     def __init__(self, engine):
         super().__init__("ja")
-        self.engine = engine
+        self.pool = EnginePool.of(engine, "ja")
 
-    def extract(self, image: Image.Image) -> Dict[str, Any]:
-        result = self.engine(image)
-        return {
-            "txts": list(result.txts) if hasattr(result, 'txts') else [],
-            "scores": list(result.scores) if hasattr(result, 'scores') else [],
-            "boxes": result.boxes.tolist() if hasattr(result, 'boxes') and result.boxes is not None else [],
-            "lang_type": getattr(result, 'lang_type', 'ja'),
-            "elapse": getattr(result, 'elapse', 0.0),
-            "raw": result
-        }
+    def extract(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
+        return self._normalize(self._run_engine(image))
 
 
 class KoreanExtractionModule(BaseExtractionModule):
+    default_lang_type = "ko"
+
     def __init__(self, engine):
         super().__init__("ko")
-        self.engine = engine
+        self.pool = EnginePool.of(engine, "ko")
 
-    def extract(self, image: Image.Image) -> Dict[str, Any]:
-        result = self.engine(image)
-        return {
-            "txts": list(result.txts) if hasattr(result, 'txts') else [],
-            "scores": list(result.scores) if hasattr(result, 'scores') else [],
-            "boxes": result.boxes.tolist() if hasattr(result, 'boxes') and result.boxes is not None else [],
-            "lang_type": getattr(result, 'lang_type', 'ko'),
-            "elapse": getattr(result, 'elapse', 0.0),
-            "raw": result
-        }
+    def extract(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
+        return self._normalize(self._run_engine(image))
 
 
 class ExtractionModuleFactory:
-    """Factory to provide the correct extraction module for a language code."""
+    """Factory to provide the correct extraction module for a language code.
+
+    Engines are held in per-language EnginePools; module objects are built once
+    per language and cached, so `get_module` is a dictionary lookup.
+    """
+
+    LANGUAGE_ALIASES = {
+        "en": "en", "en_us": "en", "en_gb": "en", "latin": "en",
+        "ch": "ch", "zh": "ch", "zh_cn": "ch", "chinese": "ch",
+        "ja": "ja", "jp": "ja", "japanese": "ja",
+        "ko": "ko", "kr": "ko", "korean": "ko",
+    }
+
+    MODULE_CLASSES = {
+        "en": LatinExtractionModule,
+        "ch": ChineseExtractionModule,
+        "ja": JapaneseExtractionModule,
+        "ko": KoreanExtractionModule,
+    }
 
     def __init__(self, engine_map: Optional[Dict[str, Any]] = None):
-        # engine_map: mapping from lang code -> engine instance
-        self.engine_map = engine_map or {}
+        # engine_map: mapping from lang code -> engine instance or EnginePool
+        self.engine_map: Dict[str, EnginePool] = {}
+        self._modules: Dict[str, BaseExtractionModule] = {}
+        self._schedulers: Dict[str, InferenceScheduler] = {}
+        self._batching: Optional[Dict[str, float]] = None
+        self._tiling: Optional[Dict[str, Any]] = None
+        for lang, engine in (engine_map or {}).items():
+            self.register(lang, engine)
 
     def register(self, lang: str, engine: Any):
-        self.engine_map[lang] = engine
+        """Register an engine (wrapped in a size-1 pool) or an EnginePool for `lang`."""
+        self.engine_map[lang] = EnginePool.of(engine, lang)
+        self._modules.clear()
+
+    def register_pool(self, lang: str, pool: EnginePool):
+        self.register(lang, pool)
+
+    def enable_batching(self, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        """Route inference through one micro-batching InferenceScheduler per pool."""
+        self._batching = {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms}
+        self._modules.clear()
+
+    def enable_tiling(self, pixel_threshold: int = 12_000_000, tile_size: int = 2048, overlap: int = 256):
+        """Wrap modules so images above `pixel_threshold` are OCR'd as overlapping tiles."""
+        self._tiling = {"pixel_threshold": pixel_threshold, "tile_size": tile_size, "overlap": overlap}
+        self._modules.clear()
+
+    def _scheduler_for(self, pool: EnginePool) -> Optional[InferenceScheduler]:
+        if self._batching is None or pool is None:
+            return None
+        if pool.name not in self._schedulers:
+            self._schedulers[pool.name] = InferenceScheduler(pool, **self._batching)
+        return self._schedulers[pool.name]
+
+    def canonical_language(self, lang: str) -> str:
+        # default
+        return self.LANGUAGE_ALIASES.get((lang or "").lower(), "en")
 
     def get_module(self, lang: str) -> BaseExtractionModule:
-        lang = (lang or "").lower()
-        if lang in ("en", "en_us", "en_gb", "latin"):
-            return LatinExtractionModule(self.engine_map.get('en'))
-        if lang in ("ch", "zh", "zh_cn", "chinese"):
-            return ChineseExtractionModule(self.engine_map.get('ch'))
-        if lang in ("ja", "jp", "japanese"):
-            return JapaneseExtractionModule(self.engine_map.get('ja'))
-        if lang in ("ko", "kr", "korean"):
-            return KoreanExtractionModule(self.engine_map.get('ko'))
-        # default
-        return LatinExtractionModule(self.engine_map.get('en'))
+        lang = self.canonical_language(lang)
+        module = self._modules.get(lang)
+        if module is None:
+            pool = self.engine_map.get(lang)
+            module = self.MODULE_CLASSES[lang](pool)
+            module.scheduler = self._scheduler_for(pool)
+            if self._tiling is not None:
+                # Local import: tiling builds on BaseExtractionModule from this module
+                from app.ocr_modules.tiling import TiledExtractionModule
+                module = TiledExtractionModule(module, max_workers=pool.size if pool else 1, **self._tiling)
+            self._modules[lang] = module
+        return module
+
+    def pools(self) -> Dict[str, EnginePool]:
+        """Distinct pools by name (one pool may serve several languages)."""
+        return {pool.name: pool for pool in self.engine_map.values()}
+
+    def warm_up(self):
+        for pool in self.pools().values():
+            pool.warm_up()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats = {name: pool.stats() for name, pool in self.pools().items()}
+        for lang, pool in self.engine_map.items():
+            stats[pool.name].setdefault("languages", []).append(lang)
+        for name, scheduler in self._schedulers.items():
+            stats[name]["scheduler"] = scheduler.stats()
+        return stats
 
 
 __all__ = [
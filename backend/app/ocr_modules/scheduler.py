@@ -0,0 +1,162 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, List, Optional, Sequence
+
+from app.ocr_modules.engine_pool import EnginePool
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _Request:
+    __slots__ = ("image", "future", "enqueued")
+
+    def __init__(self, image: Any):
+        self.image = image
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching in front of an EnginePool.
+
+    Images submitted by concurrent requests (or by the pages of one PDF) are
+    queued; one dispatcher thread per pooled engine takes the oldest request,
+    keeps collecting until `max_batch_size` images or `max_wait_ms` have
+    elapsed, runs the batch on one checked-out engine and resolves each
+    caller's future with its own result.
+
+    Batches are only formed when the pooled engines expose `batch(images)`,
+    which takes the whole batch in a single call. Engines without it (PHOCR)
+    get one image per dispatch, so queued images spread across every idle
+    engine instead of running back-to-back on one of them.
+    """
+
+    def __init__(self, pool: EnginePool, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.pool = pool
+        # Coalescing only pays off with a native batch call
+        self.batched = bool(pool.engines) and all(callable(getattr(e, "batch", None)) for e in pool.engines)
+        self.max_batch_size = max(1, max_batch_size) if self.batched else 1
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._stopped = False
+
+        prefix = f"scheduler.{pool.name}"
+        self._batch_size = metrics.histogram(f"{prefix}.batch_size", BATCH_SIZE_BUCKETS)
+        self._queue_ms = metrics.histogram(f"{prefix}.queue_latency_ms")
+        self._queue_depth = metrics.gauge(f"{prefix}.queue_depth")
+        self._failures = metrics.counter(f"{prefix}.failures")
+
+        self._workers = [
+            threading.Thread(target=self._dispatch_loop, name=f"{prefix}.{i}", daemon=True)
+            for i in range(pool.size)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def submit(self, image: Any) -> Future:
+        if self._stopped:
+            raise RuntimeError("InferenceScheduler has been shut down")
+        request = _Request(image)
+        self._queue.put(request)
+        self._queue_depth.inc()
+        return request.future
+
+    def infer(self, image: Any) -> Any:
+        return self.submit(image).result()
+
+    def infer_many(self, images: Sequence[Any]) -> List[Any]:
+        """Submit all images first so they can share batches, then wait for each."""
+        futures = [self.submit(image) for image in images]
+        return [f.result() for f in futures]
+
+    def shutdown(self):
+        self._stopped = True
+        for _ in self._workers:
+            self._queue.put(None)
+
+    # ----------------------------
+    # Dispatcher
+    # ----------------------------
+    def _collect(self) -> Optional[List[_Request]]:
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop signal back for this loop's next iteration
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            started = time.perf_counter()
+            self._queue_depth.dec(len(batch))
+            self._batch_size.observe(len(batch))
+            for request in batch:
+                self._queue_ms.observe((started - request.enqueued) * 1000.0)
+
+            try:
+                with self.pool.checkout() as engine:
+                    self._run_batch(engine, batch)
+            except Exception as e:
+                self._failures.inc()
+                logger.error(f"Batch inference failed on pool '{self.pool.name}': {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    @staticmethod
+    def _run_batch(engine: Any, batch: List[_Request]):
+        batch_call = getattr(engine, "batch", None)
+        if callable(batch_call) and len(batch) > 1:
+            results = list(batch_call([r.image for r in batch]))
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+            if len(results) != len(batch):
+                error = RuntimeError(f"Engine batch() returned {len(results)} results for {len(batch)} images")
+                for request in batch[len(results):]:
+                    request.future.set_exception(error)
+            return
+
+        for request in batch:
+            try:
+                request.future.set_result(engine(request.image))
+            except Exception as e:
+                request.future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {
+            "batched": self.batched,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue_depth.value,
+            "batch_size": self._batch_size.snapshot(),
+            "queue_latency_ms": self._queue_ms.snapshot(),
+        }
+
+
+__all__ = ["InferenceScheduler"]
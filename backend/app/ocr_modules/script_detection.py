@@ -0,0 +1,176 @@
+import time
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Unicode code point ranges (inclusive) per script
+SCRIPT_RANGES: Dict[str, Tuple[Tuple[int, int], ...]] = {
+    "latin": ((0x41, 0x5A), (0x61, 0x7A), (0xC0, 0x24F)),
+    "han": ((0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF)),
+    "kana": ((0x3040, 0x309F), (0x30A0, 0x30FF), (0x31F0, 0x31FF), (0xFF66, 0xFF9D)),
+    "hangul": ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)),
+}
+
+
+class ScriptDetection:
+    """
+    Outcome of script classification.
+
+    language: extraction module language code ("en", "ch", "ja", "ko")
+    script: dominant script name ("latin", "han", "kana", "hangul")
+    counts: characters seen per script
+    elapsed_ms: full classifier cost, probe OCR included
+    ocr_result: the probe OCR result when the probe ran on the unscaled page
+                through the chosen module's engine pool; callers use it as the
+                page's OCR instead of running a second pass
+    """
+
+    def __init__(
+        self,
+        language: str,
+        script: str,
+        counts: Dict[str, int],
+        elapsed_ms: float,
+        ocr_result: Optional[Dict[str, Any]] = None,
+    ):
+        self.language = language
+        self.script = script
+        self.counts = counts
+        self.elapsed_ms = elapsed_ms
+        self.ocr_result = ocr_result
+
+
+class ScriptClassifier:
+    """
+    Picks the extraction module for `language="auto"`.
+
+    A copy of the page downscaled to `sample_side` px on its long side is OCR'd
+    through the probe language's module (PHOCR recognizes all supported scripts)
+    and the recognized characters are bucketed by Unicode range:
+
+    - hangul outweighs han + kana   -> Korean
+    - kana present (min_kana_ratio) -> Japanese (Chinese text never contains kana)
+    - han                           -> Chinese
+    - otherwise                     -> Latin
+
+    CJK only wins when it is at least `min_cjk_ratio` of the recognized
+    characters, so one stray glyph on a Latin document does not reroute it.
+    Either way each page is OCR'd about once: a large page is probed on the
+    downscaled copy (a fraction of a full pass) and then OCR'd by the chosen
+    module, while a page that already fits, or would keep more than
+    `max_sample_fraction` of its pixels, is probed as is and, when the chosen
+    module shares the probe's engine pool (one shared PHOCR pool by default),
+    the probe result is handed back as its OCR.
+    """
+
+    SCRIPT_LANGUAGES = {"latin": "en", "han": "ch", "kana": "ja", "hangul": "ko"}
+
+    def __init__(
+        self,
+        module_factory: Any,
+        sample_side: int = 1024,
+        max_sample_fraction: float = 0.5,
+        probe_language: str = "en",
+        min_cjk_chars: int = 2,
+        min_cjk_ratio: float = 0.05,
+        min_kana_ratio: float = 0.05,
+    ):
+        self.module_factory = module_factory
+        self.sample_side = sample_side
+        self.max_sample_fraction = max_sample_fraction
+        self.probe_language = probe_language
+        self.min_cjk_chars = min_cjk_chars
+        self.min_cjk_ratio = min_cjk_ratio
+        self.min_kana_ratio = min_kana_ratio
+        self._latency = metrics.histogram("script_detection.latency_ms")
+        self._reused = metrics.counter("script_detection.ocr_reused")
+
+    # ----------------------------
+    # Text classification
+    # ----------------------------
+    @staticmethod
+    def script_counts(texts: Iterable[str]) -> Dict[str, int]:
+        """Characters per script across `texts` (vectorized over code points)."""
+        joined = "".join(str(t) for t in texts)
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+        counts = {}
+        for script, ranges in SCRIPT_RANGES.items():
+            mask = np.zeros(len(codes), dtype=bool)
+            for low, high in ranges:
+                mask |= (codes >= low) & (codes <= high)
+            counts[script] = int(mask.sum())
+        return counts
+
+    def classify_counts(self, counts: Dict[str, int]) -> Tuple[str, str]:
+        """(language, script) for per-script character counts."""
+        han, kana, hangul = counts.get("han", 0), counts.get("kana", 0), counts.get("hangul", 0)
+        cjk = han + kana + hangul
+        total = cjk + counts.get("latin", 0)
+
+        if cjk < self.min_cjk_chars or cjk < self.min_cjk_ratio * total:
+            script = "latin"
+        elif hangul > han + kana:
+            script = "hangul"
+        elif kana >= self.min_kana_ratio * (han + kana):
+            script = "kana"
+        else:
+            script = "han"
+        return self.SCRIPT_LANGUAGES[script], script
+
+    def classify_texts(self, texts: Iterable[str]) -> ScriptDetection:
+        """Classify already-recognized text (e.g. a PDF text layer)."""
+        start = time.perf_counter()
+        counts = self.script_counts(texts)
+        language, script = self.classify_counts(counts)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self._latency.observe(elapsed_ms)
+        return ScriptDetection(language, script, counts, elapsed_ms)
+
+    # ----------------------------
+    # Image classification
+    # ----------------------------
+    def _sample(self, array: np.ndarray) -> np.ndarray:
+        """Probe image: `array` downscaled so its long side is at most `sample_side` (itself when that saves little)."""
+        h, w = array.shape[:2]
+        scale = self.sample_side / float(max(h, w))
+        if scale * scale > self.max_sample_fraction:
+            return array
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        return cv2.resize(array, size, interpolation=cv2.INTER_AREA)
+
+    def detect(self, image: Union[Image.Image, np.ndarray]) -> ScriptDetection:
+        start = time.perf_counter()
+        array = np.asarray(image)
+        sample = self._sample(array)
+        probe = self.module_factory.get_module(self.probe_language)
+        result = probe.extract(sample)
+        counts = self.script_counts(result.get("txts", []))
+        language, script = self.classify_counts(counts)
+
+        # Same pixels through the same engines: the probe already is the page's OCR
+        reusable = None
+        if sample is array:
+            chosen = self.module_factory.get_module(language)
+            if chosen is probe or getattr(chosen, "pool", None) is getattr(probe, "pool", None):
+                reusable = result
+                self._reused.inc()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self._latency.observe(elapsed_ms)
+        logger.info(
+            f"Script detection: {script} -> {language} counts={counts} "
+            f"sample={sample.shape[1]}x{sample.shape[0]} in {elapsed_ms:.1f} ms"
+            f"{' (reused as OCR)' if reusable is not None else ''}"
+        )
+        return ScriptDetection(language, script, counts, elapsed_ms, reusable)
+
+
+__all__ = ["SCRIPT_RANGES", "ScriptDetection", "ScriptClassifier"]
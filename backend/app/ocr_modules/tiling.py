@@ -0,0 +1,211 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from app.ocr_modules.modules import BaseExtractionModule
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TiledExtractionModule(BaseExtractionModule):
+    """
+    Decorator around another extraction module for oversized images.
+
+    Images above `pixel_threshold` are split into overlapping tiles (zero-copy
+    numpy views) that are OCR'd in parallel through the inner module. Boxes are
+    shifted back into global coordinates and duplicates from the overlap bands
+    are suppressed, so the result has the same shape as a single pass.
+    """
+
+    def __init__(
+        self,
+        inner: BaseExtractionModule,
+        pixel_threshold: int = 12_000_000,
+        tile_size: int = 2048,
+        overlap: int = 256,
+        max_workers: int = 4,
+        containment_threshold: float = 0.6,
+    ):
+        super().__init__(inner.name)
+        self.inner = inner
+        self.pool = getattr(inner, "pool", None)
+        self.scheduler = getattr(inner, "scheduler", None)
+        self.default_lang_type = inner.default_lang_type
+        self.pixel_threshold = pixel_threshold
+        self.tile_size = tile_size
+        self.overlap = min(overlap, tile_size // 2)
+        self.max_workers = max(1, max_workers)
+        self.containment_threshold = containment_threshold
+        self._tiles = metrics.histogram("tiling.tiles_per_image", (1, 2, 4, 8, 16, 32, 64))
+
+    # ----------------------------
+    # Tiling
+    # ----------------------------
+    def should_tile(self, image: np.ndarray) -> bool:
+        h, w = image.shape[:2]
+        return h * w > self.pixel_threshold
+
+    def tile_origins(self, width: int, height: int) -> List[Tuple[int, int]]:
+        """Top-left corners of a tile grid that covers the image; last row/column is edge-aligned."""
+        step = self.tile_size - self.overlap
+
+        def axis(length: int) -> List[int]:
+            if length <= self.tile_size:
+                return [0]
+            starts = list(range(0, length - self.tile_size, step))
+            starts.append(length - self.tile_size)
+            return starts
+
+        return [(x, y) for y in axis(height) for x in axis(width)]
+
+    # ----------------------------
+    # Extraction
+    # ----------------------------
+    def extract(self, image: Union[Image.Image, np.ndarray]) -> Dict[str, Any]:
+        array = np.asarray(image) if isinstance(image, Image.Image) else image
+        if not self.should_tile(array):
+            return self.inner.extract(image)
+
+        h, w = array.shape[:2]
+        origins = self.tile_origins(w, h)
+        self._tiles.observe(len(origins))
+        logger.info(f"Tiled OCR: {w}x{h} -> {len(origins)} tiles of {self.tile_size}px")
+
+        tiles = [array[y:y + self.tile_size, x:x + self.tile_size] for x, y in origins]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as executor:
+            results = list(executor.map(self.inner.extract, tiles))
+        elapsed = time.perf_counter() - start
+
+        texts: List[str] = []
+        scores: List[float] = []
+        boxes: List[np.ndarray] = []
+        for (x, y), result in zip(origins, results):
+            tile_boxes = np.asarray(result.get("boxes", []), dtype=np.float64)
+            count = min(len(result.get("txts", [])), len(result.get("scores", [])), len(tile_boxes))
+            if count == 0:
+                continue
+            texts.extend(str(t) for t in result["txts"][:count])
+            scores.extend(float(s) for s in result["scores"][:count])
+            boxes.append(tile_boxes[:count] + np.array([x, y], dtype=np.float64))
+
+        merged_boxes = np.concatenate(boxes) if boxes else np.zeros((0, 4, 2))
+        keep = self.merge(merged_boxes, np.asarray(scores, dtype=np.float64), origins)
+
+        return {
+            "txts": [texts[i] for i in keep],
+            "scores": [scores[i] for i in keep],
+            "boxes": merged_boxes[keep],
+            "lang_type": results[0].get("lang_type", self.default_lang_type) if results else self.default_lang_type,
+            "elapse": elapsed,
+            "raw": results,
+        }
+
+    def extract_many(self, images: List[Union[Image.Image, np.ndarray]]) -> List[Dict[str, Any]]:
+        """Images under the threshold go to the inner module together (one scheduler batch); only oversized ones are tiled."""
+        arrays = [np.asarray(image) if isinstance(image, Image.Image) else image for image in images]
+        small = [i for i, array in enumerate(arrays) if not self.should_tile(array)]
+        results: List[Dict[str, Any]] = [None] * len(images)
+        if small:
+            for i, result in zip(small, self.inner.extract_many([images[i] for i in small])):
+                results[i] = result
+        for i, array in enumerate(arrays):
+            if results[i] is None:
+                results[i] = self.extract(array)
+        return results
+
+    # ----------------------------
+    # Overlap de-duplication
+    # ----------------------------
+    def merge(
+        self, polygons: np.ndarray, scores: np.ndarray, origins: Optional[List[Tuple[int, int]]] = None
+    ) -> List[int]:
+        """
+        Indices of detections to keep, in reading order.
+
+        A detection is dropped when most of its area lies inside a larger kept
+        detection (the same text seen twice, or a fragment cut at a tile edge).
+        With `origins`, only detections touching two or more tiles (the overlap
+        bands) can be duplicates; candidates are compared with an x-sorted sweep,
+        so memory stays linear in the number of detections.
+        """
+        if len(polygons) == 0:
+            return []
+
+        x1, y1 = polygons[:, :, 0].min(axis=1), polygons[:, :, 1].min(axis=1)
+        x2, y2 = polygons[:, :, 0].max(axis=1), polygons[:, :, 1].max(axis=1)
+        area = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+
+        if origins is None:
+            candidates = np.arange(len(polygons))
+        else:
+            ox = np.array([o[0] for o in origins], dtype=np.float64)
+            oy = np.array([o[1] for o in origins], dtype=np.float64)
+            touches = ((x1[:, None] < ox + self.tile_size) & (x2[:, None] > ox)
+                       & (y1[:, None] < oy + self.tile_size) & (y2[:, None] > oy))
+            candidates = np.flatnonzero(touches.sum(axis=1) >= 2)
+        overlapping = self._overlapping(candidates, x1, y1, x2, y2, area)
+
+        # Prefer larger (more complete) boxes, then higher confidence
+        order = np.lexsort((-scores, -area))
+        suppressed = np.zeros(len(polygons), dtype=bool)
+        keep = []
+        for i in order:
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            neighbours = overlapping.get(i)
+            if neighbours is not None:
+                suppressed[neighbours] = True
+
+        # Reading order: rows of roughly one line height, then left to right
+        line_height = max(float(np.median(y2 - y1)), 1.0)
+        keep = np.asarray(keep, dtype=np.int64)
+        return keep[np.lexsort((x1[keep], np.round(y1[keep] / line_height)))].tolist()
+
+    # Candidate pairs examined per vectorized step of the sweep (bounds temporary memory)
+    _SWEEP_CHUNK = 1 << 18
+
+    def _overlapping(
+        self, candidates: np.ndarray, x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray, area: np.ndarray
+    ) -> Dict[int, np.ndarray]:
+        """Neighbours of every candidate whose intersection covers `containment_threshold` of the smaller box."""
+        by_x = candidates[np.argsort(x1[candidates], kind="stable")]
+        starts = x1[by_x]
+        # Boxes after k in x order start at or after x1[k]; only those starting before x2[k] can intersect it
+        first = np.arange(1, len(by_x) + 1)
+        counts = np.maximum(np.searchsorted(starts, x2[by_x], side="left") - first, 0)
+
+        found: List[Tuple[np.ndarray, np.ndarray]] = []
+        k = 0
+        while k < len(by_x):
+            # Extend the chunk until it covers about _SWEEP_CHUNK pairs (at least one box)
+            end = k + max(1, int(np.searchsorted(np.cumsum(counts[k:]), self._SWEEP_CHUNK, side="right")))
+            sizes = counts[k:end]
+            if sizes.sum():
+                left = np.repeat(np.arange(k, end), sizes)
+                offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+                i, j = by_x[left], by_x[first[left] + offsets]
+                iw = np.minimum(x2[i], x2[j]) - x1[j]
+                ih = np.maximum(0, np.minimum(y2[i], y2[j]) - np.maximum(y1[i], y1[j]))
+                hit = (iw * ih) / np.maximum(np.minimum(area[i], area[j]), 1e-9) >= self.containment_threshold
+                found.append((i[hit], j[hit]))
+            k = end
+
+        if not found:
+            return {}
+        i = np.concatenate([np.concatenate([a for a, _ in found]), np.concatenate([b for _, b in found])])
+        j = np.concatenate([np.concatenate([b for _, b in found]), np.concatenate([a for a, _ in found])])
+        order = np.argsort(i, kind="stable")
+        i, j = i[order], j[order]
+        bounds = np.flatnonzero(np.diff(i)) + 1
+        return {int(group[0]): neighbours for group, neighbours in zip(np.split(i, bounds), np.split(j, bounds))
+                if len(group)}
+
+
+__all__ = ["TiledExtractionModule"]
@@ -0,0 +1,372 @@
+import io
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Union
+
+from PIL import Image
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Scheduling classes, highest priority first
+REQUEST_CLASSES = ("interactive", "bulk")
+
+
+class AdmissionRejected(Exception):
+    """The request's class queue is full or its wait timed out (HTTP 429 with Retry-After)."""
+
+    def __init__(self, message: str, request_class: str, retry_after: float):
+        super().__init__(message)
+        self.request_class = request_class
+        self.retry_after = retry_after
+
+
+# ----------------------------------------------------------------------------
+# Cost estimation
+# ----------------------------------------------------------------------------
+class CostEstimate:
+    """
+    Up-front cost of one request.
+
+    units: comparable work units (see CostModel)
+    request_class: "interactive" or "bulk"
+    pages / megapixels / size_bytes / fields: what the estimate was made from
+    """
+
+    def __init__(
+        self,
+        units: float,
+        request_class: str,
+        pages: int = 1,
+        megapixels: float = 0.0,
+        size_bytes: int = 0,
+        fields: int = 0,
+    ):
+        self.units = units
+        self.request_class = request_class
+        self.pages = pages
+        self.megapixels = megapixels
+        self.size_bytes = size_bytes
+        self.fields = fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "units": round(self.units, 3),
+            "request_class": self.request_class,
+            "pages": self.pages,
+            "megapixels": round(self.megapixels, 2),
+            "size_bytes": self.size_bytes,
+            "fields": self.fields,
+        }
+
+
+class CostModel:
+    """
+    Estimates request cost from headers and cached metadata only (nothing is decoded).
+
+    One unit is about one page of `unit_megapixels` OCR'd: an image page costs
+    megapixels / unit_megapixels (at least 1), a PDF page is sized at `pdf_dpi`,
+    and a page with a text layer costs `text_layer_units`. Every requested field
+    adds `field_units` per page (longer LLM prompts and answers). Input whose
+    size cannot be read costs one unit per `fallback_bytes`.
+    Requests up to `interactive_max_units` are interactive, larger ones bulk.
+    """
+
+    def __init__(
+        self,
+        unit_megapixels: float = 4.0,
+        field_units: float = 0.05,
+        text_layer_units: float = 0.2,
+        pdf_dpi: int = 200,
+        interactive_max_units: float = 4.0,
+        fallback_bytes: int = 1 << 20,
+    ):
+        self.unit_megapixels = unit_megapixels
+        self.field_units = field_units
+        self.text_layer_units = text_layer_units
+        self.pdf_dpi = pdf_dpi
+        self.interactive_max_units = interactive_max_units
+        self.fallback_bytes = fallback_bytes
+
+    def classify(self, units: float) -> str:
+        return "interactive" if units <= self.interactive_max_units else "bulk"
+
+    def _estimate(self, units: float, pages: int, megapixels: float, size_bytes: int, fields: int) -> CostEstimate:
+        units += self.field_units * fields * pages
+        return CostEstimate(units, self.classify(units), pages, megapixels, size_bytes, fields)
+
+    def _page_units(self, megapixels: float) -> float:
+        return max(1.0, megapixels / self.unit_megapixels)
+
+    def image(self, source: Union[str, bytes], fields: Optional[Sequence[str]] = None) -> CostEstimate:
+        """An image file path or content; only the header is read."""
+        size_bytes = len(source) if isinstance(source, bytes) else 0
+        try:
+            with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+                width, height = image.size
+        except Exception:
+            if not size_bytes and isinstance(source, str):
+                try:
+                    with open(source, "rb") as f:
+                        size_bytes = f.seek(0, 2)
+                except OSError:
+                    pass
+            return self._estimate(max(1.0, size_bytes / self.fallback_bytes), 1, 0.0, size_bytes, len(fields or []))
+        megapixels = width * height / 1e6
+        return self._estimate(self._page_units(megapixels), 1, megapixels, size_bytes, len(fields or []))
+
+    def pdf(self, index: Any, pages: Sequence[int], fields: Optional[Sequence[str]] = None) -> CostEstimate:
+        """Selected pages of a PDF from its cached DocumentIndex (unindexed pages count as A4 scans)."""
+        scale = (self.pdf_dpi / 72.0) ** 2 / 1e6
+        units = megapixels = 0.0
+        for number in pages:
+            info = index.page(number) if index is not None else None
+            if info is None:
+                page_mp = 8.27 * 11.69 * self.pdf_dpi ** 2 / 1e6
+                units += self._page_units(page_mp)
+            elif info.has_text_layer:
+                page_mp = info.width * info.height * scale
+                units += self.text_layer_units
+            else:
+                page_mp = info.width * info.height * scale
+                units += self._page_units(page_mp)
+            megapixels += page_mp
+        return self._estimate(units, max(1, len(pages)), megapixels, 0, len(fields or []))
+
+    def combine(self, estimates: Sequence[CostEstimate]) -> CostEstimate:
+        """One request carrying several documents (batch)."""
+        units = sum(e.units for e in estimates)
+        return CostEstimate(
+            units,
+            self.classify(units),
+            sum(e.pages for e in estimates),
+            sum(e.megapixels for e in estimates),
+            sum(e.size_bytes for e in estimates),
+            max((e.fields for e in estimates), default=0),
+        )
+
+
+# ----------------------------------------------------------------------------
+# Admission control
+# ----------------------------------------------------------------------------
+class Ticket:
+    """Capacity held by one admitted request; release() exactly once (safe from any thread)."""
+
+    def __init__(self, controller: "AdmissionController", request_class: str, units: float):
+        self.controller = controller
+        self.request_class = request_class
+        self.units = units
+        self.started = time.perf_counter()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self.controller._release_threadsafe(self)
+
+    def __del__(self):
+        # A streaming response that never started its generator still gives its capacity back
+        if not self._released:
+            self._released = True
+            self.controller._release_threadsafe(self, defer=True)
+
+
+class AdmissionController:
+    """
+    Cost-aware admission in front of the OCR work.
+
+    At most `capacity` units run at once, and at most `class_capacity[c]` units of
+    class c (bulk is held below the total so interactive requests always have
+    room). Waiting requests are admitted interactive first, FIFO within a class;
+    a bulk request never overtakes a waiting interactive one. A request larger
+    than its class budget is charged the whole budget, so it runs alone rather
+    than never.
+
+    A request is rejected (AdmissionRejected, HTTP 429) when `max_queue[c]`
+    requests of its class are already waiting, or after waiting
+    `max_wait_seconds[c]`. Retry-After is derived from the queued and running
+    units and the observed seconds per unit.
+
+    Lives on the event loop; tickets may be released from worker threads.
+    """
+
+    def __init__(
+        self,
+        capacity: float = 16.0,
+        class_capacity: Optional[Dict[str, float]] = None,
+        max_queue: Optional[Dict[str, int]] = None,
+        max_wait_seconds: Optional[Dict[str, float]] = None,
+        cost_model: Optional[CostModel] = None,
+    ):
+        self.capacity = capacity
+        self.class_capacity = {"interactive": capacity, "bulk": capacity * 0.75, **(class_capacity or {})}
+        self.max_queue = {"interactive": 64, "bulk": 8, **(max_queue or {})}
+        self.max_wait_seconds = {"interactive": 30.0, "bulk": 300.0, **(max_wait_seconds or {})}
+        self.cost_model = cost_model or CostModel()
+
+        self.in_flight = 0.0
+        self.class_in_flight = {c: 0.0 for c in REQUEST_CLASSES}
+        self._waiters: Dict[str, Deque[List[Any]]] = {c: deque() for c in REQUEST_CLASSES}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Seconds of wall time per unit for one request, smoothed
+        self._seconds_per_unit = 1.0
+
+        self._in_flight_gauge = metrics.gauge("admission.in_flight_units")
+        self._queued = {c: metrics.gauge(f"admission.queued.{c}") for c in REQUEST_CLASSES}
+        self._admitted = {c: metrics.counter(f"admission.admitted.{c}") for c in REQUEST_CLASSES}
+        self._rejected = {c: metrics.counter(f"admission.rejected.{c}") for c in REQUEST_CLASSES}
+        self._wait_ms = {c: metrics.histogram(f"admission.wait_ms.{c}") for c in REQUEST_CLASSES}
+
+    # ----------------------------
+    # Acquire / release
+    # ----------------------------
+    async def acquire(self, estimate: CostEstimate) -> Ticket:
+        """Wait for capacity; raises AdmissionRejected when the queue is full or the wait times out."""
+        self._loop = asyncio.get_running_loop()
+        request_class = estimate.request_class
+        units = min(estimate.units, self.class_capacity[request_class])
+        start = time.perf_counter()
+
+        if not self._blocked(request_class) and self._fits(request_class, units):
+            return self._start(request_class, units, start)
+
+        queue = self._waiters[request_class]
+        if len(queue) >= self.max_queue[request_class]:
+            self._reject(request_class, f"Too many {request_class} requests queued")
+
+        future = self._loop.create_future()
+        entry = [units, future]
+        queue.append(entry)
+        self._queued[request_class].set(len(queue))
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait_seconds[request_class])
+        except asyncio.TimeoutError:
+            self._forget(request_class, entry)
+            self._reject(request_class, f"Timed out waiting for capacity ({request_class})")
+        except asyncio.CancelledError:
+            # Client went away: give back capacity granted at the same moment
+            if future.done() and not future.cancelled():
+                self._finish(request_class, units, None)
+            self._forget(request_class, entry)
+            raise
+        return self._start(request_class, units, start, granted=True)
+
+    def _blocked(self, request_class: str) -> bool:
+        # Queued requests of this class or a higher-priority one go first
+        for c in REQUEST_CLASSES:
+            if self._waiters[c]:
+                return True
+            if c == request_class:
+                return False
+        return False
+
+    def _fits(self, request_class: str, units: float) -> bool:
+        return (self.in_flight + units <= self.capacity + 1e-9
+                and self.class_in_flight[request_class] + units <= self.class_capacity[request_class] + 1e-9)
+
+    def _start(self, request_class: str, units: float, start: float, granted: bool = False) -> Ticket:
+        if not granted:
+            # Granted waiters were charged by _dispatch
+            self.in_flight += units
+            self.class_in_flight[request_class] += units
+        self._in_flight_gauge.set(self.in_flight)
+        self._admitted[request_class].inc()
+        self._wait_ms[request_class].observe((time.perf_counter() - start) * 1000.0)
+        return Ticket(self, request_class, units)
+
+    def _release_threadsafe(self, ticket: Ticket, defer: bool = False):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self._loop is None or self._loop.is_closed():
+            return
+        if running is self._loop and not defer:
+            self._finish(ticket.request_class, ticket.units, ticket)
+        else:
+            self._loop.call_soon_threadsafe(self._finish, ticket.request_class, ticket.units, ticket)
+
+    def _finish(self, request_class: str, units: float, ticket: Optional[Ticket]):
+        self.in_flight = max(0.0, self.in_flight - units)
+        self.class_in_flight[request_class] = max(0.0, self.class_in_flight[request_class] - units)
+        self._in_flight_gauge.set(self.in_flight)
+        if ticket is not None and units > 0:
+            per_unit = (time.perf_counter() - ticket.started) / units
+            self._seconds_per_unit = 0.8 * self._seconds_per_unit + 0.2 * per_unit
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit waiters that fit now: interactive first, FIFO (no overtaking) within a class."""
+        for request_class in REQUEST_CLASSES:
+            queue = self._waiters[request_class]
+            while queue:
+                units, future = queue[0]
+                if future.done():
+                    queue.popleft()
+                    continue
+                if not self._fits(request_class, units):
+                    break
+                queue.popleft()
+                self.in_flight += units
+                self.class_in_flight[request_class] += units
+                future.set_result(None)
+            self._queued[request_class].set(len(queue))
+            if queue:
+                # Lower classes wait behind this one
+                return
+
+    def _forget(self, request_class: str, entry: List[Any]):
+        queue = self._waiters[request_class]
+        if entry in queue:
+            queue.remove(entry)
+        self._queued[request_class].set(len(queue))
+        self._dispatch()
+
+    def _reject(self, request_class: str, message: str):
+        self._rejected[request_class].inc()
+        retry_after = self.retry_after(request_class)
+        logger.warning(f"Admission rejected: {message} (retry after {retry_after:.0f}s)")
+        raise AdmissionRejected(message, request_class, retry_after)
+
+    def retry_after(self, request_class: str) -> float:
+        """Seconds until the work ahead of a new `request_class` request has likely drained."""
+        ahead = self.in_flight
+        for c in REQUEST_CLASSES:
+            ahead += sum(units for units, _ in self._waiters[c])
+            if c == request_class:
+                break
+        seconds = ahead / max(self.capacity, 1e-9) * self._seconds_per_unit
+        return float(min(300, max(1, math.ceil(seconds))))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_flight_units": round(self.in_flight, 3),
+            "classes": {
+                c: {
+                    "capacity": self.class_capacity[c],
+                    "in_flight_units": round(self.class_in_flight[c], 3),
+                    "queued": len(self._waiters[c]),
+                    "max_queue": self.max_queue[c],
+                    "admitted": self._admitted[c].value,
+                    "rejected": self._rejected[c].value,
+                }
+                for c in REQUEST_CLASSES
+            },
+            "seconds_per_unit": round(self._seconds_per_unit, 4),
+        }
+
+
+__all__ = [
+    "REQUEST_CLASSES",
+    "AdmissionRejected",
+    "CostEstimate",
+    "CostModel",
+    "Ticket",
+    "AdmissionController",
+]
@@ -0,0 +1,383 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.dto.models import ExtractionPageResult
+from app.utils import is_pdf_file
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_MODES = ("extract", "pdf_all")
+JOB_STATES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    file_path TEXT,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pages_total INTEGER,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heartbeat_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_pages (
+    job_id TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, page_number)
+);
+"""
+
+
+def _dump(model: Any) -> Dict[str, Any]:
+    dump = getattr(model, "model_dump", None) or model.dict
+    return dump()
+
+
+# ----------------------------------------------------------------------------
+# JobStore — SQLite-backed durable queue
+# ----------------------------------------------------------------------------
+class JobStore:
+    """
+    Durable job queue and result store in one SQLite file (WAL mode).
+
+    Uploaded documents are moved into `files_dir` and owned by the store until
+    the job finishes. Finished pages of a multi-page job are written to
+    `job_pages` as they complete, so a job interrupted by a restart resumes
+    with the pages it has not done yet. Every call opens its own connection,
+    so the store is safe to share between threads and worker processes.
+    """
+
+    def __init__(self, db_path: str = "jobs/jobs.db", files_dir: Optional[str] = None):
+        self.db_path = db_path
+        self.files_dir = files_dir or os.path.join(os.path.dirname(db_path) or ".", "files")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        os.makedirs(self.files_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        """A short-lived connection; `write` wraps it in one BEGIN IMMEDIATE transaction."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            if write:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+            else:
+                yield conn
+        finally:
+            conn.close()
+
+    # ----------------------------
+    # Submission and lookup
+    # ----------------------------
+    def submit(self, upload_path: str, mode: str, params: Dict[str, Any]) -> str:
+        """Queue a job; takes ownership of `upload_path` (moved into the store)."""
+        job_id = uuid.uuid4().hex
+        file_path = os.path.join(self.files_dir, f"{job_id}_{os.path.basename(upload_path)}")
+        os.replace(upload_path, file_path)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, mode, status, params, file_path, created_at, updated_at)"
+                " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, mode, json.dumps(params), file_path, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str, include_pages: bool = True) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or (row["expires_at"] is not None and row["expires_at"] <= time.time()):
+                return None
+            job = dict(row)
+            job["params"] = json.loads(job["params"])
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            job["pages"] = self.pages(job_id, conn) if include_pages else None
+        return job
+
+    def pages(self, job_id: str, conn: Optional[sqlite3.Connection] = None) -> Dict[str, Any]:
+        if conn is None:
+            with self._connect() as conn:
+                return self.pages(job_id, conn)
+        rows = conn.execute(
+            "SELECT page_number, result FROM job_pages WHERE job_id = ? ORDER BY page_number", (job_id,)
+        ).fetchall()
+        return {str(r["page_number"]): json.loads(r["result"]) for r in rows}
+
+    def done_pages(self, job_id: str) -> List[int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT page_number FROM job_pages WHERE job_id = ?", (job_id,)).fetchall()
+        return [r["page_number"] for r in rows]
+
+    def queued_count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    # ----------------------------
+    # Worker side
+    # ----------------------------
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running and return it."""
+        now = time.time()
+        with self._connect(write=True) as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1,"
+                    " updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (owner, now, now, row["id"]),
+                )
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def set_total(self, job_id: str, pages_total: int):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET pages_total = ?, updated_at = ? WHERE id = ?", (pages_total, time.time(), job_id)
+            )
+
+    def add_page(self, job_id: str, page: ExtractionPageResult):
+        now = time.time()
+        with self._connect(write=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_pages (job_id, page_number, result) VALUES (?, ?, ?)",
+                (job_id, page.page_number, json.dumps(_dump(page))),
+            )
+            conn.execute(
+                "UPDATE jobs SET pages_done = (SELECT COUNT(*) FROM job_pages WHERE job_id = ?),"
+                " updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                (job_id, now, now, job_id),
+            )
+
+    def finish(self, job_id: str, ttl_seconds: float, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> Optional[str]:
+        """Mark a job done (or failed); returns the document path the caller should remove."""
+        now = time.time()
+        with self._connect(write=True) as conn:
+            row = conn.execute("SELECT file_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, file_path = NULL,"
+                " updated_at = ?, expires_at = ? WHERE id = ?",
+                ("failed" if error else "done", json.dumps(result) if result is not None else None,
+                 error, now, now + ttl_seconds, job_id),
+            )
+        return row["file_path"] if row is not None else None
+
+    def heartbeat(self, owner: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?", (time.time(), owner)
+            )
+
+    def requeue_stale(self, stale_seconds: float) -> int:
+        """Running jobs whose worker stopped heartbeating (crash or restart) go back to the queue."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ?"
+                " WHERE status = 'running' AND heartbeat_at < ?",
+                (time.time(), time.time() - stale_seconds),
+            )
+            return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._connect(write=True) as conn:
+            conn.execute(
+                "DELETE FROM job_pages WHERE job_id IN (SELECT id FROM jobs WHERE expires_at <= ?)", (now,)
+            )
+            cursor = conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+        return cursor.rowcount
+
+
+# ----------------------------------------------------------------------------
+# JobRunner — worker threads draining the store
+# ----------------------------------------------------------------------------
+class JobRunner:
+    """
+    Runs queued jobs on `workers` background threads against an ExtractionService.
+
+    A maintenance thread heartbeats this runner's running jobs every
+    `sweep_interval` seconds, requeues running jobs whose heartbeat is older
+    than `stale_seconds` (their process died, e.g. a restart) and purges
+    finished jobs past their TTL. Requeued multi-page jobs only process the
+    pages that were not stored yet.
+    """
+
+    def __init__(
+        self,
+        extraction_service: Any,
+        store: JobStore,
+        workers: int = 1,
+        ttl_seconds: float = 3600.0,
+        stale_seconds: float = 60.0,
+        sweep_interval: float = 5.0,
+        poll_interval: float = 1.0,
+    ):
+        self.extraction_service = extraction_service
+        self.store = store
+        self.workers = max(1, workers)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.sweep_interval = sweep_interval
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self._submitted = metrics.counter("jobs.submitted")
+        self._completed = metrics.counter("jobs.completed")
+        self._failed = metrics.counter("jobs.failed")
+        self._requeued = metrics.counter("jobs.requeued")
+        self._duration_ms = metrics.histogram("jobs.duration_ms")
+        self._running = metrics.gauge("jobs.running")
+
+    # ----------------------------
+    # Lifecycle
+    # ----------------------------
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._sweep()
+        self._threads = [
+            threading.Thread(target=self._work_loop, name=f"jobs.worker.{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._maintenance_loop, name="jobs.maintenance", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop taking new jobs; a job interrupted here is requeued by the next runner."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, upload_path: str, mode: str, params: Dict[str, Any]) -> str:
+        job_id = self.store.submit(upload_path, mode, params)
+        self._submitted.inc()
+        self._wake.set()
+        return job_id
+
+    # ----------------------------
+    # Threads
+    # ----------------------------
+    def _work_loop(self):
+        while not self._stop.is_set():
+            job = self.store.claim(self.owner)
+            if job is None:
+                # Woken by submit(); the timeout picks up jobs queued by other processes
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _maintenance_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self._sweep()
+
+    def _sweep(self):
+        try:
+            self.store.heartbeat(self.owner)
+            requeued = self.store.requeue_stale(self.stale_seconds)
+            if requeued:
+                self._requeued.inc(requeued)
+                logger.info(f"Requeued {requeued} interrupted job(s)")
+                self._wake.set()
+            self.store.purge_expired()
+        except sqlite3.Error as e:
+            logger.error(f"Job maintenance failed: {e}")
+
+    # ----------------------------
+    # Execution
+    # ----------------------------
+    def _run(self, job: Dict[str, Any]):
+        job_id, params, file_path = job["id"], job["params"], job["file_path"]
+        logger.info(f"Running job {job_id} ({job['mode']}, attempt {job['attempts'] + 1})")
+        start = time.perf_counter()
+        self._running.inc()
+        result, error = None, None
+        try:
+            if job["mode"] == "pdf_all":
+                result = self._run_pdf_all(job_id, file_path, params)
+            else:
+                response = self.extraction_service.extract_single_page(
+                    file_path=file_path,
+                    language=params.get("language", "en"),
+                    page_number=params.get("page_number", 1),
+                    custom_fields=params.get("fields"),
+                    endpoint="extract",
+                )
+                result = _dump(response)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            error = str(e) or type(e).__name__
+        finally:
+            self._running.dec()
+
+        document = self.store.finish(job_id, self.ttl_seconds, result=result, error=error)
+        if document and os.path.exists(document):
+            os.remove(document)
+        (self._failed if error else self._completed).inc()
+        self._duration_ms.observe((time.perf_counter() - start) * 1000.0)
+
+    def _run_pdf_all(self, job_id: str, file_path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Process the pages not stored yet; pages are persisted one by one as progress."""
+        if not is_pdf_file(file_path):
+            raise ValueError("pdf_all jobs require a PDF document")
+
+        plan = self.extraction_service.plan_pages(file_path, params.get("pages"), params.get("max_pages"))
+        self.store.set_total(job_id, len(plan.selected))
+
+        done = set(self.store.done_pages(job_id))
+        plan.selected = [p for p in plan.selected if p not in done]
+        pages = self.extraction_service.iter_pages(
+            file_path, params.get("language", "en"), params.get("fields"), plan
+        )
+        for page in pages:
+            self.store.add_page(job_id, page)
+
+        # Pages live in job_pages; the result carries the document-level fields
+        return {
+            "is_pdf": True,
+            "page_count": plan.page_count,
+            "pages_truncated": plan.truncated,
+        }
+
+
+__all__ = ["JOB_MODES", "JOB_STATES", "JobStore", "JobRunner"]
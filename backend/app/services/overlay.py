@@ -0,0 +1,324 @@
+import io
+import os
+import time
+import uuid
+import base64
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.dto.detection_batch import DetectionBatch, LEVELS
+from app.dto.models import Detection
+from app.utils import is_pdf_file
+from app.utils.pdf_utils import PDFUtils
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Fill colors per confidence level (RGBA); outlines use the opaque RGB part
+OVERLAY_COLORS: Dict[str, Tuple[int, int, int, int]] = {
+    "high": (34, 197, 94, 120),
+    "medium": (251, 191, 36, 120),
+    "low": (239, 68, 68, 120),
+    "very_low": (107, 114, 128, 120),
+}
+
+OVERLAY_MODES = ("raster", "vector", "url")
+IMAGE_FORMATS = {"png": ("PNG", "image/png"), "jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+
+def _as_batch(detections: Union[List[Detection], DetectionBatch]) -> DetectionBatch:
+    return detections if isinstance(detections, DetectionBatch) else DetectionBatch.from_detections(detections)
+
+
+def _hex(color: Tuple[int, int, int, int]) -> str:
+    return "#" + "".join(f"{c:02x}" for c in color)
+
+
+class OverlayRenderer:
+    """
+    Draws confidence overlays for one page.
+
+    - vector(): box geometry, level codes and colors only; the client draws them
+    - render(): a raster overlay, downscaled to `max_dimension` *before* drawing
+      (PDF pages are rendered directly at the reduced DPI, JPEGs decoded with
+      draft mode) and encoded as PNG, JPEG or WebP
+    """
+
+    def __init__(self, max_dimension: Optional[int] = None, image_format: str = "png", quality: int = 80):
+        self.max_dimension = max_dimension
+        self.image_format = image_format
+        self.quality = quality
+        self._render_ms = metrics.histogram("overlay.render_ms")
+
+    # ----------------------------
+    # Page geometry
+    # ----------------------------
+    @staticmethod
+    def page_size(file_path: str, page_number: int = 1, dpi: Optional[int] = None) -> Tuple[int, int]:
+        """Size in pixels of the coordinate space the detections live in."""
+        if is_pdf_file(file_path):
+            with PDFUtils.renderer.open(file_path) as doc:
+                width_pt, height_pt = doc.page_size(page_number)
+            scale = (dpi or 200) / 72.0
+            return int(round(width_pt * scale)), int(round(height_pt * scale))
+        with Image.open(file_path) as image:
+            return image.size
+
+    # ----------------------------
+    # Vector mode
+    # ----------------------------
+    def vector(
+        self,
+        detections: Union[List[Detection], DetectionBatch],
+        width: int,
+        height: int,
+    ) -> Dict[str, Any]:
+        batch = _as_batch(detections)
+        return {
+            "width": width,
+            "height": height,
+            "level_names": list(LEVELS),
+            "colors": {level: _hex(color) for level, color in OVERLAY_COLORS.items()},
+            "boxes": np.rint(batch.bboxes).astype(np.int32).ravel().tolist(),
+            "levels": batch.level_codes.tolist(),
+            "scores": np.round(batch.scores, 3).tolist(),
+        }
+
+    # ----------------------------
+    # Raster mode
+    # ----------------------------
+    def _load_page(
+        self, file_path: str, page_number: int, dpi: Optional[int], max_dimension: Optional[int]
+    ) -> Tuple[Image.Image, float]:
+        """Page image and its scale relative to the detection coordinates."""
+        if is_pdf_file(file_path):
+            dpi = dpi or 200
+            render_dpi = dpi
+            if max_dimension:
+                longest = max(self.page_size(file_path, page_number, dpi))
+                render_dpi = min(dpi, max(1, int(dpi * max_dimension / float(longest))))
+            image = PDFUtils.convert_pdf_to_image(file_path, page_number=page_number, dpi=render_dpi)
+            return image.convert("RGB"), render_dpi / float(dpi)
+
+        image = Image.open(file_path)
+        original_width = image.size[0]
+        if max_dimension and max(image.size) > max_dimension:
+            ratio = max_dimension / float(max(image.size))
+            # JPEG: decode at a reduced size straight from the DCT coefficients
+            image.draft("RGB", (int(image.size[0] * ratio), int(image.size[1] * ratio)))
+            image = image.convert("RGB")
+            image.thumbnail((max_dimension, max_dimension), Image.BILINEAR)
+        else:
+            image = image.convert("RGB")
+        return image, image.size[0] / float(original_width)
+
+    def render(
+        self,
+        file_path: str,
+        detections: Union[List[Detection], DetectionBatch],
+        page_number: int = 1,
+        dpi: Optional[int] = None,
+        max_dimension: Optional[int] = None,
+        image_format: Optional[str] = None,
+    ) -> Tuple[bytes, str]:
+        """Returns (encoded image, media type)."""
+        start = time.perf_counter()
+        max_dimension = max_dimension or self.max_dimension
+        image_format = (image_format or self.image_format).lower()
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported overlay format '{image_format}'")
+
+        image, scale = self._load_page(file_path, page_number, dpi, max_dimension)
+        batch = _as_batch(detections)
+
+        # RGBA draw mode blends the translucent fill onto the RGB page: one pass, no RGBA copy
+        draw = ImageDraw.Draw(image, "RGBA")
+        font = ImageFont.load_default()
+        outline = max(1, int(round(3 * scale)))
+        boxes = (batch.bboxes * scale).tolist()
+        for box, level, score in zip(boxes, batch.levels, batch.scores.tolist()):
+            color = OVERLAY_COLORS[level]
+            draw.rectangle(box, fill=color, outline=color[:3], width=outline)
+            draw.text((box[0] + 2, box[1] - 20 * scale), f"{score:.2f}", fill=(255, 255, 255), font=font)
+
+        pil_format, media_type = IMAGE_FORMATS[image_format]
+        options = {} if pil_format == "PNG" else {"quality": self.quality}
+        buf = io.BytesIO()
+        image.save(buf, format=pil_format, **options)
+        self._render_ms.observe((time.perf_counter() - start) * 1000.0)
+        return buf.getvalue(), media_type
+
+    def render_base64(self, *args, **kwargs) -> str:
+        data, _ = self.render(*args, **kwargs)
+        return base64.b64encode(data).decode()
+
+
+class OverlayStore:
+    """
+    In-memory TTL store behind GET /overlay/{id}.
+
+    The store takes ownership of the uploaded file: it is kept on disk until the
+    entry expires or is evicted, so the overlay is only rendered if a client
+    actually fetches it. start() runs a sweeper thread that removes expired
+    entries (and their files) every `sweep_interval` seconds, so uploads do not
+    outlive their TTL when no further overlay traffic arrives.
+
+    Rendered images are cached per (id, format, max_dimension), least recently
+    used first out once they exceed `max_rendered_bytes` in total.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 256,
+        max_rendered_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 30.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_rendered_bytes = max_rendered_bytes
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._rendered: "OrderedDict[Tuple[str, Any, Any], Tuple[bytes, str]]" = OrderedDict()
+        self._rendered_bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._hits = metrics.counter("overlay.store.fetches")
+        self._expired = metrics.counter("overlay.store.expired")
+        self._cached_bytes = metrics.gauge("overlay.store.rendered_bytes")
+
+    # ----------------------------
+    # Lifecycle
+    # ----------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sweep_loop, name="overlay.sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the sweeper and delete every stored upload."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.clear()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Remove expired entries now; returns how many were removed."""
+        with self._lock:
+            evicted = self._evict_locked()
+        self._discard(evicted)
+        return len(evicted)
+
+    # ----------------------------
+    # Entries
+    # ----------------------------
+    def put(
+        self, file_path: str, detections: Union[List[Detection], DetectionBatch],
+        page_number: int = 1, dpi: Optional[int] = None,
+    ) -> str:
+        overlay_id = uuid.uuid4().hex
+        entry = {
+            "id": overlay_id,
+            "file_path": file_path,
+            "batch": _as_batch(detections),
+            "page_number": page_number,
+            "dpi": dpi,
+            "expires": time.monotonic() + self.ttl_seconds,
+        }
+        with self._lock:
+            self._entries[overlay_id] = entry
+            evicted = self._evict_locked()
+        self._discard(evicted)
+        return overlay_id
+
+    def get(self, overlay_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            evicted = self._evict_locked()
+            entry = self._entries.get(overlay_id)
+        self._discard(evicted)
+        if entry is not None:
+            self._hits.inc()
+        return entry
+
+    # ----------------------------
+    # Rendered images
+    # ----------------------------
+    def rendered(
+        self, overlay_id: str, image_format: Optional[str], max_dimension: Optional[int]
+    ) -> Optional[Tuple[bytes, str]]:
+        """Cached (bytes, media type) for this id/format/size, or None."""
+        key = (overlay_id, image_format, max_dimension)
+        with self._lock:
+            cached = self._rendered.get(key)
+            if cached is not None:
+                self._rendered.move_to_end(key)
+        return cached
+
+    def cache_rendered(
+        self, overlay_id: str, image_format: Optional[str], max_dimension: Optional[int], rendered: Tuple[bytes, str]
+    ):
+        key = (overlay_id, image_format, max_dimension)
+        size = len(rendered[0])
+        if size > self.max_rendered_bytes:
+            return
+        with self._lock:
+            if overlay_id not in self._entries:
+                return
+            previous = self._rendered.pop(key, None)
+            if previous is not None:
+                self._rendered_bytes -= len(previous[0])
+            self._rendered[key] = rendered
+            self._rendered_bytes += size
+            while self._rendered_bytes > self.max_rendered_bytes:
+                _, (data, _) = self._rendered.popitem(last=False)
+                self._rendered_bytes -= len(data)
+            self._cached_bytes.set(self._rendered_bytes)
+
+    # ----------------------------
+    # Eviction
+    # ----------------------------
+    def _evict_locked(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        evicted = [self._entries.pop(k) for k, e in list(self._entries.items()) if e["expires"] <= now]
+        self._expired.inc(len(evicted))
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[1])
+        if evicted:
+            gone = {entry["id"] for entry in evicted}
+            for key in [k for k in self._rendered if k[0] in gone]:
+                self._rendered_bytes -= len(self._rendered.pop(key)[0])
+            self._cached_bytes.set(self._rendered_bytes)
+        return evicted
+
+    @staticmethod
+    def _discard(entries: List[Dict[str, Any]]):
+        for entry in entries:
+            try:
+                os.remove(entry["file_path"])
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._rendered.clear()
+            self._rendered_bytes = 0
+            self._cached_bytes.set(0)
+        self._discard(entries)
+
+
+__all__ = ["OVERLAY_COLORS", "OVERLAY_MODES", "IMAGE_FORMATS", "OverlayRenderer", "OverlayStore"]
@@ -0,0 +1,374 @@
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.utils.image_utils import estimate_text_height
+from app.utils.quality_utils import ImageQualityAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------
+# PreprocessingContext — shared state passed through every stage
+# ----------------------------------------------------------------------------
+class PreprocessingContext:
+    """Holds the single numpy buffer that all stages read and write.
+
+    image: HxWx3 RGB or HxW grayscale uint8 array (stages replace or mutate it in place)
+    transform: 3x3 affine matrix mapping original-image coordinates -> processed coordinates
+    timings: per-stage wall time in milliseconds (applicability check included)
+    applied / skipped: stage names in execution order
+    stats: values computed by applicability checks and reused by `apply`
+    """
+
+    THUMBNAIL_SIDE = 512
+
+    def __init__(self, image: np.ndarray, language: str = "*", endpoint: str = "*"):
+        self.image = image
+        self.language = language
+        self.endpoint = endpoint
+        self.original_size = (image.shape[1], image.shape[0])
+        self.transform = np.eye(3, dtype=np.float64)
+        self.timings: Dict[str, float] = {}
+        self.applied: List[str] = []
+        self.skipped: List[str] = []
+        self.stats: Dict[str, Any] = {}
+        self._thumbnail: Optional[np.ndarray] = None
+        self._thumbnail_scale = 1.0
+
+    # ----------------------------
+    # Cheap statistics shared by applicability checks
+    # ----------------------------
+    def thumbnail(self) -> np.ndarray:
+        """Downscaled grayscale copy of the current buffer (cached until the buffer changes)."""
+        if self._thumbnail is None:
+            gray = self.image if self.image.ndim == 2 else cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY)
+            h, w = gray.shape
+            scale = min(1.0, self.THUMBNAIL_SIDE / float(max(h, w)))
+            if scale < 1.0:
+                gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                                  interpolation=cv2.INTER_AREA)
+            self._thumbnail = gray
+            self._thumbnail_scale = scale
+        return self._thumbnail
+
+    @property
+    def thumbnail_scale(self) -> float:
+        self.thumbnail()
+        return self._thumbnail_scale
+
+    def update(self, image: np.ndarray, matrix: Optional[np.ndarray] = None):
+        """Replace the buffer; `matrix` is the 2x3/3x3 affine applied by the stage."""
+        self.image = image
+        self._thumbnail = None
+        if matrix is not None:
+            m = np.eye(3, dtype=np.float64)
+            m[:matrix.shape[0], :] = matrix
+            self.transform = m @ self.transform
+
+    @property
+    def is_identity(self) -> bool:
+        return bool(np.allclose(self.transform, np.eye(3)))
+
+    def to_original(self, points: Any) -> np.ndarray:
+        """Map (..., 2) processed-image coordinates back into original-image coordinates."""
+        pts = np.asarray(points, dtype=np.float64)
+        inverse = np.linalg.inv(self.transform)
+        return pts @ inverse[:2, :2].T + inverse[:2, 2]
+
+    def to_pil(self) -> Image.Image:
+        return Image.fromarray(self.image)
+
+
+# ----------------------------------------------------------------------------
+# PreprocessingStage — base class for pluggable stages
+# ----------------------------------------------------------------------------
+class PreprocessingStage(ABC):
+    """A single preprocessing step.
+
+    `applies` must be cheap (thumbnail statistics only) so stages can be skipped
+    on images that do not need them; `apply` does the real work on ctx.image.
+    """
+
+    name = "stage"
+
+    def applies(self, ctx: PreprocessingContext) -> bool:
+        return True
+
+    @abstractmethod
+    def apply(self, ctx: PreprocessingContext) -> None:
+        raise NotImplementedError
+
+
+class GrayscaleStage(PreprocessingStage):
+    """Collapses RGB to a single channel (PHOCR accepts grayscale input)."""
+
+    name = "grayscale"
+
+    def applies(self, ctx: PreprocessingContext) -> bool:
+        return ctx.image.ndim == 3
+
+    def apply(self, ctx: PreprocessingContext) -> None:
+        ctx.update(cv2.cvtColor(ctx.image, cv2.COLOR_RGB2GRAY))
+
+
+class OrientationStage(PreprocessingStage):
+    """Deskews the page using the quality analyzer's Hough-based skew estimate."""
+
+    name = "orientation"
+
+    def __init__(self, min_angle: float = 0.5, max_angle: float = 30.0):
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self._analyzer = ImageQualityAnalyzer()
+
+    def _angle(self, ctx: PreprocessingContext) -> float:
+        try:
+            return float(self._analyzer.detect_skew_angle(ctx.thumbnail()))
+        except Exception:
+            return 0.0
+
+    def applies(self, ctx: PreprocessingContext) -> bool:
+        ctx.stats["skew_angle"] = self._angle(ctx)
+        return self.min_angle <= abs(ctx.stats["skew_angle"]) <= self.max_angle
+
+    def apply(self, ctx: PreprocessingContext) -> None:
+        angle = ctx.stats.get("skew_angle")
+        if angle is None:
+            angle = self._angle(ctx)
+
+        h, w = ctx.image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+
+        # Expand the canvas so rotated corners are not clipped
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        new_w = int(h * sin + w * cos)
+        new_h = int(h * cos + w * sin)
+        matrix[0, 2] += new_w / 2.0 - w / 2.0
+        matrix[1, 2] += new_h / 2.0 - h / 2.0
+
+        border = 255 if ctx.image.ndim == 2 else (255, 255, 255)
+        rotated = cv2.warpAffine(ctx.image, matrix, (new_w, new_h),
+                                 flags=cv2.INTER_LINEAR, borderValue=border)
+        logger.info(f"Deskew angle: {angle:.2f}")
+        ctx.update(rotated, matrix)
+
+
+class ContrastEnhancementStage(PreprocessingStage):
+    """CLAHE on the luminance channel, only for low-contrast images."""
+
+    name = "contrast"
+
+    def __init__(self, min_std: float = 40.0, clip_limit: float = 2.0, tile_grid: int = 8):
+        self.min_std = min_std
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile_grid, tile_grid))
+
+    def applies(self, ctx: PreprocessingContext) -> bool:
+        return float(ctx.thumbnail().std()) < self.min_std
+
+    def apply(self, ctx: PreprocessingContext) -> None:
+        if ctx.image.ndim == 2:
+            ctx.update(self.clahe.apply(ctx.image))
+            return
+
+        lab = cv2.cvtColor(ctx.image, cv2.COLOR_RGB2LAB)
+        lab[:, :, 0] = self.clahe.apply(lab[:, :, 0])
+        ctx.update(cv2.cvtColor(lab, cv2.COLOR_LAB2RGB))
+
+
+class BorderCropStage(PreprocessingStage):
+    """Crops uniform margins (scanner beds, table backgrounds) as a zero-copy view."""
+
+    name = "crop_borders"
+
+    def __init__(self, tolerance: int = 25, min_margin: float = 0.03, padding: int = 8):
+        self.tolerance = tolerance
+        self.min_margin = min_margin
+        self.padding = padding
+
+    def _content_box(self, ctx: PreprocessingContext):
+        thumb = ctx.thumbnail()
+        edge = np.concatenate([thumb[0, :], thumb[-1, :], thumb[:, 0], thumb[:, -1]])
+        background = np.median(edge)
+        mask = np.abs(thumb.astype(np.int16) - int(background)) > self.tolerance
+
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if rows.size == 0 or cols.size == 0:
+            return None
+
+        th, tw = thumb.shape
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        if max(y0 / th, (th - y1) / th, x0 / tw, (tw - x1) / tw) < self.min_margin:
+            return None
+
+        scale = ctx.thumbnail_scale
+        h, w = ctx.image.shape[:2]
+        return (
+            max(0, int(x0 / scale) - self.padding),
+            max(0, int(y0 / scale) - self.padding),
+            min(w, int(np.ceil(x1 / scale)) + self.padding),
+            min(h, int(np.ceil(y1 / scale)) + self.padding),
+        )
+
+    def applies(self, ctx: PreprocessingContext) -> bool:
+        ctx.stats["content_box"] = self._content_box(ctx)
+        return ctx.stats["content_box"] is not None
+
+    def apply(self, ctx: PreprocessingContext) -> None:
+        box = ctx.stats.get("content_box") or self._content_box(ctx)
+        if box is None:
+            return
+        x0, y0, x1, y1 = box
+        matrix = np.array([[1.0, 0.0, -x0], [0.0, 1.0, -y0]])
+        ctx.update(ctx.image[y0:y1, x0:x1], matrix)
+
+
+class ResolutionNormalizationStage(PreprocessingStage):
+    """Scales the page so glyph height lands inside [min_text_height, max_text_height].
+
+    Text height, not pixel count, drives recognition accuracy: pages whose text is
+    outside the band are scaled to `target_text_height`, 12MP phone photos are
+    shrunk, and the result always stays within `max_pixels` (a memory cap; large
+    pages with fine text are left to tiled OCR rather than downscaled).
+    """
+
+    name = "resize"
+
+    def __init__(
+        self,
+        target_text_height: float = 28.0,
+        min_text_height: float = 12.0,
+        max_text_height: float = 48.0,
+        max_pixels: int = 24_000_000,
+        min_scale: float = 0.25,
+        max_scale: float = 2.5,
+        tolerance: float = 0.1,
+        analysis_side: int = 1600,
+    ):
+        self.target_text_height = target_text_height
+        self.min_text_height = min_text_height
+        self.max_text_height = max_text_height
+        self.max_pixels = max_pixels
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.tolerance = tolerance
+        self.analysis_side = analysis_side
+
+    def _scale(self, ctx: PreprocessingContext) -> float:
+        h, w = ctx.image.shape[:2]
+
+        # Estimate on a bounded-size copy; glyph heights scale back linearly
+        factor = min(1.0, self.analysis_side / float(max(h, w)))
+        sample = ctx.image
+        if factor < 1.0:
+            sample = cv2.resize(sample, (max(1, int(w * factor)), max(1, int(h * factor))),
+                                interpolation=cv2.INTER_AREA)
+        text_height = estimate_text_height(sample) / factor
+        ctx.stats["text_height"] = round(text_height, 2)
+
+        scale = 1.0
+        if 0 < text_height < self.min_text_height or text_height > self.max_text_height:
+            scale = self.target_text_height / text_height
+        scale = min(max(scale, self.min_scale), self.max_scale)
+        return min(scale, (self.max_pixels / float(w * h)) ** 0.5)
+
+    def applies(self, ctx: PreprocessingContext) -> bool:
+        ctx.stats["resize_scale"] = self._scale(ctx)
+        return abs(ctx.stats["resize_scale"] - 1.0) > self.tolerance
+
+    def apply(self, ctx: PreprocessingContext) -> None:
+        scale = ctx.stats.get("resize_scale") or self._scale(ctx)
+        h, w = ctx.image.shape[:2]
+        new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        resized = cv2.resize(ctx.image, (new_w, new_h), interpolation=interpolation)
+
+        # Exact per-axis factors so coordinates map back without rounding drift
+        matrix = np.array([[new_w / float(w), 0.0, 0.0], [0.0, new_h / float(h), 0.0]])
+        ctx.update(resized, matrix)
+
+
+# Stage name -> class, used by declarative pipeline configs
+STAGE_REGISTRY: Dict[str, type] = {
+    GrayscaleStage.name: GrayscaleStage,
+    OrientationStage.name: OrientationStage,
+    ContrastEnhancementStage.name: ContrastEnhancementStage,
+    BorderCropStage.name: BorderCropStage,
+    ResolutionNormalizationStage.name: ResolutionNormalizationStage,
+}
+
+
+def register_stage(stage_cls: type):
+    """Make a custom stage available to declarative configs by its `name`."""
+    STAGE_REGISTRY[stage_cls.name] = stage_cls
+    return stage_cls
+
+
+# ----------------------------------------------------------------------------
+# PreprocessingPipeline — ordered stages over one buffer, with timing
+# ----------------------------------------------------------------------------
+class PreprocessingPipeline:
+    def __init__(self, stages: Sequence[PreprocessingStage]):
+        self.stages = list(stages)
+
+    @classmethod
+    def from_config(cls, config: Sequence[Union[str, Dict[str, Any]]]) -> "PreprocessingPipeline":
+        """Build from names or {"name": ..., **kwargs} dicts, e.g. ["orientation", {"name": "contrast", "min_std": 30}]."""
+        stages = []
+        for entry in config:
+            if isinstance(entry, str):
+                entry = {"name": entry}
+            params = dict(entry)
+            name = params.pop("name")
+            if name not in STAGE_REGISTRY:
+                raise ValueError(f"Unknown preprocessing stage: {name}")
+            stages.append(STAGE_REGISTRY[name](**params))
+        return cls(stages)
+
+    @property
+    def names(self) -> List[str]:
+        return [s.name for s in self.stages]
+
+    def run(self, image: Union[Image.Image, np.ndarray], language: str = "*", endpoint: str = "*") -> PreprocessingContext:
+        if isinstance(image, Image.Image):
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            buffer = np.array(image)
+        else:
+            buffer = image
+
+        ctx = PreprocessingContext(buffer, language, endpoint)
+        for stage in self.stages:
+            start = time.perf_counter()
+            try:
+                if stage.applies(ctx):
+                    stage.apply(ctx)
+                    ctx.applied.append(stage.name)
+                else:
+                    ctx.skipped.append(stage.name)
+            except Exception as e:
+                logger.error(f"Preprocessing stage '{stage.name}' failed: {e}")
+                ctx.skipped.append(stage.name)
+            ctx.timings[stage.name] = round((time.perf_counter() - start) * 1000.0, 3)
+
+        return ctx
+
+
+__all__ = [
+    "PreprocessingContext",
+    "PreprocessingStage",
+    "GrayscaleStage",
+    "OrientationStage",
+    "ContrastEnhancementStage",
+    "BorderCropStage",
+    "ResolutionNormalizationStage",
+    "STAGE_REGISTRY",
+    "register_stage",
+    "PreprocessingPipeline",
+]
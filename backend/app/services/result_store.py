@@ -0,0 +1,449 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Response fields that are not stored (large, and rebuilt on demand from the detections)
+_UNSTORED_FIELDS = ("confidence_overlay", "overlay_vector", "overlay_url")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    id TEXT PRIMARY KEY,
+    document_hash TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    filename TEXT,
+    language TEXT,
+    page_number INTEGER,
+    params TEXT,
+    total_detections INTEGER NOT NULL DEFAULT 0,
+    size_bytes INTEGER NOT NULL,
+    result BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extractions_hash ON extractions (document_hash, created_at);
+CREATE INDEX IF NOT EXISTS extractions_created ON extractions (created_at);
+CREATE INDEX IF NOT EXISTS extractions_accessed ON extractions (accessed_at);
+CREATE TABLE IF NOT EXISTS extraction_text (
+    rowid INTEGER PRIMARY KEY,
+    extraction_id TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extraction_text_id ON extraction_text (extraction_id);
+"""
+
+# External-content FTS5 index over extraction_text, kept in sync by triggers. The trigram
+# tokenizer matches substrings, which also works for CJK text without word boundaries.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS extraction_fts USING fts5(
+    text, content='extraction_text', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS extraction_text_ai AFTER INSERT ON extraction_text BEGIN
+    INSERT INTO extraction_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS extraction_text_ad AFTER DELETE ON extraction_text BEGIN
+    INSERT INTO extraction_fts (extraction_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+"""
+
+# Trigram FTS needs at least this many characters per search term
+_MIN_FTS_TERM = 3
+
+_SUMMARY_COLUMNS = (
+    "id, document_hash, endpoint, filename, language, page_number, params,"
+    " total_detections, size_bytes, created_at, accessed_at"
+)
+
+
+def _dump(model: Any) -> Dict[str, Any]:
+    dump = getattr(model, "model_dump", None) or model.dict
+    return dump()
+
+
+def _page_texts(response: Any) -> List[Tuple[int, str]]:
+    """(page number, text) for every page of an ExtractionResponse."""
+    if response.pages:
+        return [(page.page_number, _text_of(page)) for page in response.pages.values()]
+    page_number = response.processing_info.page_number if response.processing_info else 1
+    return [(page_number, _text_of(response))]
+
+
+def _text_of(result: Any) -> str:
+    batch = result.detection_batch
+    if batch is not None:
+        return batch.full_text()
+    return " ".join(d.text for d in result.detections or [])
+
+
+def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+    summary = dict(row)
+    summary["extraction_id"] = summary.pop("id")
+    summary["params"] = json.loads(summary["params"]) if summary["params"] else None
+    return summary
+
+
+# ----------------------------------------------------------------------------
+# ResultStore — extraction results with indexed lookup and full-text search
+# ----------------------------------------------------------------------------
+class ResultStore:
+    """
+    Durable store of extraction results in one SQLite file (WAL mode).
+
+    Each result is kept as zlib-compressed JSON under an extraction id, indexed
+    by document hash, and its text (one row per page) is indexed with FTS5.
+    The `cache_size` most recently used results are also held decompressed in
+    memory, so repeated lookups of the same id do not touch SQLite; the cache
+    keeps JSON bytes and every get() decodes its own copy.
+
+    Retention: results older than `ttl_seconds` are deleted, then the least
+    recently read ones beyond `max_entries` (0 disables either rule). Reads
+    only note the access time in memory; it is written with the next save or
+    purge, so lookups never take the write lock. The policy is applied from
+    save() at most every `purge_interval` seconds; a purge that removes at
+    least `compact_threshold` results also compacts the store (FTS segment
+    merge, incremental vacuum, WAL truncation).
+
+    Connections are kept per thread, so the store can be shared by the
+    request threadpool.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "results/results.db",
+        max_entries: int = 100_000,
+        ttl_seconds: float = 30 * 86400.0,
+        cache_size: int = 256,
+        purge_interval: float = 60.0,
+        compact_threshold: int = 1000,
+        touch_interval: float = 60.0,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = max(0, cache_size)
+        self.purge_interval = purge_interval
+        self.compact_threshold = compact_threshold
+        self.touch_interval = touch_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._last_purge = time.time()
+
+        self._saved = metrics.counter("results.saved")
+        self._hits = metrics.counter("results.cache_hits")
+        self._misses = metrics.counter("results.cache_misses")
+        self._purged = metrics.counter("results.purged")
+        self._save_ms = metrics.histogram("results.save_ms")
+        self._lookup_ms = metrics.histogram("results.lookup_ms")
+        self._search_ms = metrics.histogram("results.search_ms")
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._conn()
+        # Must precede table creation to take effect on a new database
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5 (or older than 3.34): search falls back to LIKE
+            logger.warning(f"FTS5 trigram index unavailable ({e}); text search will scan")
+            self.fts = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # ----------------------------
+    # Writing
+    # ----------------------------
+    def save(
+        self,
+        response: Any,
+        document_hash: str,
+        endpoint: str,
+        filename: Optional[str] = None,
+        language: Optional[str] = None,
+        page_number: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Store an ExtractionResponse; sets its extraction_id and document_hash and returns the id.
+
+        endpoint: the producing endpoint ("extract", "pdf_all", "batch", ...)
+        language / page_number: the request's options (page_number is None for multi-page results)
+        params: other request options worth keeping (fields, page selection)
+        """
+        start = time.perf_counter()
+        extraction_id = uuid.uuid4().hex
+        response.extraction_id = extraction_id
+        response.document_hash = document_hash
+
+        result = _dump(response)
+        for field in _UNSTORED_FIELDS:
+            result[field] = None
+        data = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        blob = zlib.compress(data, 3)
+
+        now = time.time()
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO extractions (id, document_hash, endpoint, filename, language, page_number,"
+                " params, total_detections, size_bytes, result, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (extraction_id, document_hash, endpoint, filename, language, page_number,
+                 json.dumps(params) if params else None, response.total_detections, len(blob), blob, now, now),
+            )
+            conn.executemany(
+                "INSERT INTO extraction_text (extraction_id, page_number, text) VALUES (?, ?, ?)",
+                [(extraction_id, page, text) for page, text in _page_texts(response) if text],
+            )
+            self._flush_touched(conn)
+        self._remember(extraction_id, data, now)
+        self._saved.inc()
+        self._save_ms.observe((time.perf_counter() - start) * 1000.0)
+
+        if now - self._last_purge >= self.purge_interval:
+            self._last_purge = now
+            try:
+                self.purge()
+            except sqlite3.Error as e:
+                logger.error(f"Result store purge failed: {e}")
+        return extraction_id
+
+    def delete(self, extraction_id: str) -> bool:
+        with self._lock:
+            self._cache.pop(extraction_id, None)
+        with self._write() as conn:
+            return self._delete_ids(conn, [extraction_id]) > 0
+
+    def _delete_ids(self, conn: sqlite3.Connection, ids: Sequence[str]) -> int:
+        deleted = 0
+        for i in range(0, len(ids), 500):
+            chunk = list(ids[i:i + 500])
+            marks = ",".join("?" * len(chunk))
+            conn.execute(f"DELETE FROM extraction_text WHERE extraction_id IN ({marks})", chunk)
+            deleted += conn.execute(f"DELETE FROM extractions WHERE id IN ({marks})", chunk).rowcount
+        return deleted
+
+    # ----------------------------
+    # Lookup
+    # ----------------------------
+    def get(self, extraction_id: str) -> Optional[Dict[str, Any]]:
+        """The stored result (ExtractionResponse fields) or None when unknown or purged."""
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(extraction_id)
+            if cached is not None:
+                self._cache.move_to_end(extraction_id)
+        if cached is not None:
+            self._hits.inc()
+            data, touched_at = cached
+            if now - touched_at >= self.touch_interval:
+                self._touch(extraction_id, now)
+                self._remember(extraction_id, data, now)
+            result = json.loads(data)
+            self._lookup_ms.observe((time.perf_counter() - start) * 1000.0)
+            return result
+
+        self._misses.inc()
+        row = self._conn().execute("SELECT result FROM extractions WHERE id = ?", (extraction_id,)).fetchone()
+        if row is None:
+            return None
+        data = zlib.decompress(row["result"])
+        result = json.loads(data)
+        self._touch(extraction_id, now)
+        self._remember(extraction_id, data, now)
+        self._lookup_ms.observe((time.perf_counter() - start) * 1000.0)
+        return result
+
+    def info(self, extraction_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata of one stored result (no detections)."""
+        row = self._conn().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM extractions WHERE id = ?", (extraction_id,)
+        ).fetchone()
+        return _summary(row) if row is not None else None
+
+    def by_hash(
+        self,
+        document_hash: str,
+        limit: int = 20,
+        language: Optional[str] = None,
+        page_number: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Metadata of the results for a document, newest first (optionally one language/page)."""
+        where, args = ["document_hash = ?"], [document_hash]
+        if language is not None:
+            where.append("language = ?")
+            args.append(language)
+        if page_number is not None:
+            where.append("page_number = ?")
+            args.append(page_number)
+        rows = self._conn().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM extractions WHERE {' AND '.join(where)}"
+            " ORDER BY created_at DESC LIMIT ?",
+            (*args, limit),
+        ).fetchall()
+        return [_summary(r) for r in rows]
+
+    def search(self, query: str, limit: int = 20, document_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Pages whose text contains every whitespace-separated term of `query`.
+
+        Returns extraction_id, document_hash, filename, page_number and a snippet
+        with the matches in [brackets], newest first. (Ranking by bm25 would score
+        every match, which costs tens of ms for terms found in most documents.)
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        start = time.perf_counter()
+        scope, args = "", []
+        if document_hash is not None:
+            scope, args = " AND e.document_hash = ?", [document_hash]
+
+        if self.fts and all(len(t) >= _MIN_FTS_TERM for t in terms):
+            # Each term as a quoted phrase: user input never reaches the FTS query syntax
+            match = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            rows = self._conn().execute(
+                "SELECT t.extraction_id, e.document_hash, e.filename, t.page_number,"
+                " snippet(extraction_fts, 0, '[', ']', '...', 16) AS snippet"
+                " FROM extraction_fts JOIN extraction_text t ON t.rowid = extraction_fts.rowid"
+                " JOIN extractions e ON e.id = t.extraction_id"
+                f" WHERE extraction_fts MATCH ?{scope} ORDER BY extraction_fts.rowid DESC LIMIT ?",
+                (match, *args, limit),
+            ).fetchall()
+            hits = [dict(r) for r in rows]
+        else:
+            # Short terms (or no FTS5): case-insensitive substring scan
+            likes = " AND ".join("t.text LIKE ? ESCAPE '\\'" for _ in terms)
+            patterns = ["%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for t in terms]
+            rows = self._conn().execute(
+                "SELECT t.extraction_id, e.document_hash, e.filename, t.page_number, t.text"
+                " FROM extraction_text t JOIN extractions e ON e.id = t.extraction_id"
+                f" WHERE {likes}{scope} ORDER BY e.created_at DESC LIMIT ?",
+                (*patterns, *args, limit),
+            ).fetchall()
+            hits = [{**{k: r[k] for k in r.keys() if k != "text"}, "snippet": _snippet(r["text"], terms[0])}
+                    for r in rows]
+        self._search_ms.observe((time.perf_counter() - start) * 1000.0)
+        return hits
+
+    def _touch(self, extraction_id: str, now: float):
+        with self._lock:
+            self._touched[extraction_id] = now
+
+    def _flush_touched(self, conn: sqlite3.Connection):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                "UPDATE extractions SET accessed_at = ? WHERE id = ?", [(t, i) for i, t in touched.items()]
+            )
+
+    def _remember(self, extraction_id: str, data: bytes, now: float):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[extraction_id] = (data, now)
+            self._cache.move_to_end(extraction_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ----------------------------
+    # Retention
+    # ----------------------------
+    def purge(self) -> int:
+        """Apply the TTL and max_entries policies; returns the number of results deleted."""
+        deleted = 0
+        with self._write() as conn:
+            self._flush_touched(conn)
+            ids: List[str] = []
+            if self.ttl_seconds > 0:
+                rows = conn.execute(
+                    "SELECT id FROM extractions WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                ).fetchall()
+                ids.extend(r["id"] for r in rows)
+            if self.max_entries > 0:
+                excess = conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0] - len(ids) - self.max_entries
+                if excess > 0:
+                    rows = conn.execute(
+                        "SELECT id FROM extractions WHERE created_at >= ? ORDER BY accessed_at LIMIT ?",
+                        (time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0, excess),
+                    ).fetchall()
+                    ids.extend(r["id"] for r in rows)
+            if ids:
+                deleted = self._delete_ids(conn, ids)
+        if deleted:
+            with self._lock:
+                for extraction_id in ids:
+                    self._cache.pop(extraction_id, None)
+            self._purged.inc(deleted)
+            logger.info(f"Purged {deleted} stored extraction result(s)")
+            if deleted >= self.compact_threshold:
+                self.compact()
+        return deleted
+
+    def compact(self):
+        """Merge FTS segments, return freed pages to the OS and truncate the WAL."""
+        conn = self._conn()
+        if self.fts:
+            conn.execute("INSERT INTO extraction_fts (extraction_fts) VALUES ('optimize')")
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM extractions").fetchone()
+        with self._lock:
+            cached = len(self._cache)
+        return {
+            "results": row[0],
+            "result_bytes": row[1],
+            "file_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            "cached": cached,
+            "fts": self.fts,
+        }
+
+
+def _snippet(text: str, term: str, width: int = 60) -> str:
+    at = text.lower().find(term.lower())
+    if at < 0:
+        return text[:width]
+    begin, end = max(0, at - width // 2), at + len(term) + width // 2
+    return ("..." if begin else "") + text[begin:at] + "[" + text[at:at + len(term)] + "]" + \
+        text[at + len(term):end] + ("..." if end < len(text) else "")
+
+
+__all__ = ["ResultStore"]
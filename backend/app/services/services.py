@@ -1,18 +1,26 @@
-import os
 import io
-import base64
+import os
+import time
 import logging
-from typing import Dict, Any, List, Optional
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
 from PIL import Image
 
 # Utilities (existing functions reused without modification)
 from app.utils import (
     is_pdf_file,
-    convert_pdf_to_image,
-    convert_pdf_to_images,
-    save_image_temporarily,
+    AdaptiveDPIRasterizer,
+    PDFTextLayerExtractor,
+    PDFIndexCache,
+    DocumentIndex,
+    PageSelectionError,
+    parse_page_selection,
 )
-from app.utils.image_utils import deskew_image, process_bounding_box, get_confidence_level, safe_float_conversion
+from app.utils.cancellation import CancellationToken, OperationCancelled, checkpoint
+from app.utils.metrics import metrics
+from app.dto.detection_batch import DetectionBatch
 from app.dto.models import (
     Detection,
     ExtractionProcessingInfo,
@@ -21,23 +29,69 @@ from app.dto.models import (
 )
 from app.llm_integration.llm import QwenFieldMapper
 from app.ocr_modules.modules import BaseExtractionModule, ExtractionModuleFactory
+from app.ocr_modules.script_detection import ScriptClassifier, ScriptDetection
+from app.services.preprocessing import PreprocessingContext, PreprocessingPipeline
+from app.services.templates import DocumentTemplate, TemplateRegistry
+from app.services.overlay import OverlayRenderer
+from app.services.verification import (
+    DEFAULT_THRESHOLDS,
+    FIELD_TYPES,
+    extracted_value,
+    field_scores,
+    infer_field_type,
+    normalize,
+)
 
 logger = logging.getLogger(__name__)
 
+# language value that asks the service to detect the script before OCR
+AUTO_LANGUAGE = "auto"
+
 
 # ----------------------------------------------------------------------------
 # PreprocessingService (SOLID — Single Responsibility)
 # ----------------------------------------------------------------------------
 class PreprocessingService:
-    """Handles image pre-processing such as deskewing and conversions.
-    This service is intentionally small to follow SRP.
+    """Runs a declarative pipeline of preprocessing stages.
+
+    Pipelines are configured per language and endpoint with keys of the form
+    "<language>:<endpoint>", where either side may be "*". Lookup order is
+    lang:endpoint -> lang:* -> *:endpoint -> *:*.
+    This service is intentionally small to follow SRP; the stages live in
+    app.services.preprocessing.
     """
 
-    def preprocess(self, image: Image.Image) -> Image.Image:
+    DEFAULT_PIPELINES: Dict[str, List[Any]] = {"*:*": ["resize"]}
+
+    def __init__(self, pipelines: Optional[Dict[str, Sequence[Any]]] = None):
+        self.pipelines: Dict[str, PreprocessingPipeline] = {}
+        for key, config in (pipelines or self.DEFAULT_PIPELINES).items():
+            self.pipelines[key] = PreprocessingPipeline.from_config(config)
+        self.pipelines.setdefault("*:*", PreprocessingPipeline([]))
+
+    def configure(self, stages: Sequence[Any], language: str = "*", endpoint: str = "*"):
+        self.pipelines[f"{language}:{endpoint}"] = PreprocessingPipeline.from_config(stages)
+
+    def pipeline_for(self, language: str = "*", endpoint: str = "*") -> PreprocessingPipeline:
+        for key in (f"{language}:{endpoint}", f"{language}:*", f"*:{endpoint}", "*:*"):
+            if key in self.pipelines:
+                return self.pipelines[key]
+        return self.pipelines["*:*"]
+
+    def run(
+        self, image: Union[Image.Image, np.ndarray], language: str = "*", endpoint: str = "*"
+    ) -> PreprocessingContext:
+        pipeline = self.pipeline_for(language, endpoint)
+        ctx = pipeline.run(image, language, endpoint)
+        logger.info(
+            f"Preprocessing [{language}:{endpoint}] applied={ctx.applied} "
+            f"skipped={ctx.skipped} timings_ms={ctx.timings}"
+        )
+        return ctx
+
+    def preprocess(self, image: Image.Image, language: str = "*", endpoint: str = "*") -> Image.Image:
         try:
-            corrected_img, angle = deskew_image(image)
-            logger.info(f"Deskew angle: {angle}")
-            return corrected_img
+            return self.run(image, language, endpoint).to_pil()
         except Exception as e:
             logger.error(f"Preprocessing failed: {e}")
             return image
@@ -53,6 +107,47 @@ class QualityService:
         return {"score": 100, "issues": [], "suggestions": []}
 
 
+class PagePlan:
+    """
+    Pages one multi-page request will process.
+
+    index: cached DocumentIndex of the PDF
+    page_count: pages in the document
+    selected: page numbers to process, ascending
+    truncated: max_pages dropped part of the selection
+    """
+
+    def __init__(self, index: DocumentIndex, page_count: int, selected: List[int], truncated: bool = False):
+        self.index = index
+        self.page_count = page_count
+        self.selected = selected
+        self.truncated = truncated
+
+
+class BatchItem:
+    """
+    One document of a batch request, held in memory.
+
+    name: key of its result (file name, or member path inside an archive)
+    data: file content (image or PDF)
+    language / fields / page_number: per-file extraction options
+    """
+
+    def __init__(
+        self,
+        name: str,
+        data: bytes,
+        language: str = "en",
+        fields: Optional[List[str]] = None,
+        page_number: int = 1,
+    ):
+        self.name = name
+        self.data = data
+        self.language = language
+        self.fields = fields
+        self.page_number = page_number
+
+
 # ----------------------------------------------------------------------------
 # ExtractionService — Core Orchestrator for OCR Extraction
 # Follows Strategy Pattern + DIP (depends on abstractions, not implementations)
@@ -64,60 +159,267 @@ class ExtractionService:
         preprocessor: PreprocessingService,
         quality_service: QualityService,
         field_mapper: QwenFieldMapper,
+        rasterizer: Optional[AdaptiveDPIRasterizer] = None,
+        text_layer: Optional[PDFTextLayerExtractor] = None,
+        page_batch_size: int = 4,
+        template_registry: Optional[TemplateRegistry] = None,
+        script_classifier: Optional[ScriptClassifier] = None,
+        overlay_renderer: Optional[OverlayRenderer] = None,
+        pdf_index: Optional[PDFIndexCache] = None,
+        batch_chunk_size: int = 16,
+        mapping_workers: int = 8,
     ):
         self.module_factory = module_factory
         self.preprocessor = preprocessor
         self.quality_service = quality_service
         self.field_mapper = field_mapper
+        self.rasterizer = rasterizer or AdaptiveDPIRasterizer()
+        self.text_layer = text_layer or PDFTextLayerExtractor()
+        self.page_batch_size = max(1, page_batch_size)
+        self.template_registry = template_registry
+        self.script_classifier = script_classifier or ScriptClassifier(module_factory)
+        self.overlay_renderer = overlay_renderer or OverlayRenderer()
+        self.pdf_index = pdf_index or PDFIndexCache()
+        self.batch_chunk_size = max(1, batch_chunk_size)
+        self.mapping_workers = max(1, mapping_workers)
+        # Work saved by cancellation: pages / batch documents never processed
+        self._pages_skipped = metrics.counter("cancellation.pages_skipped")
 
     # ----------------------------
     # Extract SINGLE PAGE
     # ----------------------------
     def extract_single_page(
-        self, file_path: str, language: str, page_number: int, custom_fields: Optional[List[str]]
+        self,
+        file_path: str,
+        language: str,
+        page_number: int,
+        custom_fields: Optional[List[str]],
+        endpoint: str = "extract",
+        cancel: Optional[CancellationToken] = None,
     ) -> ExtractionResponse:
+        """cancel: checked between stages (render, preprocess, OCR, LLM); raises OperationCancelled"""
         logger.info(f"Extracting single page: page={page_number}, lang={language}")
 
         is_pdf = is_pdf_file(file_path)
-        if is_pdf:
-            image = convert_pdf_to_image(file_path, page_number, 200)
-        else:
+        if not is_pdf:
+            checkpoint(cancel, "decode")
             image = Image.open(file_path).convert("RGB")
+            return self._extract_image(image, language, page_number, custom_fields, endpoint=endpoint, cancel=cancel)
+
+        index = self.pdf_index.get(file_path)
+        if index.page_count and index.page(page_number) is None:
+            raise PageSelectionError(f"Page {page_number} is out of range (document has {index.page_count} pages)")
+
+        # Born-digital page: skip rasterization and OCR entirely
+        if self._may_have_text_layer(index, page_number):
+            reader = self.text_layer.open(file_path)
+            response = self._extract_text_layer(reader, language, page_number, custom_fields, cancel)
+            if response is not None:
+                return response
+
+        checkpoint(cancel, "render")
+        image, dpi = self.rasterizer.render_page(file_path, page_number)
+        return self._extract_image(
+            image, language, page_number, custom_fields, endpoint=endpoint, is_pdf=True, dpi=dpi, cancel=cancel
+        )
 
-        # Preprocessing
-        processed_image = self.preprocessor.preprocess(image)
+    @staticmethod
+    def _may_have_text_layer(index: DocumentIndex, page_number: int) -> bool:
+        # A document PyPDF2 could not index is still handed to the text-layer extractor
+        return not index.page_count or index.has_text_layer(page_number)
 
-        # OCR module selection (Strategy)
-        module = self.module_factory.get_module(language)
-        ocr_result = module.extract(processed_image)
-
-        # Parse OCR detections into DTOs
-        detections = []
-        texts = ocr_result.get("txts", [])
-        scores = ocr_result.get("scores", [])
-        boxes = ocr_result.get("boxes", [])
-
-        for i in range(min(len(texts), len(scores), len(boxes))):
-            text_val = str(texts[i])
-            score_val = safe_float_conversion(scores[i])
-            bbox = process_bounding_box(boxes[i])
-            lvl = get_confidence_level(score_val)
-
-            detections.append(
-                Detection(
-                    text=text_val,
-                    confidence=score_val,
-                    bbox=bbox,
-                    polygon=boxes[i],
-                    confidence_level=lvl,
-                )
+    def _extract_text_layer(
+        self,
+        reader: Any,
+        language: str,
+        page_number: int,
+        custom_fields: Optional[List[str]],
+        cancel: Optional[CancellationToken] = None,
+    ) -> Optional[ExtractionResponse]:
+        """Build detections from the PDF text layer; None when the page needs OCR."""
+        checkpoint(cancel, "text_layer")
+        dpi = self.rasterizer.default_dpi
+        fragments = self.text_layer.extract_page(reader, page_number, dpi)
+        if fragments is None:
+            return None
+
+        logger.info(f"Using embedded text layer: page={page_number}, fragments={len(fragments)}")
+        script = None
+        if language == AUTO_LANGUAGE:
+            # The text is already known, so classification is just a character count
+            script = self.script_classifier.classify_texts(f["text"] for f in fragments)
+            language = script.language
+        batch = DetectionBatch.from_fragments(fragments, confidence=1.0)
+        info = ExtractionProcessingInfo(
+            language=language,
+            page_number=page_number,
+            is_pdf=True,
+            custom_fields_used=len(custom_fields or []),
+            dpi=dpi,
+            source="text_layer",
+        )
+        self._annotate_script(info, script)
+        return self._build_response(batch, info, custom_fields, cancel)
+
+    def _extract_image(
+        self,
+        image: Image.Image,
+        language: str,
+        page_number: int,
+        custom_fields: Optional[List[str]],
+        endpoint: str = "extract",
+        is_pdf: bool = False,
+        dpi: Optional[int] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> ExtractionResponse:
+        checkpoint(cancel, "preprocess")
+        start = time.perf_counter()
+
+        # Known layout: OCR only the field regions and skip the LLM
+        if self.template_registry is not None:
+            auto = language == AUTO_LANGUAGE
+            matched = self.template_registry.match(
+                image, None if auto else language, custom_fields, require_language=auto
             )
+            if matched is not None:
+                template, score = matched
+                response = self._extract_template(
+                    image, template, score, language, page_number, custom_fields,
+                    is_pdf=is_pdf, dpi=dpi, cancel=cancel,
+                )
+                TemplateRegistry.record_latency(template.name, (time.perf_counter() - start) * 1000.0)
+                return response
+
+        prep, processed_image, stage_timings = self._preprocess(image, language, endpoint)
+
+        script = None
+        ocr_result = None
+        if language == AUTO_LANGUAGE:
+            script = self.script_classifier.detect(processed_image)
+            language, ocr_result = script.language, script.ocr_result
+
+        # OCR module selection (Strategy); skipped when the classifier's probe already is the page's OCR
+        if ocr_result is None:
+            checkpoint(cancel, "ocr")
+            module = self.module_factory.get_module(language)
+            ocr_result = module.extract(processed_image)
+
+        response = self._finish_ocr(
+            prep, stage_timings, ocr_result, language, page_number, custom_fields,
+            is_pdf=is_pdf, dpi=dpi, script=script, cancel=cancel,
+        )
+        if self.template_registry is not None:
+            TemplateRegistry.record_latency(None, (time.perf_counter() - start) * 1000.0)
+        return response
 
-        # Full text for LLM field mapping
-        full_text = " ".join([d.text for d in detections])
+    def _extract_template(
+        self,
+        image: Image.Image,
+        template: DocumentTemplate,
+        score: float,
+        language: str,
+        page_number: int,
+        custom_fields: Optional[List[str]],
+        is_pdf: bool = False,
+        dpi: Optional[int] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> ExtractionResponse:
+        """
+        OCR the template's field regions as one batch and fill mapped_fields directly.
+
+        With language="auto" the template's own language decides the module (only
+        templates that pin one match in auto mode) and is reported as the detected script.
+        """
+        logger.info(f"Template match: {template.name} (score={score:.3f})")
+        script = None
+        if language == AUTO_LANGUAGE and template.language:
+            language = template.language
+            names = {code: name for name, code in ScriptClassifier.SCRIPT_LANGUAGES.items()}
+            script = ScriptDetection(language, names.get(language, language), {}, 0.0)
+        else:
+            language = template.language or language
+        array = np.asarray(image)
+        h, w = array.shape[:2]
+        regions = template.regions(w, h)
+
+        # Output keys follow the caller's spelling of the requested fields
+        by_lower = {name.lower(): name for name in regions}
+        wanted = [(f, by_lower[f.lower()]) for f in custom_fields] if custom_fields else [(n, n) for n in regions]
+
+        crops = []
+        for _, name in wanted:
+            x1, y1, x2, y2 = regions[name]
+            crops.append(array[y1:y2, x1:x2])
+
+        checkpoint(cancel, "ocr")
+        module = self.module_factory.get_module(language)
+        ocr_start = time.perf_counter()
+        results = module.extract_many(crops)
+        ocr_elapsed = time.perf_counter() - ocr_start
+
+        batches: List[DetectionBatch] = []
+        mapped_fields: Dict[str, Any] = {}
+        for (key, name), result in zip(wanted, results):
+            x1, y1, _, _ = regions[name]
+            region = DetectionBatch.from_ocr_result(result).offset(x1, y1).reading_order()
+            mapped_fields[key] = region.full_text().strip()
+            batches.append(region)
+        batch = DetectionBatch.concatenate(batches)
+
+        info = ExtractionProcessingInfo(
+            language=language,
+            elapsed_time=ocr_elapsed,
+            page_number=page_number,
+            is_pdf=is_pdf,
+            custom_fields_used=len(custom_fields or []),
+            dpi=dpi,
+            source="template",
+            template=template.name,
+        )
+        self._annotate_script(info, script)
+        return ExtractionResponse(
+            mapped_fields=mapped_fields,
+            detections=batch.to_detections(),
+            total_detections=len(batch),
+            has_detection_data=True,
+            processing_info=info,
+            is_pdf=is_pdf,
+        ).attach_batch(batch)
 
-        # Call LLM mapper
-        mapped_fields = self.field_mapper.map_fields(full_text, custom_fields)
+    def _preprocess(self, image: Image.Image, language: str, endpoint: str):
+        """Returns (PreprocessingContext or None, buffer to OCR, stage timings)."""
+        # Preprocessing (stages operate on one shared numpy buffer)
+        try:
+            prep = self.preprocessor.run(image, language, endpoint)
+            return prep, prep.image, prep.timings
+        except Exception as e:
+            logger.error(f"Preprocessing failed: {e}")
+            return None, image, {}
+
+    def _finish_ocr(
+        self,
+        prep: Optional[PreprocessingContext],
+        stage_timings: Dict[str, float],
+        ocr_result: Dict[str, Any],
+        language: str,
+        page_number: int,
+        custom_fields: Optional[List[str]],
+        is_pdf: bool = False,
+        dpi: Optional[int] = None,
+        script: Optional[ScriptDetection] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> ExtractionResponse:
+        resize_scale = prep.stats.get("resize_scale", 1.0) if prep and "resize" in prep.applied else 1.0
+
+        # Engine output stays columnar (NumPy) until the response is built
+        batch = DetectionBatch.from_ocr_result(ocr_result)
+
+        # Map geometry back into original-image coordinates (resize/crop/deskew)
+        if prep is not None and not prep.is_identity and len(batch):
+            try:
+                batch = batch.with_polygons(prep.to_original(batch.polygons))
+            except Exception as e:
+                logger.error(f"Failed to remap detection boxes: {e}")
 
         # Build processing info
         info = ExtractionProcessingInfo(
@@ -126,92 +428,381 @@ class ExtractionService:
             page_number=page_number,
             is_pdf=is_pdf,
             custom_fields_used=len(custom_fields or []),
+            stage_timings=stage_timings,
+            resize_scale=resize_scale,
+            dpi=dpi,
+            source="ocr",
         )
+        self._annotate_script(info, script)
+        return self._build_response(batch, info, custom_fields, cancel)
+
+    @staticmethod
+    def _annotate_script(info: ExtractionProcessingInfo, script: Optional[ScriptDetection]):
+        if script is not None:
+            info.detected_script = script.script
+            info.script_detection_ms = round(script.elapsed_ms, 3)
+
+    def _build_response(
+        self,
+        batch: DetectionBatch,
+        info: ExtractionProcessingInfo,
+        custom_fields: Optional[List[str]],
+        cancel: Optional[CancellationToken] = None,
+    ) -> ExtractionResponse:
+        # Full text for LLM field mapping
+        full_text = batch.full_text()
 
-        # Final response
+        # Call LLM mapper (a cancelled request stops waiting on it)
+        mapped_fields = self.field_mapper.map_fields(full_text, custom_fields, cancel=cancel)
+
+        # Final response: the only place Detection DTOs are materialized
         return ExtractionResponse(
             mapped_fields=mapped_fields,
-            detections=detections,
-            total_detections=len(detections),
+            detections=batch.to_detections(),
+            total_detections=len(batch),
             has_detection_data=True,
             processing_info=info,
-            is_pdf=is_pdf,
-        )
+            is_pdf=info.is_pdf,
+        ).attach_batch(batch)
 
     # ----------------------------
     # Extract MULTIPAGE PDF
     # ----------------------------
+    def plan_pages(
+        self, file_path: str, pages: Optional[str] = None, max_pages: Optional[int] = None
+    ) -> PagePlan:
+        """
+        Resolve the page selection without processing anything (raises PageSelectionError).
+
+        pages: page selection such as "1-3,7" (all pages when empty)
+        max_pages: process at most this many of the selected pages
+        """
+        # Cached per document hash: page count and text-layer flags without parsing page content
+        index = self.pdf_index.get(file_path)
+        page_count = index.page_count
+        if not page_count:
+            # PyPDF2 could not index it; the renderer may still open it
+            with self.rasterizer.open(file_path) as doc:
+                page_count = doc.page_count
+        candidates = parse_page_selection(pages, page_count)
+        selected = parse_page_selection(pages, page_count, max_pages)
+        return PagePlan(index, page_count, selected, truncated=len(selected) < len(candidates))
+
+    def iter_pages(
+        self,
+        file_path: str,
+        language: str,
+        custom_fields: Optional[List[str]],
+        plan: PagePlan,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Iterator[ExtractionPageResult]:
+        """
+        Yield each page of `plan` as soon as it is finished (OCR and field mapping).
+
+        Text-layer pages come first, then OCR pages in order as each batch completes.
+        Closing the generator stops work at the next page boundary; so does
+        cancelling `cancel` (OperationCancelled), which also stops waiting on the LLM.
+        """
+        yielded = 0
+        try:
+            # Text-layer pages first; only image-only pages are rasterized and OCR'd
+            text_pages = [p for p in plan.selected if self._may_have_text_layer(plan.index, p)]
+            reader = self.text_layer.open(file_path) if text_pages else None
+            done = set()
+            for page_num in text_pages:
+                page_res = self._extract_text_layer(reader, language, page_num, custom_fields, cancel)
+                if page_res is not None:
+                    done.add(page_num)
+                    yielded += 1
+                    yield self._page_result(page_num, page_res)
+
+            todo = [p for p in plan.selected if p not in done]
+            if not todo:
+                return
+
+            # One parsed document for every page of this request
+            with self.rasterizer.open(file_path) as doc:
+                # Preprocessing stays keyed on the requested language so every page gets the same pipeline
+                requested = language
+                script: Optional[ScriptDetection] = None
+
+                # Pages are OCR'd in small groups so the scheduler can batch them
+                for start in range(0, len(todo), self.page_batch_size):
+                    prepared = []
+                    for page_num in todo[start:start + self.page_batch_size]:
+                        checkpoint(cancel, "render")
+                        image, dpi = self.rasterizer.render_page(doc, page_num)
+                        prepared.append((page_num, dpi, self._preprocess(image, requested, "pdf_all")))
+                    buffers = [pre[1] for _, _, pre in prepared]
+
+                    # "auto": classify the first OCR page once and use that module for the whole document
+                    ocr_results: Dict[int, Dict[str, Any]] = {}
+                    if language == AUTO_LANGUAGE:
+                        script = self.script_classifier.detect(buffers[0])
+                        language = script.language
+                        if script.ocr_result is not None:
+                            ocr_results[0] = script.ocr_result
+
+                    checkpoint(cancel, "ocr")
+                    module = self.module_factory.get_module(language)
+                    pending = [i for i in range(len(buffers)) if i not in ocr_results]
+                    ocr_results.update(zip(pending, module.extract_many([buffers[i] for i in pending])))
+
+                    for i, (page_num, dpi, (prep, _, timings)) in enumerate(prepared):
+                        page_res = self._finish_ocr(
+                            prep, timings, ocr_results[i], language, page_num, custom_fields,
+                            is_pdf=True, dpi=dpi, script=script, cancel=cancel,
+                        )
+                        yielded += 1
+                        yield self._page_result(page_num, page_res)
+                        if script is not None and script.elapsed_ms:
+                            # Later pages inherit the decision at no cost
+                            script = ScriptDetection(script.language, script.script, script.counts, 0.0)
+        except OperationCancelled:
+            self._pages_skipped.inc(len(plan.selected) - yielded)
+            raise
+
     def extract_all_pages(
-        self, file_path: str, language: str, custom_fields: Optional[List[str]]
+        self,
+        file_path: str,
+        language: str,
+        custom_fields: Optional[List[str]],
+        pages: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        cancel: Optional[CancellationToken] = None,
     ) -> ExtractionResponse:
-        images = convert_pdf_to_images(file_path, dpi=200)
-        pages: Dict[str, ExtractionPageResult] = {}
-
-        for page_num, image in enumerate(images, start=1):
-            temp = save_image_temporarily(image, suffix='.png')
-            page_res = self.extract_single_page(
-                temp, language, page_num, custom_fields
-            )
-
-            pages[str(page_num)] = ExtractionPageResult(
-                page_number=page_num,
-                text="" if not page_res.mapped_fields else None,
-                detections=page_res.detections,
-                mapped_fields=page_res.mapped_fields,
-                processing_info=page_res.processing_info,
-            )
-
-            os.remove(temp)
-
+        """
+        pages: page selection such as "1-3,7" (all pages when empty)
+        max_pages: process at most this many of the selected pages
+        cancel: checked at every page and stage boundary (raises OperationCancelled)
+        """
+        plan = self.plan_pages(file_path, pages, max_pages)
+        results = {
+            page.page_number: page for page in self.iter_pages(file_path, language, custom_fields, plan, cancel)
+        }
         return ExtractionResponse(
-            pages=pages,
+            pages={str(page_num): results[page_num] for page_num in sorted(results)},
             is_pdf=True,
+            page_count=plan.page_count,
+            pages_truncated=plan.truncated,
         )
 
+    # ----------------------------
+    # Extract a BATCH of documents
+    # ----------------------------
+    def extract_batch(
+        self, items: Sequence[BatchItem], cancel: Optional[CancellationToken] = None
+    ) -> Iterator[Tuple[str, Union[ExtractionResponse, Exception]]]:
+        """
+        Yield (name, response or exception) for every item, in completion order.
+
+        Items are processed in chunks of `batch_chunk_size`: images are decoded
+        from memory and preprocessed in parallel, OCR'd with one extract_many()
+        per language so the scheduler batches across documents, and field
+        mapping runs on `mapping_workers` threads. The LLM calls of one chunk
+        overlap the OCR of the next. PDFs go through extract_single_page on a
+        temporary file.
+
+        cancel: checked before every chunk; once it fires, running mappings stop
+        waiting on the LLM and OperationCancelled is raised after the last result.
+        """
+        with ThreadPoolExecutor(max_workers=self.mapping_workers) as mapper, \
+                ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as preparer:
+            previous: Dict[Future, str] = {}
+            for start in range(0, len(items), self.batch_chunk_size):
+                if cancel is not None and cancel.cancelled:
+                    self._pages_skipped.inc(len(items) - start)
+                    break
+                current = self._ocr_chunk(items[start:start + self.batch_chunk_size], mapper, preparer, cancel)
+                yield from self._collect(previous)
+                previous = current
+            yield from self._collect(previous)
+        checkpoint(cancel, "batch")
+
+    @staticmethod
+    def _collect(futures: Dict[Future, str]) -> Iterator[Tuple[str, Union[ExtractionResponse, Exception]]]:
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], error if error is not None else future.result()
+
+    def _ocr_chunk(
+        self,
+        chunk: Sequence[BatchItem],
+        mapper: ThreadPoolExecutor,
+        preparer: ThreadPoolExecutor,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Dict[Future, str]:
+        """OCR one chunk; returns the mapping futures (name per future) still running on `mapper`."""
+        futures: Dict[Future, str] = {}
+
+        def failed(item: BatchItem, error: Exception):
+            future: Future = Future()
+            future.set_exception(error)
+            futures[future] = item.name
+
+        def prepare(item: BatchItem):
+            try:
+                image = Image.open(io.BytesIO(item.data)).convert("RGB")
+            except Exception:
+                raise ValueError(f"Could not decode image '{item.name}'")
+            if self.template_registry is not None:
+                auto = item.language == AUTO_LANGUAGE
+                matched = self.template_registry.match(image, None if auto else item.language, item.fields, auto)
+                if matched is not None:
+                    return "template", (image, matched)
+            prep, buffer, timings = self._preprocess(image, item.language, "extract")
+            script = self.script_classifier.detect(buffer) if item.language == AUTO_LANGUAGE else None
+            return "ocr", (prep, buffer, timings, script)
+
+        images = [item for item in chunk if not is_pdf_file(item.name)]
+        for item in chunk:
+            if is_pdf_file(item.name):
+                futures[mapper.submit(self._extract_pdf_bytes, item, cancel)] = item.name
+
+        # Group by OCR language so each module gets one extract_many() call
+        groups: Dict[str, List[Tuple[BatchItem, Tuple]]] = {}
+        prepared = [preparer.submit(prepare, item) for item in images]
+        for item, future in zip(images, prepared):
+            try:
+                kind, value = future.result()
+            except Exception as e:
+                failed(item, e)
+                continue
+            if kind == "template":
+                image, (template, score) = value
+                futures[mapper.submit(
+                    self._extract_template, image, template, score, item.language, item.page_number, item.fields,
+                    cancel=cancel,
+                )] = item.name
+                continue
+            script = value[3]
+            groups.setdefault(script.language if script else item.language, []).append((item, value))
+
+        for language, members in groups.items():
+            # Probe results that already are the page's OCR are not run again
+            ocr_results: Dict[int, Dict[str, Any]] = {
+                i: value[3].ocr_result for i, (_, value) in enumerate(members)
+                if value[3] is not None and value[3].ocr_result is not None
+            }
+            pending = [i for i in range(len(members)) if i not in ocr_results]
+            try:
+                module = self.module_factory.get_module(language)
+                ocr_results.update(zip(pending, module.extract_many([members[i][1][1] for i in pending])))
+            except Exception as e:
+                logger.error(f"Batch OCR failed for language={language}: {e}")
+                for item, _ in members:
+                    failed(item, e)
+                continue
+
+            for i, (item, (prep, _, timings, script)) in enumerate(members):
+                futures[mapper.submit(
+                    self._finish_ocr, prep, timings, ocr_results[i], language, item.page_number, item.fields,
+                    script=script, cancel=cancel,
+                )] = item.name
+        return futures
+
+    def _extract_pdf_bytes(self, item: BatchItem, cancel: Optional[CancellationToken] = None) -> ExtractionResponse:
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(item.data)
+            return self.extract_single_page(path, item.language, item.page_number, item.fields, cancel=cancel)
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def _page_result(page_num: int, page_res: ExtractionResponse) -> ExtractionPageResult:
+        return ExtractionPageResult(
+            page_number=page_num,
+            text="" if not page_res.mapped_fields else None,
+            detections=page_res.detections,
+            mapped_fields=page_res.mapped_fields,
+            processing_info=page_res.processing_info,
+        ).attach_batch(page_res.detection_batch)
+
+    # ----------------------------
+    # Re-map stored detections (LLM only)
+    # ----------------------------
+    def remap(
+        self,
+        stored: ExtractionResponse,
+        custom_fields: Optional[List[str]],
+        cancel: Optional[CancellationToken] = None,
+    ) -> ExtractionResponse:
+        """
+        Map `custom_fields` again from a stored result's detections.
+
+        The prompt text is rebuilt exactly as extraction builds it, so nothing is
+        rasterized or OCR'd. Multi-page results are mapped per page, on up to
+        `mapping_workers` threads. Returns `stored` with the new mapped_fields
+        (extraction_id cleared: it is a new result).
+        """
+        def remap_one(result: Union[ExtractionResponse, ExtractionPageResult]):
+            result.mapped_fields = self.field_mapper.map_fields(
+                " ".join(d.text for d in result.detections), custom_fields, cancel=cancel
+            )
+            if result.processing_info is not None:
+                result.processing_info.custom_fields_used = len(custom_fields or [])
+
+        if stored.pages:
+            pages = list(stored.pages.values())
+            with ThreadPoolExecutor(max_workers=max(1, min(self.mapping_workers, len(pages)))) as executor:
+                list(executor.map(remap_one, pages))
+            for page in pages:
+                page.text = "" if not page.mapped_fields else None
+        else:
+            remap_one(stored)
+        stored.extraction_id = None
+        return stored
+
     # ----------------------------
     # Build overlay (preserves your original functionality)
     # ----------------------------
     def build_confidence_overlay(
-        self, file_path: str, detections: List[Detection]
+        self,
+        file_path: str,
+        detections: Union[List[Detection], DetectionBatch],
+        page_number: int = 1,
+        dpi: Optional[int] = None,
+        max_dimension: Optional[int] = None,
+        image_format: Optional[str] = None,
     ) -> Optional[str]:
+        """Raster overlay as base64; PDF pages are drawn at the DPI the detections were produced at."""
         try:
-            if is_pdf_file(file_path):
-                image = convert_pdf_to_image(file_path, page_number=1, dpi=200)
-            else:
-                image = Image.open(file_path).convert("RGB")
-
-            import PIL.ImageDraw as ImageDraw
-            import PIL.ImageFont as ImageFont
-            overlay = image.copy().convert("RGBA")
-            draw = ImageDraw.Draw(overlay)
-
-            colors = {
-                "high": (34, 197, 94, 120),
-                "medium": (251, 191, 36, 120),
-                "low": (239, 68, 68, 120),
-                "very_low": (107, 114, 128, 120),
-            }
-
-            font = ImageFont.load_default()
-
-            for d in detections:
-                bbox = d.bbox
-                color = colors[d.confidence_level]
-                draw.rectangle(
-                    [bbox["x1"], bbox["y1"], bbox["x2"], bbox["y2"]],
-                    outline=color[:3], width=3
-                )
-                draw.rectangle(
-                    [bbox["x1"], bbox["y1"], bbox["x2"], bbox["y2"]], fill=color
-                )
-                draw.text((bbox["x1"] + 2, bbox["y1"] - 20), f"{d.confidence:.2f}", fill=(255,255,255), font=font)
+            return self.overlay_renderer.render_base64(
+                file_path, detections, page_number, dpi, max_dimension=max_dimension, image_format=image_format
+            )
+        except Exception as e:
+            logger.error(f"Error building overlay: {e}")
+            return None
 
-            buf = io.BytesIO()
-            overlay.convert("RGB").save(buf, format='PNG')
-            return base64.b64encode(buf.getvalue()).decode()
+    def render_overlay(
+        self,
+        file_path: str,
+        detections: Union[List[Detection], DetectionBatch],
+        page_number: int = 1,
+        dpi: Optional[int] = None,
+        max_dimension: Optional[int] = None,
+        image_format: Optional[str] = None,
+    ) -> Tuple[bytes, str]:
+        """Raster overlay as (encoded bytes, media type)."""
+        return self.overlay_renderer.render(
+            file_path, detections, page_number, dpi, max_dimension=max_dimension, image_format=image_format
+        )
 
+    def build_vector_overlay(
+        self,
+        file_path: str,
+        detections: Union[List[Detection], DetectionBatch],
+        page_number: int = 1,
+        dpi: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Box geometry, level codes and colors for client-side drawing."""
+        try:
+            width, height = self.overlay_renderer.page_size(file_path, page_number, dpi)
+            return self.overlay_renderer.vector(detections, width, height)
         except Exception as e:
-            logger.error(f"Error building overlay: {e}")
+            logger.error(f"Error building vector overlay: {e}")
             return None
 
 
@@ -219,32 +810,114 @@ class ExtractionService:
 # VerificationService
 # ----------------------------------------------------------------------------
 class VerificationService:
-    """Compares submitted fields with OCR-extracted fields (LLM + heuristics)."""
+    """Compares submitted fields with OCR-extracted fields after type-aware normalization.
+
+    Every field has a type (text, id, date or phone; inferred from its name
+    unless given) that selects its normalization, and a threshold on the
+    similarity of the normalized values (1 - edit distance / longer length).
+    verify_bulk() scores many submitted records against one extraction with
+    one vectorized edit-distance pass per field.
+
+    thresholds: per-type defaults overriding DEFAULT_THRESHOLDS
+    day_first: read numeric dates as day/month/year (month/day/year when False)
+    """
+
+    def __init__(self, thresholds: Optional[Dict[str, float]] = None, day_first: bool = True):
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.day_first = day_first
 
     def verify(
         self,
         submitted_data: Dict[str, Any],
         extracted_fields: Dict[str, Any],
+        thresholds: Optional[Dict[str, float]] = None,
+        field_types: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
-        try:
-            verified = {}
-            for key, sub_value in submitted_data.items():
-                extracted = extracted_fields.get(key, {})
-                verified[key] = {
-                    "submitted": sub_value,
-                    "extracted": extracted.get("value"),
-                    "confidence": extracted.get("confidence"),
-                    "match": str(sub_value).lower() == str(extracted.get("value", "")).lower(),
-                }
-            return verified
-        except Exception as e:
-            logger.error(f"Verification failed: {e}")
-            return {"error": str(e)}
+        """
+        Per submitted field: submitted/extracted values, confidence, score, threshold, type and match.
+
+        Raises ValueError for an unknown field type, like verify_bulk().
+        """
+        bulk = self.verify_bulk([submitted_data], extracted_fields, list(submitted_data), thresholds, field_types)
+        verified = {}
+        for key, sub_value in submitted_data.items():
+            field = bulk["fields"][key]
+            verified[key] = {
+                "submitted": sub_value,
+                "extracted": field["extracted"],
+                "confidence": field["confidence"],
+                "match": field["matches"][0],
+                "score": field["scores"][0],
+                "threshold": field["threshold"],
+                "type": field["type"],
+            }
+        return verified
+
+    def verify_bulk(
+        self,
+        records: Sequence[Dict[str, Any]],
+        extracted_fields: Dict[str, Any],
+        fields: Optional[Sequence[str]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        field_types: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Score every record against the extracted fields.
+
+        fields: fields to check (default: every key found in the records)
+        thresholds / field_types: per-field overrides by field name
+        Returns {"fields": {name: {type, threshold, extracted, normalized, confidence,
+        scores, matches}}, "record_matches", "matched_records", "total_records"};
+        scores and matches hold one entry per record, in order. A field missing
+        from a record (or from the extraction) scores 0.
+        """
+        thresholds = thresholds or {}
+        field_types = field_types or {}
+        if fields is None:
+            fields = list(dict.fromkeys(key for record in records for key in record))
+        # Mapper output keys may differ in case from the submitted ones
+        by_lower = {str(key).lower(): key for key in extracted_fields}
+
+        results: Dict[str, Any] = {}
+        record_matches = np.ones(len(records), dtype=bool)
+        for name in fields:
+            field_type = field_types.get(name) or infer_field_type(name)
+            if field_type not in FIELD_TYPES:
+                raise ValueError(f"Unknown field type '{field_type}' for '{name}' (use one of {', '.join(FIELD_TYPES)})")
+            threshold = float(thresholds.get(name, self.thresholds[field_type]))
+
+            key = name if name in extracted_fields else by_lower.get(str(name).lower())
+            value, confidence = extracted_value(extracted_fields.get(key) if key is not None else None)
+            expected = normalize(value, field_type, self.day_first)
+            submitted = [
+                normalize(None if record.get(name) is None else str(record.get(name)), field_type, self.day_first)
+                for record in records
+            ]
+            scores = field_scores(field_type, expected, submitted)
+            matches = scores >= threshold
+            record_matches &= matches
+            results[name] = {
+                "type": field_type,
+                "threshold": threshold,
+                "extracted": value,
+                "normalized": expected,
+                "confidence": confidence,
+                "scores": np.round(scores, 4).tolist(),
+                "matches": matches.tolist(),
+            }
+        return {
+            "fields": results,
+            "record_matches": record_matches.tolist(),
+            "matched_records": int(record_matches.sum()),
+            "total_records": len(records),
+        }
 
 
 __all__ = [
     "PreprocessingService",
     "QualityService",
     "ExtractionService",
+    "PagePlan",
+    "BatchItem",
     "VerificationService",
 ]
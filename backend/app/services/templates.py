@@ -0,0 +1,202 @@
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_SIZE = 32
+
+
+def layout_fingerprint(image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+    """
+    Cheap layout signature: a 32x32 grayscale thumbnail, zero-mean and unit-norm.
+
+    Two pages with the same layout (card/form design) have a high cosine
+    similarity regardless of the personal data printed on them.
+    """
+    array = np.asarray(image)
+    gray = array if array.ndim == 2 else cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+    thumb = cv2.resize(gray, (FINGERPRINT_SIZE, FINGERPRINT_SIZE), interpolation=cv2.INTER_AREA)
+    vector = thumb.astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+class DocumentTemplate:
+    """
+    A known document layout.
+
+    fields: field name -> normalized region (x1, y1, x2, y2), each in 0..1 of page width/height
+    fingerprint: layout_fingerprint of a reference page
+    aspect_ratio: reference width / height
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fields: Dict[str, Tuple[float, float, float, float]],
+        fingerprint: np.ndarray,
+        aspect_ratio: float,
+        language: Optional[str] = None,
+    ):
+        self.name = name
+        self.fields = {k: tuple(float(v) for v in box) for k, box in fields.items()}
+        self.fingerprint = np.asarray(fingerprint, dtype=np.float32)
+        self.aspect_ratio = float(aspect_ratio)
+        self.language = language
+
+    @classmethod
+    def from_reference_image(
+        cls, name: str, image: Union[Image.Image, np.ndarray], fields: Dict[str, Tuple[float, float, float, float]],
+        language: Optional[str] = None,
+    ) -> "DocumentTemplate":
+        array = np.asarray(image)
+        h, w = array.shape[:2]
+        return cls(name, fields, layout_fingerprint(array), w / float(h), language)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentTemplate":
+        return cls(
+            name=data["name"],
+            fields=data["fields"],
+            fingerprint=np.asarray(data["fingerprint"], dtype=np.float32),
+            aspect_ratio=data["aspect_ratio"],
+            language=data.get("language"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "language": self.language,
+            "aspect_ratio": self.aspect_ratio,
+            "fields": {k: list(v) for k, v in self.fields.items()},
+            "fingerprint": [round(float(v), 5) for v in self.fingerprint],
+        }
+
+    def covers(self, custom_fields: Optional[List[str]]) -> bool:
+        """True when every requested field has a region in this template."""
+        if not custom_fields:
+            return True
+        names = {k.lower() for k in self.fields}
+        return all(f.lower() in names for f in custom_fields)
+
+    def regions(self, width: int, height: int, padding: float = 0.01) -> Dict[str, Tuple[int, int, int, int]]:
+        """Pixel regions for a page of the given size, padded slightly to tolerate misalignment."""
+        out = {}
+        for name, (x1, y1, x2, y2) in self.fields.items():
+            out[name] = (
+                max(0, int((x1 - padding) * width)),
+                max(0, int((y1 - padding) * height)),
+                min(width, int(np.ceil((x2 + padding) * width))),
+                min(height, int(np.ceil((y2 + padding) * height))),
+            )
+        return out
+
+
+class TemplateRegistry:
+    """Holds document templates and matches pages against their layout fingerprints."""
+
+    def __init__(
+        self,
+        templates: Optional[List[DocumentTemplate]] = None,
+        threshold: float = 0.85,
+        aspect_tolerance: float = 0.08,
+    ):
+        self.templates: Dict[str, DocumentTemplate] = {}
+        self.threshold = threshold
+        self.aspect_tolerance = aspect_tolerance
+        self._matches = metrics.counter("templates.matched")
+        self._misses = metrics.counter("templates.unmatched")
+        for template in templates or []:
+            self.register(template)
+
+    def register(self, template: DocumentTemplate):
+        self.templates[template.name] = template
+
+    def load_dir(self, path: str) -> int:
+        """Load every *.json template in `path`; returns the number loaded."""
+        loaded = 0
+        if not path or not os.path.isdir(path):
+            return loaded
+        for filename in sorted(os.listdir(path)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(path, filename), "r", encoding="utf-8") as f:
+                    self.register(DocumentTemplate.from_dict(json.load(f)))
+                loaded += 1
+            except Exception as e:
+                logger.error(f"Failed to load template {filename}: {e}")
+        logger.info(f"Loaded {loaded} document templates from {path}")
+        return loaded
+
+    def match(
+        self, image: Union[Image.Image, np.ndarray], language: Optional[str] = None,
+        custom_fields: Optional[List[str]] = None,
+        require_language: bool = False,
+    ) -> Optional[Tuple[DocumentTemplate, float]]:
+        """
+        Best-matching template above `threshold`, or None.
+
+        require_language: only templates that pin a language (language="auto", where
+                          nothing else says which OCR module to use)
+        """
+        if not self.templates:
+            return None
+
+        array = np.asarray(image)
+        h, w = array.shape[:2]
+        aspect = w / float(h)
+        fingerprint = layout_fingerprint(array)
+
+        best, best_score = None, self.threshold
+        for template in self.templates.values():
+            if template.language and language and template.language != language:
+                continue
+            if require_language and not template.language:
+                continue
+            if abs(aspect - template.aspect_ratio) / template.aspect_ratio > self.aspect_tolerance:
+                continue
+            if not template.covers(custom_fields):
+                continue
+            score = float(np.dot(fingerprint, template.fingerprint))
+            if score >= best_score:
+                best, best_score = template, score
+
+        if best is None:
+            self._misses.inc()
+            return None
+        self._matches.inc()
+        return best, best_score
+
+    # ----------------------------
+    # Latency report
+    # ----------------------------
+    @staticmethod
+    def record_latency(template_name: Optional[str], elapsed_ms: float):
+        """Record end-to-end page latency for a template (or the full-page path when None)."""
+        key = f"templates.{template_name}.latency_ms" if template_name else "templates.full_page.latency_ms"
+        metrics.histogram(key).observe(elapsed_ms)
+
+    def report(self) -> Dict[str, Any]:
+        """Per-template mean latency and reduction versus the full-page path."""
+        baseline = metrics.histogram("templates.full_page.latency_ms").snapshot()
+        out: Dict[str, Any] = {"full_page_mean_ms": baseline["mean"], "templates": {}}
+        for name in self.templates:
+            snap = metrics.histogram(f"templates.{name}.latency_ms").snapshot()
+            reduction = None
+            if snap["count"] and baseline["count"] and baseline["mean"] > 0:
+                reduction = round(1.0 - snap["mean"] / baseline["mean"], 4)
+            out["templates"][name] = {"pages": snap["count"], "mean_ms": snap["mean"], "latency_reduction": reduction}
+        return out
+
+
+__all__ = ["layout_fingerprint", "DocumentTemplate", "TemplateRegistry"]
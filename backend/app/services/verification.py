@@ -0,0 +1,278 @@
+import re
+import datetime
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Field types and their default match thresholds (similarity of the normalized values)
+FIELD_TYPES = ("text", "id", "date", "phone")
+DEFAULT_THRESHOLDS: Dict[str, float] = {"text": 0.85, "id": 0.9, "date": 1.0, "phone": 1.0}
+
+# Field-name tokens that select a type, checked in this order
+_TYPE_TOKENS: Tuple[Tuple[str, frozenset], ...] = (
+    ("date", frozenset({"date", "dob", "birth", "birthday", "expiry", "expires", "expiration", "issued", "doi", "doe"})),
+    ("phone", frozenset({"phone", "mobile", "tel", "telephone", "cell", "fax"})),
+    ("id", frozenset({"number", "no", "id", "passport", "licence", "license", "pan", "aadhaar", "ssn", "serial"})),
+)
+
+# Phone numbers whose digits end the same way over at least this many digits are the same
+# number written with/without a country code or trunk prefix
+PHONE_SUFFIX_DIGITS = 7
+
+# Below this many strings, NumPy's per-call overhead outweighs vectorization
+_VECTORIZE_MIN = 16
+
+_MONTHS = {m: i + 1 for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+)}
+_YMD = re.compile(r"(\d{4})\s*[-/.年년]\s*(\d{1,2})\s*[-/.月월]\s*(\d{1,2})")
+_DMY = re.compile(r"(\d{1,2})\s*[-/. ]\s*(\d{1,2})\s*[-/. ]\s*(\d{2,4})")
+_D_MON_Y = re.compile(r"(\d{1,2})\s*[-/. ]?\s*([a-z]{3})[a-z]*\.?\s*[-/., ]?\s*(\d{2,4})")
+_MON_D_Y = re.compile(r"([a-z]{3})[a-z]*\.?\s*(\d{1,2})(?:st|nd|rd|th)?\s*,?\s*(\d{2,4})")
+_SPACES = re.compile(r"\s+")
+_ID_SEPARATORS = re.compile(r"[\s\-./_]+")
+_NON_DIGITS = re.compile(r"\D+")
+_CAMEL = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+
+# ----------------------------------------------------------------------------
+# Field types
+# ----------------------------------------------------------------------------
+def infer_field_type(name: str) -> str:
+    """"date", "phone", "id" or "text", from the words of a field name (date_of_birth, mobileNo...)."""
+    tokens = set(re.split(r"[^a-z0-9]+", _CAMEL.sub("_", name).lower()))
+    for field_type, words in _TYPE_TOKENS:
+        if tokens & words:
+            return field_type
+    return "text"
+
+
+def extracted_value(value: Any) -> Tuple[Optional[str], Optional[float]]:
+    """(value, confidence) of a mapped field: a plain string, or a {"value", "confidence"} dict."""
+    if isinstance(value, dict):
+        inner = value.get("value")
+        return (None if inner is None else str(inner)), value.get("confidence")
+    return (None if value is None else str(value)), None
+
+
+# ----------------------------------------------------------------------------
+# Normalization
+# ----------------------------------------------------------------------------
+def normalize_text(value: str) -> str:
+    """
+    NFKC (full-width Latin and digits to ASCII, half-width katakana to full-width,
+    ideographic space to space), case folding, collapsed whitespace, and
+    surrounding punctuation stripped.
+    """
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return _SPACES.sub(" ", value).strip(" .,;:")
+
+
+def normalize_id(value: str) -> str:
+    """Document numbers: text normalization without spaces, dashes, dots, slashes or underscores."""
+    return _ID_SEPARATORS.sub("", normalize_text(value))
+
+
+def normalize_phone(value: str) -> str:
+    """Digits only, without the "00" international prefix or leading trunk zeros."""
+    digits = _NON_DIGITS.sub("", unicodedata.normalize("NFKC", value))
+    if digits.startswith("00"):
+        digits = digits[2:]
+    return digits.lstrip("0")
+
+
+def _year(text: str) -> int:
+    year = int(text)
+    if len(text) <= 2:
+        # Two-digit years: 00-49 -> 2000s, 50-99 -> 1900s
+        year += 2000 if year < 50 else 1900
+    return year
+
+
+def _iso(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return datetime.date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_date(value: str, day_first: bool = True) -> Optional[str]:
+    """
+    ISO yyyy-mm-dd, or None when no date is recognized.
+
+    Accepts 2004-11-16, 2004/11/16, 2004年11月16日, 2004년 11월 16일, 16/11/2004,
+    16.11.04, 16 Nov 2004, 16-NOV-2004 and Nov 16, 2004. Numeric day/month order
+    follows `day_first`, falling back to the other order when that is no valid date.
+    """
+    text = normalize_text(value)
+    match = _YMD.search(text)
+    if match:
+        return _iso(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    match = _D_MON_Y.search(text)
+    if match and match.group(2) in _MONTHS:
+        return _iso(_year(match.group(3)), _MONTHS[match.group(2)], int(match.group(1)))
+    match = _MON_D_Y.search(text)
+    if match and match.group(1) in _MONTHS:
+        return _iso(_year(match.group(3)), _MONTHS[match.group(1)], int(match.group(2)))
+    match = _DMY.search(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), _year(match.group(3))
+        day, month = (first, second) if day_first else (second, first)
+        return _iso(year, month, day) or _iso(year, day, month)
+    return None
+
+
+def normalize(value: Optional[str], field_type: str = "text", day_first: bool = True) -> str:
+    """Comparable form of a value for its field type ("" for None)."""
+    if value is None:
+        return ""
+    if field_type == "date":
+        # Unrecognized dates are still compared as text
+        return normalize_date(value, day_first) or normalize_text(value)
+    if field_type == "phone":
+        return normalize_phone(value)
+    if field_type == "id":
+        return normalize_id(value)
+    return normalize_text(value)
+
+
+# ----------------------------------------------------------------------------
+# Edit distance, vectorized over many candidate strings
+# ----------------------------------------------------------------------------
+def _codes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(M x L int32 code points padded with -1, lengths) for M strings."""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    width = int(lengths.max()) if len(texts) else 0
+    codes = np.full((len(texts), max(1, width)), -1, dtype=np.int32)
+    for i, text in enumerate(texts):
+        if text:
+            codes[i, :len(text)] = np.frombuffer(text.encode("utf-32-le"), dtype=np.int32)
+    return codes, lengths
+
+
+def edit_distances(pattern: str, texts: Sequence[str]) -> np.ndarray:
+    """
+    Levenshtein distance between `pattern` and every string of `texts` (int64 array).
+
+    Patterns of up to 64 characters use Myers' bit-parallel algorithm (Hyyrö's
+    formulation for global distance): one pass over the columns of the padded
+    texts, every record advanced at once with uint64 NumPy operations. Longer
+    patterns use the row-by-row dynamic program, also vectorized over records.
+    A handful of texts (single-record verification) is compared in plain Python.
+    """
+    if not len(texts):
+        return np.zeros(0, dtype=np.int64)
+    if len(texts) < _VECTORIZE_MIN:
+        return np.array([_levenshtein(pattern, text) for text in texts], dtype=np.int64)
+    codes, lengths = _codes(texts)
+    m = len(pattern)
+    if m == 0:
+        return lengths.copy()
+    if m > 64:
+        return _dp_distances(pattern, codes, lengths)
+
+    # Pattern bitmasks per distinct character (Peq), looked up with searchsorted
+    alphabet = np.array(sorted({ord(c) for c in pattern}), dtype=np.int32)
+    peq = np.zeros(len(alphabet), dtype=np.uint64)
+    for bit, char in enumerate(pattern):
+        peq[np.searchsorted(alphabet, ord(char))] |= np.uint64(1) << np.uint64(bit)
+
+    count = len(texts)
+    one = np.uint64(1)
+    high = np.uint64(1) << np.uint64(m - 1)
+    pv = np.full(count, np.uint64(0xFFFFFFFFFFFFFFFF) >> np.uint64(64 - m), dtype=np.uint64)
+    mv = np.zeros(count, dtype=np.uint64)
+    score = np.full(count, m, dtype=np.int64)
+
+    with np.errstate(over="ignore"):
+        for column in range(codes.shape[1]):
+            chars = codes[:, column]
+            index = np.minimum(np.searchsorted(alphabet, chars), len(alphabet) - 1)
+            eq = np.where(alphabet[index] == chars, peq[index], np.uint64(0))
+
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+
+            active = column < lengths
+            score += active & ((ph & high) != 0)
+            score -= active & ((mh & high) != 0)
+
+            ph = (ph << one) | one
+            mh = mh << one
+            new_pv = mh | ~(xv | ph)
+            new_mv = ph & xv
+            # Finished (shorter) texts keep their state
+            pv = np.where(active, new_pv, pv)
+            mv = np.where(active, new_mv, mv)
+    return score
+
+
+def _levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _dp_distances(pattern: str, codes: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    width = codes.shape[1]
+    previous = np.tile(np.arange(width + 1, dtype=np.int64), (len(codes), 1))
+    for i, char in enumerate(pattern, start=1):
+        substitution = previous[:, :-1] + (codes != ord(char))
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        # Deletion/substitution are vectorized; the insertion chain runs left to right
+        candidates = np.minimum(previous[:, 1:] + 1, substitution)
+        for j in range(1, width + 1):
+            current[:, j] = np.minimum(candidates[:, j - 1], current[:, j - 1] + 1)
+        previous = current
+    return previous[np.arange(len(codes)), lengths]
+
+
+def similarities(pattern: str, texts: Sequence[str]) -> np.ndarray:
+    """1 - distance / longer length, per text (1.0 when both are empty)."""
+    if not len(texts):
+        return np.zeros(0, dtype=np.float64)
+    distances = edit_distances(pattern, texts)
+    longest = np.maximum(np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts)), len(pattern))
+    return np.where(longest > 0, 1.0 - distances / np.maximum(longest, 1), 1.0)
+
+
+def field_scores(field_type: str, extracted: str, submitted: Sequence[str]) -> np.ndarray:
+    """Similarity of one normalized extracted value to many normalized submitted values."""
+    scores = similarities(extracted, submitted)
+    if field_type == "phone" and extracted:
+        for i, value in enumerate(submitted):
+            shorter = min(len(value), len(extracted))
+            if shorter >= PHONE_SUFFIX_DIGITS and (value.endswith(extracted) or extracted.endswith(value)):
+                scores[i] = 1.0
+    # A value missing on either side never matches
+    if not extracted:
+        scores[:] = 0.0
+    else:
+        scores[[i for i, value in enumerate(submitted) if not value]] = 0.0
+    return scores
+
+
+__all__ = [
+    "FIELD_TYPES",
+    "DEFAULT_THRESHOLDS",
+    "infer_field_type",
+    "extracted_value",
+    "normalize_text",
+    "normalize_id",
+    "normalize_phone",
+    "normalize_date",
+    "normalize",
+    "edit_distances",
+    "similarities",
+    "field_scores",
+]
@@ -1,16 +1,18 @@
 import os
 
+from app.utils.pdf_utils import PDFUtils, AdaptiveDPIRasterizer, PDFTextLayerExtractor
+from app.utils.pdf_render import PDFRenderer, get_renderer
+from app.utils.page_cache import PageImageCache, CachingRenderer, sha256_file
+from app.utils.pdf_index import PDFIndexCache, DocumentIndex, PageSelectionError, parse_page_selection
+
+
 def is_pdf_file(filename: str) -> bool:
     """Check if the given filename is a PDF file by extension."""
     return os.path.splitext(filename)[1].lower() == ".pdf"
 
-# Placeholder implementations for other expected utils
-
-def convert_pdf_to_image(pdf_path: str):
-    raise NotImplementedError("convert_pdf_to_image is not implemented.")
-
-def convert_pdf_to_images(pdf_path: str):
-    raise NotImplementedError("convert_pdf_to_images is not implemented.")
 
-def save_image_temporarily(image):
-    raise NotImplementedError("save_image_temporarily is not implemented.")
+# PDF helpers (delegating to PDFUtils)
+convert_pdf_to_image = PDFUtils.convert_pdf_to_image
+convert_pdf_to_images = PDFUtils.convert_pdf_to_images
+get_pdf_page_count = PDFUtils.get_pdf_page_count
+save_image_temporarily = PDFUtils.save_image_temporarily
@@ -0,0 +1,76 @@
+import io
+import os
+import tarfile
+import zipfile
+from typing import List, Tuple
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+DOCUMENT_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp", ".pdf")
+
+
+class ArchiveError(ValueError):
+    """Unreadable archive, or one that exceeds the batch limits."""
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def is_document(filename: str) -> bool:
+    return filename.lower().endswith(DOCUMENT_SUFFIXES)
+
+
+def _wanted(name: str) -> bool:
+    parts = name.replace("\\", "/").split("/")
+    # Skip directories, dotfiles and macOS resource forks
+    return bool(parts[-1]) and not any(p.startswith(".") or p == "__MACOSX" for p in parts) and is_document(name)
+
+
+def expand_archive(filename: str, data: bytes, max_files: int, max_bytes: int) -> List[Tuple[str, bytes]]:
+    """
+    Documents inside a zip or tar archive as (member path, content), read in memory.
+
+    Only image and PDF members are returned. Declared sizes are checked against
+    `max_files` / `max_bytes` before anything is decompressed.
+    """
+    members: List[Tuple[str, bytes]] = []
+    try:
+        if filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                infos = [i for i in archive.infolist() if not i.is_dir() and _wanted(i.filename)]
+                _check_limits(filename, len(infos), sum(i.file_size for i in infos), max_files, max_bytes)
+                members = [(i.filename, archive.read(i)) for i in infos]
+        else:
+            with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+                infos = [i for i in archive.getmembers() if i.isfile() and _wanted(i.name)]
+                _check_limits(filename, len(infos), sum(i.size for i in infos), max_files, max_bytes)
+                members = [(i.name, archive.extractfile(i).read()) for i in infos]
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise ArchiveError(f"Could not read archive '{filename}': {e}")
+    return members
+
+
+def _check_limits(filename: str, count: int, size: int, max_files: int, max_bytes: int):
+    if count > max_files:
+        raise ArchiveError(f"Archive '{filename}' has {count} documents (limit {max_files})")
+    if size > max_bytes:
+        raise ArchiveError(f"Archive '{filename}' expands to {size} bytes (limit {max_bytes})")
+
+
+def unique_name(name: str, seen: dict) -> str:
+    """`name`, or `name#2`, `name#3`... when the same file name appears more than once in a batch."""
+    base = os.path.normpath(name).replace("\\", "/")
+    count = seen.get(base, 0) + 1
+    seen[base] = count
+    return base if count == 1 else f"{base}#{count}"
+
+
+__all__ = [
+    "ARCHIVE_SUFFIXES",
+    "DOCUMENT_SUFFIXES",
+    "ArchiveError",
+    "is_archive",
+    "is_document",
+    "expand_archive",
+    "unique_name",
+]
@@ -0,0 +1,112 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class OperationCancelled(Exception):
+    """
+    Work stopped at a checkpoint because its request no longer needs the result.
+
+    reason: "client_disconnected", "deadline" or whatever cancel() was given
+    stage: checkpoint that noticed it (render, ocr, llm, page, ...)
+    """
+
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"Cancelled before {stage}: {reason}")
+        self.reason = reason
+        self.stage = stage
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation of one request's work.
+
+    The work calls checkpoint() at stage and page boundaries; the token is
+    cancelled explicitly (client disconnect) or once `deadline` (time.monotonic())
+    has passed. Callbacks run once, on the cancelling thread, so blocking waits
+    (the LLM call) can wake up immediately. close() marks the work finished and
+    stops any disconnect watcher. Thread-safe.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+        self.closed = False
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    @classmethod
+    def with_timeout(cls, seconds: Optional[float]) -> "CancellationToken":
+        return cls(time.monotonic() + seconds if seconds else None)
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline")
+            return True
+        return False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (None without one)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = "cancelled"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        metrics.counter(f"cancellation.requests.{reason}").inc()
+        logger.info(f"Request cancelled: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+
+    def add_callback(self, callback: Callable[[], Any]):
+        """Run `callback` on cancellation (immediately when already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def close(self):
+        self.closed = True
+
+
+def checkpoint(cancel: Optional[CancellationToken], stage: str):
+    """Raise OperationCancelled when `cancel` is cancelled; a no-op without a token."""
+    if cancel is not None and cancel.cancelled:
+        metrics.counter(f"cancellation.stages_skipped.{stage}").inc()
+        raise OperationCancelled(cancel.reason, stage)
+
+
+async def watch_disconnect(request: Any, cancel: CancellationToken, interval: float = 0.5):
+    """Cancel `cancel` when the client of a Starlette request goes away; ends when the token is closed."""
+    while not cancel.closed and not cancel.cancelled:
+        if await request.is_disconnected():
+            cancel.cancel("client_disconnected")
+            return
+        await asyncio.sleep(interval)
+
+
+__all__ = [
+    "OperationCancelled",
+    "CancellationToken",
+    "checkpoint",
+    "watch_disconnect",
+]
@@ -1,3 +1,4 @@
+import cv2
 import numpy as np
 from PIL import Image
 
@@ -9,6 +10,7 @@ class OCRUtils:
     - Bounding box normalization
     - Confidence level mapping
     - Deskew placeholder (kept simple because PHOCR handles rotation)
+    - Text height estimation (drives resolution normalization)
     """
 
     # ----------------------------
@@ -95,3 +97,47 @@ class OCRUtils:
         So we keep exact same behavior as your original code: return image as is.
         """
         return image
+
+    # ----------------------------
+    # TEXT HEIGHT ESTIMATION
+    # ----------------------------
+    @staticmethod
+    def estimate_text_height(gray: np.ndarray, min_components: int = 8) -> float:
+        """
+        Estimate the typical character height (pixels) of a grayscale image.
+
+        Binarizes adaptively, takes connected components that look like glyphs
+        (small, not too wide, not specks) and returns their median height.
+        Returns 0.0 when too few glyph-like components are found.
+        """
+        if gray.ndim == 3:
+            gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                       cv2.THRESH_BINARY_INV, 25, 15)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        stats = stats[1:]
+        if len(stats) == 0:
+            return 0.0
+
+        w = stats[:, cv2.CC_STAT_WIDTH]
+        h = stats[:, cv2.CC_STAT_HEIGHT]
+        area = stats[:, cv2.CC_STAT_AREA]
+        glyph = (
+            (h >= 3)
+            & (h <= gray.shape[0] * 0.15)
+            & (w <= h * 3)
+            & (area >= 6)
+            & (area >= 0.1 * w * h)
+        )
+        if int(glyph.sum()) < min_components:
+            return 0.0
+        return float(np.median(h[glyph]))
+
+
+# Module-level aliases so callers can import the helpers directly
+safe_float_conversion = OCRUtils.safe_float_conversion
+process_bounding_box = OCRUtils.process_bounding_box
+get_confidence_level = OCRUtils.get_confidence_level
+deskew_image = OCRUtils.deskew_image
+estimate_text_height = OCRUtils.estimate_text_height
@@ -0,0 +1,297 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.pdf_render import PDFDocument, PDFRenderer
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# (document sha256, page number, dpi, colorspace)
+PageKey = Tuple[str, int, int, str]
+
+
+# (path, size, mtime_ns) -> digest; the PDF index and the page cache hash the same upload
+_HASH_MEMO: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_HASH_MEMO_SIZE = 1024
+_hash_lock = threading.Lock()
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hex sha256 of a file's content, read in chunks (memoized per path, size and mtime)."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        digest_hex = _HASH_MEMO.get(memo_key)
+    if digest_hex is not None:
+        return digest_hex
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    digest_hex = digest.hexdigest()
+    with _hash_lock:
+        _HASH_MEMO[memo_key] = digest_hex
+        while len(_HASH_MEMO) > _HASH_MEMO_SIZE:
+            _HASH_MEMO.popitem(last=False)
+    return digest_hex
+
+
+class PageImageCache:
+    """
+    Two-tier cache of rendered page pixels.
+
+    Memory tier: LRU bounded by `max_bytes` of pixel data.
+    Disk tier (optional, `disk_dir`): raw arrays as .npy files, read back with
+    np.load(mmap_mode="r") so a hit costs a page-cache mapping rather than a
+    decode. Files are written to a temporary name and os.replace()d into
+    place, so concurrent writers (threads or uvicorn worker processes sharing
+    the directory) never expose a partial file. The disk tier is trimmed to
+    `disk_max_bytes`, oldest first.
+
+    Cached arrays are marked read-only; callers that need to modify pixels
+    must copy (the preprocessing pipeline already does).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 2 * 1024 * 1024 * 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[PageKey, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[PageKey, threading.Lock] = {}
+
+        self._memory_hits = metrics.counter("page_cache.memory_hits")
+        self._disk_hits = metrics.counter("page_cache.disk_hits")
+        self._misses = metrics.counter("page_cache.misses")
+        self._evictions = metrics.counter("page_cache.evictions")
+        self._bytes = metrics.gauge("page_cache.memory_bytes")
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def get(self, key: PageKey) -> Optional[np.ndarray]:
+        with self._lock:
+            array = self._memory.get(key)
+            if array is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits.inc()
+                return array
+
+        array = self._disk_get(key)
+        if array is not None:
+            self._disk_hits.inc()
+            self._memory_put(key, array)
+        return array
+
+    def put(self, key: PageKey, array: np.ndarray) -> np.ndarray:
+        array.flags.writeable = False
+        self._memory_put(key, array)
+        self._disk_put(key, array)
+        return array
+
+    def get_or_render(self, key: PageKey, render: Callable[[], np.ndarray]) -> np.ndarray:
+        """Cached page, rendering it at most once even when several threads ask concurrently."""
+        array = self.get(key)
+        if array is not None:
+            return array
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another thread may have rendered it while we waited
+            array = self.get(key)
+            if array is None:
+                self._misses.inc()
+                array = self.put(key, render())
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return array
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._bytes.set(0)
+
+    def stats(self) -> Dict[str, Any]:
+        memory_hits = self._memory_hits.value
+        disk_hits = self._disk_hits.value
+        misses = self._misses.value
+        lookups = memory_hits + disk_hits + misses
+        with self._lock:
+            entries, used, disk_files, disk_used = len(self._memory), self._memory_bytes, len(self._disk), self._disk_bytes
+        return {
+            "entries": entries,
+            "memory_bytes": used,
+            "max_bytes": self.max_bytes,
+            "disk_files": disk_files,
+            "disk_bytes": disk_used,
+            "memory_hits": memory_hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions.value,
+        }
+
+    # ----------------------------
+    # Memory tier
+    # ----------------------------
+    def _memory_put(self, key: PageKey, array: np.ndarray):
+        size = int(array.nbytes)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= int(previous.nbytes)
+            self._memory[key] = array
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= int(evicted.nbytes)
+                self._evictions.inc()
+            self._bytes.set(self._memory_bytes)
+
+    # ----------------------------
+    # Disk tier
+    # ----------------------------
+    @staticmethod
+    def _file_name(key: PageKey) -> str:
+        doc_hash, page, dpi, colorspace = key
+        return f"{doc_hash}_p{page}_d{dpi}_{colorspace}.npy"
+
+    def _load_disk_index(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".npy"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._disk[name] = size
+            self._disk_bytes += size
+
+    def _disk_get(self, key: PageKey) -> Optional[np.ndarray]:
+        if not self.disk_dir:
+            return None
+        name = self._file_name(key)
+        try:
+            array = np.load(os.path.join(self.disk_dir, name), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            if name in self._disk:
+                self._disk.move_to_end(name)
+        return array
+
+    def _disk_put(self, key: PageKey, array: np.ndarray):
+        if not self.disk_dir:
+            return
+        name = self._file_name(key)
+        path = os.path.join(self.disk_dir, name)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Page cache disk write failed for {name}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(name, 0)
+            self._disk[name] = size
+            self._disk_bytes += size
+            stale = []
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                old_name, old_size = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                stale.append(old_name)
+        for old_name in stale:
+            try:
+                os.remove(os.path.join(self.disk_dir, old_name))
+            except OSError:
+                pass
+
+
+class CachingDocument(PDFDocument):
+    """
+    PDFDocument whose renders go through a PageImageCache.
+
+    The document is hashed once on open; the underlying document is only
+    parsed when a page actually has to be rendered (or its page count or
+    size is needed), so a fully cached request never touches the PDF parser.
+    """
+
+    def __init__(self, path: str, renderer: PDFRenderer, cache: PageImageCache):
+        super().__init__(path)
+        self._renderer = renderer
+        self._cache = cache
+        self._inner: Optional[PDFDocument] = None
+        self.doc_hash = sha256_file(path)
+
+    @property
+    def inner(self) -> PDFDocument:
+        if self._inner is None:
+            self._inner = self._renderer.open(self.path)
+        return self._inner
+
+    @property
+    def page_count(self) -> int:
+        return self.inner.page_count
+
+    def page_size(self, page_number: int) -> Tuple[float, float]:
+        return self.inner.page_size(page_number)
+
+    def render_array(self, page_number: int, dpi: int, grayscale: bool = False) -> np.ndarray:
+        key = (self.doc_hash, page_number, dpi, "gray" if grayscale else "rgb")
+        return self._cache.get_or_render(key, lambda: self.inner.render_array(page_number, dpi, grayscale))
+
+    def close(self):
+        if self._inner is not None:
+            self._inner.close()
+            self._inner = None
+
+
+class CachingRenderer(PDFRenderer):
+    """Wraps another PDFRenderer so every document it opens shares one PageImageCache."""
+
+    def __init__(self, renderer: PDFRenderer, cache: PageImageCache):
+        self.renderer = renderer
+        self.cache = cache
+        self.name = f"cached-{renderer.name}"
+
+    def open(self, path: str) -> PDFDocument:
+        return CachingDocument(path, self.renderer, self.cache)
+
+
+__all__ = ["PageKey", "sha256_file", "PageImageCache", "CachingDocument", "CachingRenderer"]
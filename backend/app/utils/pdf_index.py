@@ -0,0 +1,216 @@
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import PyPDF2
+
+from app.utils.page_cache import sha256_file
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_RANGE = re.compile(r"^(\d+)?\s*-\s*(\d+)?$")
+
+
+class PageSelectionError(ValueError):
+    """Invalid `pages` / `max_pages` request parameters."""
+
+
+# ----------------------------------------------------------------------------
+# Page selection
+# ----------------------------------------------------------------------------
+def parse_page_selection(spec: Optional[str], page_count: int, max_pages: Optional[int] = None) -> List[int]:
+    """
+    Resolve a page selection against a document, 1-indexed, ascending, without duplicates.
+
+    spec: comma-separated pages and ranges, e.g. "1-3,7,10-"; "A-" runs to the last
+          page and "-B" starts at the first. Range ends past the last page are
+          clamped; a single page past the end is an error. Empty/None selects all.
+    max_pages: keep only the first `max_pages` selected pages
+    """
+    if max_pages is not None and max_pages < 1:
+        raise PageSelectionError("max_pages must be at least 1")
+
+    if spec is None or not spec.strip():
+        selected = list(range(1, page_count + 1))
+    else:
+        pages = set()
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if part.isdigit():
+                page = int(part)
+                if page < 1 or page > page_count:
+                    raise PageSelectionError(f"Page {page} is out of range (document has {page_count} pages)")
+                pages.add(page)
+                continue
+            match = _RANGE.match(part)
+            if match is None or not (match.group(1) or match.group(2)):
+                raise PageSelectionError(f"Invalid page range '{part}'")
+            first = int(match.group(1) or 1)
+            last = min(int(match.group(2) or page_count), page_count)
+            if first < 1 or (match.group(2) and int(match.group(2)) < first):
+                raise PageSelectionError(f"Invalid page range '{part}'")
+            pages.update(range(first, last + 1))
+        selected = sorted(pages)
+        if not selected:
+            raise PageSelectionError(f"Page selection '{spec}' matches no pages (document has {page_count} pages)")
+
+    return selected[:max_pages] if max_pages else selected
+
+
+# ----------------------------------------------------------------------------
+# Document index
+# ----------------------------------------------------------------------------
+class PageInfo:
+    """
+    Cheap per-page metadata.
+
+    width/height: page size in PDF points as rendered (after /Rotate)
+    rotation: /Rotate in degrees
+    has_text_layer: the page declares fonts (directly or in a form XObject);
+                    pages without fonts cannot carry a text layer and go
+                    straight to OCR
+    """
+
+    def __init__(self, number: int, width: float, height: float, rotation: int, has_text_layer: bool):
+        self.number = number
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.has_text_layer = has_text_layer
+
+    def to_dict(self):
+        return {
+            "page_number": self.number,
+            "width": round(self.width, 2),
+            "height": round(self.height, 2),
+            "rotation": self.rotation,
+            "has_text_layer": self.has_text_layer,
+        }
+
+
+class DocumentIndex:
+    """Page count and PageInfo for every page of one PDF, identified by content hash."""
+
+    def __init__(self, doc_hash: str, pages: List[PageInfo], build_ms: float = 0.0):
+        self.doc_hash = doc_hash
+        self.pages = pages
+        self.build_ms = build_ms
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page(self, page_number: int) -> Optional[PageInfo]:
+        if 1 <= page_number <= len(self.pages):
+            return self.pages[page_number - 1]
+        return None
+
+    def has_text_layer(self, page_number: int) -> bool:
+        info = self.page(page_number)
+        return info is not None and info.has_text_layer
+
+    def select(self, spec: Optional[str] = None, max_pages: Optional[int] = None) -> List[int]:
+        return parse_page_selection(spec, self.page_count, max_pages)
+
+    def to_dict(self):
+        return {
+            "document_hash": self.doc_hash,
+            "page_count": self.page_count,
+            "text_layer_pages": [p.number for p in self.pages if p.has_text_layer],
+            "pages": [p.to_dict() for p in self.pages],
+        }
+
+
+def _declares_fonts(resources) -> bool:
+    """True when a resource dictionary (or a form XObject inside it) has fonts."""
+    try:
+        resources = resources.get_object() if resources is not None else None
+        if not resources:
+            return False
+        if resources.get("/Font"):
+            return True
+        xobjects = resources.get("/XObject")
+        for ref in (xobjects.get_object().values() if xobjects else []):
+            xobject = ref.get_object()
+            if xobject.get("/Subtype") == "/Form" and xobject.get("/Resources") is not None:
+                nested = xobject["/Resources"].get_object()
+                if nested.get("/Font"):
+                    return True
+    except Exception:
+        # Malformed resources: let the text-layer extractor decide
+        return True
+    return False
+
+
+def build_document_index(path: str, doc_hash: Optional[str] = None) -> DocumentIndex:
+    """
+    One PyPDF2 pass over the page tree: sizes, rotation and font resources.
+
+    No content stream is decoded and nothing is rendered.
+    """
+    start = time.perf_counter()
+    doc_hash = doc_hash or sha256_file(path)
+    pages: List[PageInfo] = []
+    try:
+        reader = PyPDF2.PdfReader(path)
+        for number, page in enumerate(reader.pages, start=1):
+            box = page.mediabox
+            width, height = float(box.width), float(box.height)
+            rotation = int(page.get("/Rotate", 0) or 0) % 360
+            if rotation % 180:
+                width, height = height, width
+            pages.append(PageInfo(number, width, height, rotation, _declares_fonts(page.get("/Resources"))))
+    except Exception as e:
+        logger.warning(f"Could not index PDF {path}: {e}")
+    return DocumentIndex(doc_hash, pages, (time.perf_counter() - start) * 1000.0)
+
+
+class PDFIndexCache:
+    """LRU of DocumentIndex by document sha256; repeated uploads of a file skip the parse."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, DocumentIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = metrics.counter("pdf_index.hits")
+        self._misses = metrics.counter("pdf_index.misses")
+        self._build_ms = metrics.histogram("pdf_index.build_ms")
+
+    def get(self, path: str) -> DocumentIndex:
+        doc_hash = sha256_file(path)
+        with self._lock:
+            index = self._entries.get(doc_hash)
+            if index is not None:
+                self._entries.move_to_end(doc_hash)
+                self._hits.inc()
+                return index
+
+        self._misses.inc()
+        index = build_document_index(path, doc_hash)
+        self._build_ms.observe(index.build_ms)
+        if index.page_count:
+            with self._lock:
+                self._entries[doc_hash] = index
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+__all__ = [
+    "PageSelectionError",
+    "parse_page_selection",
+    "PageInfo",
+    "DocumentIndex",
+    "build_document_index",
+    "PDFIndexCache",
+]
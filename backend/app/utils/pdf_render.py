@@ -0,0 +1,175 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+import PyPDF2
+from PIL import Image
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional dependency
+    pdfium = None
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------
+# Rendering backend abstraction
+# ----------------------------------------------------------------------------
+class PDFDocument(ABC):
+    """An open PDF; render pages as often as needed, then close (or use `with`)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    @abstractmethod
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def render_array(self, page_number: int, dpi: int, grayscale: bool = False) -> np.ndarray:
+        """Render page `page_number` (1-indexed) to an HxWx3 RGB or HxW grayscale uint8 array."""
+        raise NotImplementedError
+
+    def render(self, page_number: int, dpi: int, grayscale: bool = False) -> Image.Image:
+        return Image.fromarray(self.render_array(page_number, dpi, grayscale))
+
+    def page_size(self, page_number: int) -> Tuple[float, float]:
+        """(width, height) of a page in PDF points as rendered, i.e. after /Rotate."""
+        page = PyPDF2.PdfReader(self.path).pages[page_number - 1]
+        width, height = float(page.mediabox.width), float(page.mediabox.height)
+        if int(page.get("/Rotate", 0) or 0) % 180:
+            width, height = height, width
+        return width, height
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> "PDFDocument":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PDFRenderer(ABC):
+    name = "renderer"
+
+    @abstractmethod
+    def open(self, path: str) -> PDFDocument:
+        raise NotImplementedError
+
+
+# ----------------------------------------------------------------------------
+# PDFium (in-process, document stays parsed between pages)
+# ----------------------------------------------------------------------------
+class PdfiumDocument(PDFDocument):
+    # PDFium is not thread-safe; serialize all calls into the library
+    _lock = threading.Lock()
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        with self._lock:
+            self._doc = pdfium.PdfDocument(path)
+            self._page_count = len(self._doc)
+
+    @property
+    def page_count(self) -> int:
+        return self._page_count
+
+    def render_array(self, page_number: int, dpi: int, grayscale: bool = False) -> np.ndarray:
+        if page_number < 1 or page_number > self._page_count:
+            raise RuntimeError(f"Failed to convert PDF page {page_number} to image")
+
+        with self._lock:
+            page = self._doc[page_number - 1]
+            try:
+                bitmap = page.render(scale=dpi / 72.0, grayscale=grayscale, rev_byteorder=True)
+                # Copy out of the PDFium-owned buffer before it is released
+                array = np.array(bitmap.to_numpy(), copy=True)
+            finally:
+                page.close()
+
+        if array.ndim == 3 and array.shape[2] == 4:
+            array = np.ascontiguousarray(array[:, :, :3])
+        return array
+
+    def page_size(self, page_number: int) -> Tuple[float, float]:
+        with self._lock:
+            page = self._doc[page_number - 1]
+            try:
+                width, height = page.get_size()
+            finally:
+                page.close()
+        return float(width), float(height)
+
+    def close(self):
+        with self._lock:
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+
+
+class PdfiumRenderer(PDFRenderer):
+    name = "pdfium"
+
+    def open(self, path: str) -> PDFDocument:
+        return PdfiumDocument(path)
+
+
+# ----------------------------------------------------------------------------
+# pdf2image / poppler fallback (one pdftoppm process per render call)
+# ----------------------------------------------------------------------------
+class Pdf2ImageDocument(PDFDocument):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._page_count: Optional[int] = None
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            self._page_count = int(pdfinfo_from_path(self.path).get("Pages", 0))
+        return self._page_count
+
+    def render_array(self, page_number: int, dpi: int, grayscale: bool = False) -> np.ndarray:
+        return np.array(self.render(page_number, dpi, grayscale))
+
+    def render(self, page_number: int, dpi: int, grayscale: bool = False) -> Image.Image:
+        images = convert_from_path(
+            self.path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=grayscale
+        )
+        if not images:
+            raise RuntimeError(f"Failed to convert PDF page {page_number} to image")
+        return images[0] if grayscale else images[0].convert("RGB")
+
+
+class Pdf2ImageRenderer(PDFRenderer):
+    name = "pdf2image"
+
+    def open(self, path: str) -> PDFDocument:
+        return Pdf2ImageDocument(path)
+
+
+def get_renderer(name: Optional[str] = None) -> PDFRenderer:
+    """Return the requested backend, else PDFium when installed, else pdf2image."""
+    if name == Pdf2ImageRenderer.name:
+        return Pdf2ImageRenderer()
+    if pdfium is not None:
+        return PdfiumRenderer()
+    if name == PdfiumRenderer.name:
+        logger.warning("pypdfium2 is not installed; falling back to pdf2image")
+    return Pdf2ImageRenderer()
+
+
+__all__ = [
+    "PDFDocument",
+    "PDFRenderer",
+    "PdfiumRenderer",
+    "Pdf2ImageRenderer",
+    "get_renderer",
+]
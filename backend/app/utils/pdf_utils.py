@@ -1,9 +1,17 @@
 import os
 import uuid
+import logging
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
 import PyPDF2
-from pdf2image import convert_from_path
 from PIL import Image
 
+from app.utils.image_utils import estimate_text_height
+from app.utils.pdf_render import PDFDocument, PDFRenderer, get_renderer
+
+logger = logging.getLogger(__name__)
+
 
 class PDFUtils:
     """
@@ -13,8 +21,13 @@ class PDFUtils:
     - Convert single page to image
     - Convert all pages to images
     - Save images temporarily
+
+    Rendering goes through the default PDFRenderer (in-process PDFium when
+    available, pdf2image/pdftoppm otherwise).
     """
 
+    renderer: PDFRenderer = get_renderer()
+
     @staticmethod
     def is_pdf_file(path: str) -> bool:
         """Check if the given file is a PDF."""
@@ -37,8 +50,8 @@ class PDFUtils:
         page_number is 1-indexed (1 = first page)
         """
         try:
-            images = convert_from_path(path, dpi=dpi, first_page=page_number, last_page=page_number)
-            return images[0]
+            with PDFUtils.renderer.open(path) as doc:
+                return doc.render(page_number, dpi)
         except Exception:
             raise RuntimeError(f"Failed to convert PDF page {page_number} to image")
 
@@ -46,7 +59,8 @@ class PDFUtils:
     def convert_pdf_to_images(path: str, dpi: int = 200) -> list:
         """Convert all pages in a PDF to a list of PIL images."""
         try:
-            return convert_from_path(path, dpi=dpi)
+            with PDFUtils.renderer.open(path) as doc:
+                return [doc.render(n, dpi) for n in range(1, doc.page_count + 1)]
         except Exception:
             raise RuntimeError("Failed to convert PDF to images")
 
@@ -64,3 +78,171 @@ class PDFUtils:
 
         image.save(temp_path)
         return temp_path
+
+
+class AdaptiveDPIRasterizer:
+    """
+    Two-pass PDF rasterizer that picks a DPI per page:
+    1. Render a cheap low-DPI preview
+    2. Estimate glyph height and ink density on the preview
+    3. Re-render at the lowest DPI that puts text at `target_text_height` pixels,
+       clamped to [min_dpi, max_dpi]
+    """
+
+    def __init__(
+        self,
+        preview_dpi: int = 72,
+        min_dpi: int = 100,
+        max_dpi: int = 300,
+        default_dpi: int = 200,
+        target_text_height: float = 28.0,
+        min_measurable_height: float = 4.0,
+        blank_ink_ratio: float = 0.002,
+        dpi_step: int = 10,
+        renderer: Optional[PDFRenderer] = None,
+    ):
+        self.renderer = renderer or PDFUtils.renderer
+        self.preview_dpi = preview_dpi
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self.default_dpi = default_dpi
+        self.target_text_height = target_text_height
+        self.min_measurable_height = min_measurable_height
+        self.blank_ink_ratio = blank_ink_ratio
+        self.dpi_step = dpi_step
+
+    # ----------------------------
+    # DPI selection
+    # ----------------------------
+    def choose_dpi(self, preview: Union[Image.Image, np.ndarray]) -> int:
+        """Pick the render DPI from a preview rendered at `preview_dpi`."""
+        if isinstance(preview, Image.Image):
+            preview = np.asarray(preview.convert("L"))
+        gray = preview
+        ink_ratio = float(np.mean(gray < 128))
+
+        # Blank or near-blank page: nothing worth extra pixels
+        if ink_ratio < self.blank_ink_ratio:
+            return self.min_dpi
+
+        text_height = estimate_text_height(gray)
+        if text_height <= 0:
+            return self.default_dpi
+
+        # Glyphs too small to measure at preview resolution -> fine print
+        if text_height < self.min_measurable_height:
+            return self.max_dpi
+
+        dpi = self.preview_dpi * self.target_text_height / text_height
+        dpi = int(round(dpi / self.dpi_step) * self.dpi_step)
+        return max(self.min_dpi, min(self.max_dpi, dpi))
+
+    # ----------------------------
+    # Rendering
+    # ----------------------------
+    def open(self, path: str) -> PDFDocument:
+        """Open the document once per request; pass it to render_page/render_all."""
+        return self.renderer.open(path)
+
+    def render_page(self, source: Union[str, PDFDocument], page_number: int = 1) -> Tuple[Image.Image, int]:
+        """Render one page (1-indexed) at its adaptive DPI. Returns (image, dpi)."""
+        if isinstance(source, str):
+            with self.open(source) as doc:
+                return self.render_page(doc, page_number)
+
+        preview = source.render_array(page_number, self.preview_dpi, grayscale=True)
+        dpi = self.choose_dpi(preview)
+        logger.info(f"Adaptive DPI: page={page_number} dpi={dpi}")
+        return source.render(page_number, dpi), dpi
+
+    def render_all(
+        self, source: Union[str, PDFDocument], page_numbers: Optional[List[int]] = None
+    ) -> List[Tuple[int, Image.Image, int]]:
+        """Render every page (or `page_numbers`). Returns [(page_number, image, dpi), ...]."""
+        if isinstance(source, str):
+            with self.open(source) as doc:
+                return self.render_all(doc, page_numbers)
+
+        pages = page_numbers or list(range(1, source.page_count + 1))
+        rendered = []
+        for page_number in pages:
+            image, dpi = self.render_page(source, page_number)
+            rendered.append((page_number, image, dpi))
+        return rendered
+
+
+class PDFTextLayerExtractor:
+    """
+    Reads the embedded text layer of born-digital PDF pages with PyPDF2.
+
+    Returns positioned text fragments in pixel coordinates of a page rendered at
+    `dpi`, so they line up with OCR detections and overlays. Pages without a
+    usable text layer (scans, garbled encodings, rotated pages) return None and
+    should fall back to OCR.
+    """
+
+    def __init__(self, min_chars: int = 20, min_printable_ratio: float = 0.9,
+                 ascent: float = 0.8, descent: float = 0.2, char_width: float = 0.5):
+        self.min_chars = min_chars
+        self.min_printable_ratio = min_printable_ratio
+        self.ascent = ascent
+        self.descent = descent
+        self.char_width = char_width
+
+    @staticmethod
+    def open(path: str) -> Optional[PyPDF2.PdfReader]:
+        try:
+            return PyPDF2.PdfReader(path)
+        except Exception as e:
+            logger.warning(f"Could not parse PDF text layer: {e}")
+            return None
+
+    def is_usable(self, fragments: List[dict]) -> bool:
+        text = "".join(f["text"] for f in fragments)
+        chars = [c for c in text if not c.isspace()]
+        if len(chars) < self.min_chars:
+            return False
+        printable = sum(1 for c in chars if c.isprintable() and c != "�")
+        return printable / len(chars) >= self.min_printable_ratio
+
+    def extract_page(self, reader: Optional[PyPDF2.PdfReader], page_number: int, dpi: int) -> Optional[List[dict]]:
+        """Return [{"text", "polygon", "bbox"}] for page `page_number` (1-indexed), or None."""
+        if reader is None or page_number < 1 or page_number > len(reader.pages):
+            return None
+
+        page = reader.pages[page_number - 1]
+        if (page.get("/Rotate") or 0) % 360 != 0:
+            return None
+
+        box = page.mediabox
+        left, top = float(box.left), float(box.top)
+        scale = dpi / 72.0
+        fragments: List[dict] = []
+
+        def visitor(text, cm, tm, font_dict, font_size):
+            for line in (text or "").splitlines():
+                if not line.strip():
+                    continue
+                # Text space -> user space: tm then cm (PDF row-vector convention)
+                x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+                y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+                size = float(font_size or 1.0) * (tm[3] ** 2 + tm[2] ** 2) ** 0.5 * (cm[3] ** 2 + cm[2] ** 2) ** 0.5
+                width = size * self.char_width * len(line)
+
+                x1 = (x - left) * scale
+                x2 = (x + width - left) * scale
+                y1 = (top - (y + size * self.ascent)) * scale
+                y2 = (top - (y - size * self.descent)) * scale
+                fragments.append({
+                    "text": line.strip(),
+                    "polygon": [[x1, y1], [x2, y1], [x2, y2], [x1, y2]],
+                    "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+                })
+
+        try:
+            page.extract_text(visitor_text=visitor)
+        except Exception as e:
+            logger.warning(f"Text layer extraction failed on page {page_number}: {e}")
+            return None
+
+        return fragments if self.is_usable(fragments) else None
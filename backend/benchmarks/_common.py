@@ -0,0 +1,131 @@
+"""Shared helpers for the benchmark scripts (run from backend/: python -m benchmarks.<name>)."""
+import io
+import os
+import time
+import difflib
+import tempfile
+import importlib.util
+import statistics
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import PyPDF2
+from PIL import Image, ImageDraw
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMAGES_DIR = BACKEND_DIR / "tests" / "Images"
+
+
+def _cpu_seconds() -> float:
+    # Includes reaped child processes (e.g. pdftoppm) so subprocess work is not hidden
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def timed(fn: Callable[[], Any], repeat: int = 3) -> Tuple[Any, float, float]:
+    """Run `fn` `repeat` times; return (last result, median wall ms, median CPU ms)."""
+    walls, cpus, result = [], [], None
+    for _ in range(max(1, repeat)):
+        w0, c0 = time.perf_counter(), _cpu_seconds()
+        result = fn()
+        cpus.append((_cpu_seconds() - c0) * 1000.0)
+        walls.append((time.perf_counter() - w0) * 1000.0)
+    return result, statistics.median(walls), statistics.median(cpus)
+
+
+def load_expected_outputs() -> Dict[str, Dict[str, Any]]:
+    """Expected field values from tests/test.py, used as an accuracy reference."""
+    spec = importlib.util.spec_from_file_location("ocr_expected", BACKEND_DIR / "tests" / "test.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.EXPECTED_OUTPUTS
+
+
+def field_recall(text: str, expected_fields: Dict[str, str], threshold: float = 0.8) -> float:
+    """Fraction of expected field values that appear (fuzzily) somewhere in the OCR text."""
+    values = [v for v in expected_fields.values() if v and v.strip()]
+    if not values:
+        return 1.0
+
+    compact = "".join(text.split()).lower()
+    hits = 0
+    for value in values:
+        needle = "".join(value.split()).lower()
+        if needle in compact:
+            hits += 1
+            continue
+        matcher = difflib.SequenceMatcher(None, compact, needle, autojunk=False)
+        block = sum(b.size for b in matcher.get_matching_blocks())
+        if block / max(1, len(needle)) >= threshold:
+            hits += 1
+    return hits / len(values)
+
+
+def text_similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def print_table(headers: List[str], rows: List[List[Any]]):
+    cells = [[str(h) for h in headers]] + [[f"{c:.2f}" if isinstance(c, float) else str(c) for c in r] for r in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
+        if n == 0:
+            print("  ".join("-" * w for w in widths))
+
+
+# ----------------------------
+# Synthetic mixed digital/scanned PDF
+# ----------------------------
+LINES = [f"Line {i + 1}: Name Ananya Sharma, DOB 16/11/2004, Phone +91-9876543210" for i in range(40)]
+
+
+def _digital_page() -> bytes:
+    """Minimal single-page PDF with a Helvetica text layer (no external deps)."""
+    ops = ["BT", "/F1 11 Tf", "14 TL", "72 770 Td"]
+    for line in LINES:
+        ops.append(f"({line}) Tj T*")
+    ops.append("ET")
+    stream = "\n".join(ops).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % n + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _scanned_page() -> bytes:
+    page = Image.new("RGB", (1240, 1754), "white")
+    draw = ImageDraw.Draw(page)
+    for i, line in enumerate(LINES):
+        draw.text((150, 150 + i * 36), line, fill="black")
+    buf = io.BytesIO()
+    page.save(buf, format="PDF", resolution=150)
+    return buf.getvalue()
+
+
+def make_mixed_pdf(pages: int = 6) -> str:
+    writer = PyPDF2.PdfWriter()
+    for i in range(pages):
+        source = PyPDF2.PdfReader(io.BytesIO(_digital_page() if i % 2 == 0 else _scanned_page()))
+        writer.add_page(source.pages[0])
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        writer.write(f)
+    return path
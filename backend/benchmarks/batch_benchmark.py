@@ -0,0 +1,90 @@
+"""
+Batch extraction throughput: N single /extract-style calls vs. one extract_batch().
+
+Every test image is repeated to build a batch of --files documents. The LLM
+field mapper is replaced by a stub that sleeps --llm-ms per call, so the
+numbers show how much of the mapping latency the batch path hides.
+
+- single (sequential): temp file write + extract_single_page + cleanup, one after another
+- single (N threads):  the same with --clients concurrent callers
+- batch:               in-memory decode, cross-document OCR batching, concurrent mapping
+
+    cd backend && python -m benchmarks.batch_benchmark [--files 32] [--llm-ms 150] [--pool 2]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from phocr import PHOCR
+
+from app.ocr_modules.engine_pool import EnginePool
+from app.ocr_modules.modules import ExtractionModuleFactory
+from app.services.services import BatchItem, ExtractionService, PreprocessingService, QualityService
+from benchmarks._common import IMAGES_DIR, print_table
+
+
+class SleepingMapper:
+    """Stands in for the LLM round trip."""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000.0
+
+    def map_fields(self, text, custom_fields=None):
+        time.sleep(self.latency)
+        return {}
+
+
+def build_service(pool_size: int, llm_ms: float) -> ExtractionService:
+    factory = ExtractionModuleFactory()
+    pool = EnginePool("shared", PHOCR, size=pool_size)
+    for lang in ExtractionModuleFactory.MODULE_CLASSES:
+        factory.register_pool(lang, pool)
+    factory.enable_batching(max_batch_size=8, max_wait_ms=5)
+    factory.warm_up()
+    return ExtractionService(factory, PreprocessingService(), QualityService(), SleepingMapper(llm_ms))
+
+
+def single_call(service: ExtractionService, name: str, data: bytes):
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(name)[1])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return service.extract_single_page(path, "en", 1, None)
+    finally:
+        os.remove(path)
+
+
+def run(files: int, llm_ms: float, pool_size: int, clients: int):
+    sources = [p for p in sorted(IMAGES_DIR.iterdir()) if p.suffix.lower() in (".png", ".jpg", ".jpeg")]
+    documents = [(f"{i}_{p.name}", p.read_bytes()) for i, p in zip(range(files), sources * files)]
+    service = build_service(pool_size, llm_ms)
+
+    rows = []
+
+    def measure(label, fn):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        rows.append([label, elapsed * 1000.0, len(documents) / elapsed])
+
+    measure("single (sequential)", lambda: [single_call(service, n, d) for n, d in documents])
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        measure(f"single ({clients} threads)", lambda: list(executor.map(lambda doc: single_call(service, *doc), documents)))
+    items = [BatchItem(n, d) for n, d in documents]
+    measure("batch", lambda: list(service.extract_batch(items)))
+
+    print(f"{len(documents)} documents, pool={pool_size}, llm={llm_ms:.0f} ms/call")
+    print_table(["mode", "total_ms", "files_per_s"], rows)
+    print(f"\nbatch speedup: {rows[2][2] / rows[0][2]:.1f}x vs sequential, {rows[2][2] / rows[1][2]:.1f}x vs threads")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--llm-ms", type=float, default=150.0)
+    parser.add_argument("--pool", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+    run(args.files, args.llm_ms, args.pool, args.clients)
@@ -0,0 +1,88 @@
+"""
+Detection post-processing: per-detection Python loop vs. columnar DetectionBatch.
+
+Synthetic engine output (N quadrilaterals with scores) is turned into response
+detections three ways:
+
+- loop:        boxes.tolist(), then safe_float_conversion / process_bounding_box /
+               get_confidence_level / Detection(...) per detection (previous code)
+- batch:       DetectionBatch bboxes + levels + Detection materialization
+- batch_only:  DetectionBatch bboxes + levels, no pydantic objects
+
+    cd backend && python -m benchmarks.detection_batch_benchmark [--sizes 1000 5000] [--repeat 5]
+"""
+import argparse
+
+import numpy as np
+
+from app.dto.detection_batch import DetectionBatch
+from app.dto.models import Detection
+from app.utils.image_utils import process_bounding_box, get_confidence_level, safe_float_conversion
+from benchmarks._common import timed, print_table
+
+
+def synthetic_result(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, 4000, count)
+    y = rng.uniform(0, 6000, count)
+    w = rng.uniform(20, 400, count)
+    h = rng.uniform(12, 40, count)
+    boxes = np.stack([
+        np.stack([x, y], 1), np.stack([x + w, y], 1), np.stack([x + w, y + h], 1), np.stack([x, y + h], 1),
+    ], 1).astype(np.float32)
+    return {
+        "txts": [f"token{i}" for i in range(count)],
+        "scores": list(rng.uniform(0.3, 1.0, count).astype(np.float32)),
+        "boxes": boxes,
+    }
+
+
+def legacy_loop(result):
+    texts, scores, boxes = result["txts"], result["scores"], result["boxes"].tolist()
+    detections = []
+    for i in range(min(len(texts), len(scores), len(boxes))):
+        score_val = safe_float_conversion(scores[i])
+        detections.append(Detection(
+            text=str(texts[i]),
+            confidence=score_val,
+            bbox=process_bounding_box(boxes[i]),
+            polygon=boxes[i],
+            confidence_level=get_confidence_level(score_val),
+        ))
+    return detections
+
+
+def batch_path(result):
+    return DetectionBatch.from_ocr_result(result).to_detections()
+
+
+def batch_only(result):
+    batch = DetectionBatch.from_ocr_result(result)
+    return batch.bboxes, batch.level_codes, batch.full_text()
+
+
+def run(sizes, repeat: int):
+    rows = []
+    for count in sizes:
+        result = synthetic_result(count)
+
+        legacy, loop_ms, _ = timed(lambda: legacy_loop(result), repeat)
+        columnar, batch_ms, _ = timed(lambda: batch_path(result), repeat)
+        _, only_ms, _ = timed(lambda: batch_only(result), repeat)
+
+        same = all(
+            a.confidence_level == b.confidence_level
+            and all(abs(a.bbox[k] - b.bbox[k]) < 1e-3 for k in ("x1", "y1", "x2", "y2"))
+            for a, b in zip(legacy, columnar)
+        ) and len(legacy) == len(columnar)
+        rows.append([count, loop_ms, batch_ms, only_ms, loop_ms / max(batch_ms, 1e-9), same])
+
+    print_table(["detections", "loop_ms", "batch_ms", "batch_only_ms", "speedup", "identical"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2500, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
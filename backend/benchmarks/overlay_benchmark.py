@@ -0,0 +1,91 @@
+"""
+Confidence overlay cost: previous full-resolution PNG vs. the new overlay modes.
+
+A synthetic A4 page at 300 DPI with dense detections is overlaid as:
+
+- legacy:        RGBA copy, every box drawn twice, full-size PNG (previous code)
+- png:           single blended draw pass, full-size PNG
+- jpeg@1600:     downscaled to 1600 px before drawing, JPEG q80
+- webp@1600:     downscaled to 1600 px before drawing, WebP q80
+- vector:        geometry + level codes only (JSON)
+
+Sizes include base64 inflation for raster modes, as they are inlined in the response.
+
+    cd backend && python -m benchmarks.overlay_benchmark [--detections 1000] [--repeat 3]
+"""
+import argparse
+import base64
+import io
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.api.responses import dumps_json
+from app.dto.detection_batch import DetectionBatch
+from app.services.overlay import OVERLAY_COLORS, OverlayRenderer
+from benchmarks._common import timed, print_table
+from benchmarks.detection_batch_benchmark import synthetic_result
+
+
+def make_page(width: int = 2480, height: int = 3508) -> str:
+    rng = np.random.default_rng(0)
+    page = np.full((height, width, 3), 245, dtype=np.uint8)
+    for y in range(200, height - 200, 60):
+        page[y:y + 24, 150:width - 150] = rng.integers(0, 90, (24, width - 300, 1), dtype=np.uint8)
+    fd, path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    Image.fromarray(page).save(path)
+    return path
+
+
+def legacy_overlay(path: str, batch: DetectionBatch) -> str:
+    overlay = Image.open(path).convert("RGB").copy().convert("RGBA")
+    draw = ImageDraw.Draw(overlay)
+    font = ImageFont.load_default()
+    for box, level, score in zip(batch.bboxes.tolist(), batch.levels, batch.scores.tolist()):
+        color = OVERLAY_COLORS[level]
+        draw.rectangle(box, outline=color[:3], width=3)
+        draw.rectangle(box, fill=color)
+        draw.text((box[0] + 2, box[1] - 20), f"{score:.2f}", fill=(255, 255, 255), font=font)
+    buf = io.BytesIO()
+    overlay.convert("RGB").save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def run(detections: int, repeat: int):
+    path = make_page()
+    result = synthetic_result(detections)
+    result["boxes"] = result["boxes"] * np.array([2480 / 4400.0, 3508 / 6040.0], dtype=np.float32)
+    batch = DetectionBatch.from_ocr_result(result)
+    renderer = OverlayRenderer(quality=80)
+    width, height = Image.open(path).size
+
+    modes = [
+        ("legacy", lambda: legacy_overlay(path, batch)),
+        ("png", lambda: renderer.render_base64(path, batch, image_format="png")),
+        ("jpeg@1600", lambda: renderer.render_base64(path, batch, max_dimension=1600, image_format="jpeg")),
+        ("webp@1600", lambda: renderer.render_base64(path, batch, max_dimension=1600, image_format="webp")),
+        ("vector", lambda: dumps_json(renderer.vector(batch, width, height)).decode()),
+    ]
+
+    rows, baseline = [], None
+    try:
+        for name, fn in modes:
+            payload, ms, _ = timed(fn, repeat)
+            baseline = baseline or (len(payload), ms)
+            rows.append([name, len(payload) / 1024.0, ms, baseline[0] / len(payload), baseline[1] / max(ms, 1e-9)])
+    finally:
+        os.remove(path)
+
+    print(f"{width}x{height} page, {len(batch)} detections")
+    print_table(["mode", "payload_kb", "ms", "size_ratio", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detections", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.detections, args.repeat)
@@ -0,0 +1,42 @@
+"""
+Per-page PDF render latency and CPU time: in-process PDFium vs. pdf2image (pdftoppm).
+
+CPU time includes child processes, so the cost of spawning pdftoppm is visible.
+
+    cd backend && python -m benchmarks.pdf_render_benchmark [file.pdf ...] [--dpi 200] [--repeat 3]
+"""
+import argparse
+import os
+
+from app.utils.pdf_render import PdfiumRenderer, Pdf2ImageRenderer
+from benchmarks._common import timed, print_table, make_mixed_pdf
+
+
+def run(paths, dpi: int, repeat: int):
+    renderers = [Pdf2ImageRenderer(), PdfiumRenderer()]
+    rows = []
+    for path in paths:
+        for renderer in renderers:
+            # Document opened once per request, as ExtractionService does
+            def render_document(grayscale=False):
+                with renderer.open(path) as doc:
+                    return [doc.render_array(n, dpi, grayscale).shape for n in range(1, doc.page_count + 1)]
+
+            shapes, wall_ms, cpu_ms = timed(render_document, repeat)
+            _, gray_ms, gray_cpu = timed(lambda: render_document(True), repeat)
+            pages = max(1, len(shapes))
+            rows.append([
+                os.path.basename(path), renderer.name, pages,
+                wall_ms / pages, cpu_ms / pages, gray_ms / pages, gray_cpu / pages,
+            ])
+
+    print_table(["document", "renderer", "pages", "rgb_ms/page", "rgb_cpu/page", "gray_ms/page", "gray_cpu/page"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.pdfs or [make_mixed_pdf()], args.dpi, args.repeat)
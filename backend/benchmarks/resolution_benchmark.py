@@ -0,0 +1,70 @@
+"""
+Resolution normalization: latency and accuracy on tests/Images.
+
+Compares OCR on the native image against OCR after the `resize` preprocessing
+stage (with boxes remapped to original coordinates). Accuracy is measured as
+recall of the expected field values from tests/test.py inside the OCR text,
+plus text similarity between both runs.
+
+    cd backend && python -m benchmarks.resolution_benchmark [--repeat 3]
+"""
+import argparse
+
+from PIL import Image
+from phocr import PHOCR
+
+from app.ocr_modules.modules import LatinExtractionModule
+from app.services.services import PreprocessingService
+from benchmarks._common import (
+    IMAGES_DIR, timed, load_expected_outputs, field_recall, text_similarity, print_table,
+)
+
+
+def run(repeat: int):
+    module = LatinExtractionModule(PHOCR())
+    native = PreprocessingService({"*:*": []})
+    normalized = PreprocessingService({"*:*": ["resize"]})
+    expected = load_expected_outputs()
+
+    rows = []
+    for path in sorted(IMAGES_DIR.iterdir()):
+        image = Image.open(path).convert("RGB")
+        fields = expected.get(path.name, {}).get("mapped_fields", {})
+
+        def ocr(service):
+            ctx = service.run(image)
+            result = module.extract(ctx.image)
+            return ctx, result
+
+        (_, base), base_ms, _ = timed(lambda: ocr(native), repeat)
+        (ctx, norm), norm_ms, _ = timed(lambda: ocr(normalized), repeat)
+
+        base_text = " ".join(base["txts"])
+        norm_text = " ".join(norm["txts"])
+        rows.append([
+            path.name,
+            f"{image.width}x{image.height}",
+            ctx.stats.get("text_height", 0.0),
+            ctx.stats.get("resize_scale", 1.0) if "resize" in ctx.applied else 1.0,
+            base_ms,
+            norm_ms,
+            field_recall(base_text, fields),
+            field_recall(norm_text, fields),
+            text_similarity(base_text, norm_text),
+        ])
+
+    print_table(
+        ["image", "size", "text_h", "scale", "native_ms", "resized_ms",
+         "recall_native", "recall_resized", "text_sim"],
+        rows,
+    )
+    total_base = sum(r[4] for r in rows)
+    total_norm = sum(r[5] for r in rows)
+    print(f"\nTotal OCR time: native={total_base:.1f} ms, normalized={total_norm:.1f} ms "
+          f"({(1 - total_norm / max(total_base, 1e-9)) * 100:.1f}% saved)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args().repeat)
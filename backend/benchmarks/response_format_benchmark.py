@@ -0,0 +1,71 @@
+"""
+Response payload size and serialization time: full vs. compact formats.
+
+Builds a synthetic multi-page /extract/pdf/all response (dense pages from
+detection_batch_benchmark) and encodes it as:
+
+- full/json:      ExtractionResponse dict + stdlib json (previous default)
+- full/fast:      ExtractionResponse dict + FastJSONResponse encoder (orjson when installed)
+- compact/fast:   columnar arrays + FastJSONResponse encoder
+- compact/msgpack columnar arrays + MessagePack (when installed)
+
+Sizes are reported raw and gzip-compressed (level 6, as served by GZipMiddleware).
+
+    cd backend && python -m benchmarks.response_format_benchmark [--pages 10] [--detections 1000]
+"""
+import argparse
+import gzip
+import json
+
+from app.api import responses
+from app.dto.detection_batch import DetectionBatch
+from app.dto.models import ExtractionPageResult, ExtractionProcessingInfo, ExtractionResponse
+from benchmarks._common import timed, print_table
+from benchmarks.detection_batch_benchmark import synthetic_result
+
+
+def build_response(pages: int, detections: int) -> ExtractionResponse:
+    results = {}
+    for page in range(1, pages + 1):
+        batch = DetectionBatch.from_ocr_result(synthetic_result(detections, seed=page))
+        results[str(page)] = ExtractionPageResult(
+            page_number=page,
+            detections=batch.to_detections(),
+            mapped_fields={"Name": "John Smith"},
+            processing_info=ExtractionProcessingInfo(page_number=page, is_pdf=True, dpi=200),
+        ).attach_batch(batch)
+    return ExtractionResponse(pages=results, is_pdf=True)
+
+
+def run(pages: int, detections: int, repeat: int):
+    response = build_response(pages, detections)
+
+    encoders = [
+        ("full/json", lambda: json.dumps(
+            responses.model_to_dict(response), ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+        ("full/fast", lambda: responses.dumps_json(responses.model_to_dict(response))),
+        ("compact/fast", lambda: responses.dumps_json(responses.to_compact(response))),
+    ]
+    if responses.msgpack is not None:
+        encoders.append(("compact/msgpack", lambda: responses.dumps_msgpack(responses.to_compact(response))))
+
+    rows, baseline = [], None
+    for name, encode in encoders:
+        payload, ms, _ = timed(encode, repeat)
+        gz = len(gzip.compress(payload, compresslevel=6))
+        baseline = baseline or (len(payload), ms)
+        rows.append([name, len(payload) / 1024.0, gz / 1024.0, ms,
+                     baseline[0] / len(payload), baseline[1] / max(ms, 1e-9)])
+
+    print(f"{pages} pages x {detections} detections; orjson={'yes' if responses.orjson else 'no'}, "
+          f"msgpack={'yes' if responses.msgpack else 'no'}")
+    print_table(["encoding", "size_kb", "gzip_kb", "encode_ms", "size_ratio", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--detections", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.pages, args.detections, args.repeat)
@@ -0,0 +1,94 @@
+"""
+Result store: cost of saving results and of looking them up again.
+
+--results synthetic single-page results (--detections each, words drawn from a
+small vocabulary plus one unique serial per document) are saved, then:
+
+- get (memory):  get() of ids still in the in-memory LRU
+- get (sqlite):  get() of ids evicted from it (primary key read + decompress + JSON parse)
+- by_hash:       metadata of one document's results (indexed)
+- search (fts):  FTS5 trigram MATCH, newest first, with snippets
+- search (like): the same query scanned with LIKE, what search costs without the index
+
+Searches run twice: a rare term (one document's serial) and two common words
+found in nearly every document.
+
+    cd backend && python -m benchmarks.result_store_benchmark [--results 5000] [--detections 60]
+"""
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+
+from app.dto.models import Detection, ExtractionProcessingInfo, ExtractionResponse
+from app.services.result_store import ResultStore
+from benchmarks._common import print_table
+
+VOCABULARY = (
+    "name date birth address phone passport number nationality issued expiry male female "
+    "republic government licence vehicle class blood group valid until signature holder"
+).split()
+
+
+def synthetic_response(i: int, detections: int, rng: random.Random) -> ExtractionResponse:
+    texts = [" ".join(rng.choice(VOCABULARY) for _ in range(3)) for _ in range(detections - 1)] + [f"SERIAL{i:08d}"]
+    return ExtractionResponse(
+        mapped_fields={"name": texts[0], "serial": texts[-1]},
+        detections=[
+            Detection(bbox={"x1": 10.0, "y1": 20.0 * n, "x2": 300.0, "y2": 20.0 * n + 18}, text=t, confidence=0.93)
+            for n, t in enumerate(texts)
+        ],
+        total_detections=len(texts),
+        has_detection_data=True,
+        processing_info=ExtractionProcessingInfo(language="en"),
+    )
+
+
+def per_call_us(fn, args) -> float:
+    start = time.perf_counter()
+    for a in args:
+        fn(a)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def run(results: int, detections: int, lookups: int):
+    rng = random.Random(0)
+    responses = [synthetic_response(i, detections, rng) for i in range(results)]
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(results)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(f"{tmp}/results.db", max_entries=0, ttl_seconds=0, cache_size=256)
+        start = time.perf_counter()
+        ids = [store.save(r, h, "extract", f"doc{i}.png", "en", 1) for i, (r, h) in enumerate(zip(responses, hashes))]
+        save_ms = (time.perf_counter() - start) * 1000.0 / results
+
+        recent = ids[-min(lookups, store.cache_size):]
+        evicted = rng.sample(ids[:-store.cache_size], min(lookups, results - store.cache_size))
+        rare, common = "SERIAL00000042", "passport nationality"
+
+        rows = [
+            ["save", save_ms * 1000.0],
+            ["get (memory)", per_call_us(store.get, recent)],
+            ["get (sqlite)", per_call_us(store.get, evicted)],
+            ["by_hash", per_call_us(store.by_hash, rng.sample(hashes, lookups))],
+            ["search rare (fts)", per_call_us(lambda q: store.search(q, 20), [rare] * 20)],
+            ["search common (fts)", per_call_us(lambda q: store.search(q, 20), [common] * 20)],
+        ]
+        store.fts = False
+        rows.append(["search rare (like)", per_call_us(lambda q: store.search(q, 20), [rare] * 20)])
+        rows.append(["search common (like)", per_call_us(lambda q: store.search(q, 20), [common] * 20)])
+        stats = store.stats()
+
+    print(f"{results} results x {detections} detections, {stats['file_bytes'] / 1e6:.1f} MB on disk "
+          f"({stats['result_bytes'] / results / 1024:.1f} KB compressed per result)")
+    print_table(["operation", "us_per_call"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=5000)
+    parser.add_argument("--detections", type=int, default=60)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    run(args.results, args.detections, args.lookups)
@@ -0,0 +1,74 @@
+"""
+Script auto-detection: accuracy and cost on tests/Images.
+
+For every image, language="auto" is classified (after the default
+preprocessing) and compared against the script the document is written in.
+The table shows the classifier cost (probe OCR included) next to one
+full-resolution OCR pass of the chosen module; `reused` marks pages whose
+probe already was that pass, so auto mode costs them no second OCR.
+
+    cd backend && python -m benchmarks.script_detection_benchmark [--repeat 2]
+"""
+import argparse
+
+import numpy as np
+from PIL import Image
+from phocr import PHOCR
+
+from app.ocr_modules.engine_pool import EnginePool
+from app.ocr_modules.modules import ExtractionModuleFactory
+from app.ocr_modules.script_detection import ScriptClassifier
+from app.services.services import PreprocessingService
+from benchmarks._common import IMAGES_DIR, timed, print_table
+
+# Script each test document is written in (2.png is the unreadable rejection case)
+EXPECTED_SCRIPTS = {
+    "1.png": "han",
+    "3.png": "latin",
+    "4.jpg": "latin",
+    "5.jpg": "kana",
+    "6.jpeg": "han",
+    "7.png": "latin",
+    "8.png": "latin",
+    "9.png": "latin",
+}
+
+
+def run(repeat: int):
+    factory = ExtractionModuleFactory()
+    pool = EnginePool("shared", PHOCR)
+    for lang in ExtractionModuleFactory.MODULE_CLASSES:
+        factory.register_pool(lang, pool)
+    classifier = ScriptClassifier(factory)
+    preprocessor = PreprocessingService()
+
+    rows = []
+    for name, expected in EXPECTED_SCRIPTS.items():
+        path = IMAGES_DIR / name
+        if not path.exists():
+            continue
+        buffer = preprocessor.run(Image.open(path).convert("RGB"), "auto", "extract").image
+
+        detection, _, _ = timed(lambda: classifier.detect(buffer), repeat)
+        _, ocr_ms, _ = timed(lambda: factory.get_module(detection.language).extract(buffer), repeat)
+        rows.append([
+            name, expected, detection.script, detection.script == expected,
+            detection.ocr_result is not None, detection.elapsed_ms, ocr_ms,
+        ])
+
+    print_table(["image", "expected", "detected", "correct", "reused", "classifier_ms", "ocr_ms"], rows)
+    correct = sum(1 for r in rows if r[3])
+    # A reused probe replaces the OCR pass, so only the non-reused classifier cost is extra
+    overhead = np.mean([(0.0 if r[4] else r[5]) / max(r[6], 1e-9) for r in rows]) if rows else 0.0
+    reused = sum(1 for r in rows if r[4])
+    print(
+        f"\naccuracy {correct}/{len(rows)}, probe reused on {reused}/{len(rows)}, "
+        f"mean extra cost {overhead * 100:.1f}% of one OCR pass"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    run(args.repeat)
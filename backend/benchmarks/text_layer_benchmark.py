@@ -0,0 +1,55 @@
+"""
+Embedded text-layer fast path vs. rasterize + OCR on mixed digital/scanned PDFs.
+
+Pass your own PDFs, or omit them to generate a synthetic mixed document
+(alternating born-digital and image-only pages).
+
+    cd backend && python -m benchmarks.text_layer_benchmark [file.pdf ...] [--repeat 2]
+"""
+import argparse
+import os
+
+from phocr import PHOCR
+
+from app.ocr_modules.modules import LatinExtractionModule
+from app.utils.pdf_utils import PDFUtils, AdaptiveDPIRasterizer, PDFTextLayerExtractor
+from benchmarks._common import timed, print_table, make_mixed_pdf
+
+def run(paths, repeat: int):
+    module = LatinExtractionModule(PHOCR())
+    rasterizer = AdaptiveDPIRasterizer()
+    text_layer = PDFTextLayerExtractor()
+
+    rows = []
+    for path in paths:
+        reader = text_layer.open(path)
+        for page in range(1, PDFUtils.get_pdf_page_count(path) + 1):
+            def ocr_only():
+                image, _ = rasterizer.render_page(path, page)
+                return len(module.extract(image)["txts"])
+
+            def fast_path():
+                fragments = text_layer.extract_page(reader, page, rasterizer.default_dpi)
+                if fragments is not None:
+                    return "text_layer", len(fragments)
+                return "ocr", ocr_only()
+
+            ocr_count, ocr_ms, _ = timed(ocr_only, repeat)
+            (source, count), fast_ms, _ = timed(fast_path, repeat)
+            rows.append([os.path.basename(path), page, source, ocr_count, count, ocr_ms, fast_ms])
+
+    print_table(["document", "page", "source", "ocr_dets", "fast_dets", "ocr_ms", "fast_path_ms"], rows)
+    total_ocr = sum(r[5] for r in rows)
+    total_fast = sum(r[6] for r in rows)
+    digital = sum(1 for r in rows if r[2] == "text_layer")
+    print(f"\n{digital}/{len(rows)} pages served from the text layer; "
+          f"ocr={total_ocr:.1f} ms, fast path={total_fast:.1f} ms "
+          f"({(1 - total_fast / max(total_ocr, 1e-9)) * 100:.1f}% saved)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    run(args.pdfs or [make_mixed_pdf()], args.repeat)
@@ -0,0 +1,95 @@
+"""
+Verification throughput: submitted records checked against one extraction.
+
+--records synthetic records (a mix of exact, reformatted and mistyped values of
+five fields: name, date, phone, id number, address) are verified three ways:
+
+- per record, python:  VerificationService normalization with a pure-Python
+                       Levenshtein per value (what a record-at-a-time loop costs)
+- per record, engine:  verify() once per record
+- bulk:                one verify_bulk() call (one bit-parallel edit-distance pass per field)
+
+    cd backend && python -m benchmarks.verification_benchmark [--records 10000]
+"""
+import argparse
+import random
+import time
+
+from app.services.services import VerificationService
+from app.services.verification import infer_field_type, normalize
+from benchmarks._common import print_table
+
+EXTRACTED = {
+    "name": "ANANYA SHARMA",
+    "date_of_birth": "16/11/2004",
+    "phone": "+91 98765 43210",
+    "passport_number": "Z 1234-567",
+    "address": "12, MG Road, Bengaluru 560001",
+}
+
+VARIANTS = {
+    "name": ["Ananya Sharma", "ananya  sharma", "Ananya Sarma", "Anaya Sharma", "Ravi Kumar"],
+    "date_of_birth": ["2004-11-16", "16 Nov 2004", "16.11.04", "17/11/2004", "2004年11月16日"],
+    "phone": ["09876543210", "98765 43210", "+91-98765-43211", "9876543210", "12345"],
+    "passport_number": ["Z1234567", "z 1234 567", "Z1234568", "Z-1234-567", "Y7654321"],
+    "address": ["12 MG Road Bengaluru 560001", "12, M.G. Road, Bengaluru", "１２, MG Road, Bengaluru 560001",
+                "14 Brigade Road", "12, MG Road, Bangalore 560001"],
+}
+
+
+def levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def python_loop(service: VerificationService, records):
+    matched = 0
+    for record in records:
+        ok = True
+        for name, value in record.items():
+            field_type = infer_field_type(name)
+            expected = normalize(EXTRACTED[name], field_type)
+            submitted = normalize(value, field_type)
+            longest = max(len(expected), len(submitted), 1)
+            score = 1.0 - levenshtein(expected, submitted) / longest
+            if field_type == "phone" and min(len(expected), len(submitted)) >= 7 and (
+                    expected.endswith(submitted) or submitted.endswith(expected)):
+                score = 1.0
+            ok &= score >= service.thresholds[field_type]
+        matched += ok
+    return matched
+
+
+def run(count: int):
+    rng = random.Random(0)
+    records = [{name: rng.choice(values) for name, values in VARIANTS.items()} for _ in range(count)]
+    service = VerificationService()
+
+    rows = []
+
+    def measure(label, fn):
+        start = time.perf_counter()
+        matched = fn()
+        elapsed = time.perf_counter() - start
+        rows.append([label, elapsed * 1000.0, count / elapsed, matched])
+
+    measure("per record, python", lambda: python_loop(service, records))
+    measure("per record, engine", lambda: sum(
+        all(f["match"] for f in service.verify(r, EXTRACTED).values()) for r in records
+    ))
+    measure("bulk", lambda: service.verify_bulk(records, EXTRACTED)["matched_records"])
+
+    print(f"{count} records x {len(VARIANTS)} fields")
+    print_table(["mode", "total_ms", "records_per_s", "matched"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+    run(args.records)